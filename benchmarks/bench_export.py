@@ -0,0 +1,70 @@
+"""Benchmark: write time and peak memory of each report export backend.
+
+Every backend runs in a fresh process and peak memory is the highest RSS
+sampled while writing, minus the RSS before (Linux only, it reads
+/proc/self/statm). Run from the repository root:
+
+    python -m benchmarks.bench_export --rows 100000
+"""
+import argparse
+import gc
+import multiprocessing
+import time
+
+import numpy as np
+import pandas as pd
+
+from export import export_tables
+from instrumentation import RssSampler
+
+# (label, export format, Excel engine)
+BACKENDS = [
+    ('xlsx / pandas+openpyxl', 'xlsx', 'pandas'),
+    ('xlsx / openpyxl write-only', 'xlsx', 'openpyxl'),
+    ('xlsx / xlsxwriter constant-memory', 'xlsx', 'xlsxwriter'),
+    ('csv', 'csv', None),
+    ('parquet', 'parquet', None),
+]
+
+def make_report_frame(rows, seed=0):
+    """Build a frame shaped like the matched signup report"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Full Name': [f'Participant {i}' for i in range(rows)],
+        'Email ID': [f'user{i}@example.com' for i in range(rows)],
+        'Phone Number': rng.integers(6_000_000_000, 9_999_999_999, rows).astype(str),
+        'Aadhaar Last 4 Digits': rng.integers(0, 10_000, rows).astype(str),
+        'University Name': rng.choice([f'University {i}' for i in range(500)], rows),
+        'State': rng.choice(['Delhi', 'Kerala', 'Maharashtra', 'Tamil Nadu', 'Punjab'], rows),
+        'Registered_Team': rng.choice(['Yes', 'No'], rows),
+        'Team_Name': rng.choice([f'Team {i}' for i in range(rows // 4 + 1)], rows),
+        'Team_Role': rng.choice(['Team Leader', 'Member'], rows),
+    })
+
+def _run_backend(rows, export_format, excel_engine, results):
+    df = make_report_frame(rows)
+    gc.collect()
+    with RssSampler() as sampler:
+        start = time.perf_counter()
+        data = export_tables({'Registration Status': df}, export_format, excel_engine=excel_engine)
+        elapsed = time.perf_counter() - start
+    results.put((elapsed, sampler.peak_increase, len(data)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'backend':<36}{'write (s)':>10}{'peak +MB':>10}{'size MB':>10}")
+    for label, export_format, excel_engine in BACKENDS:
+        results = context.Queue()
+        process = context.Process(target=_run_backend, args=(args.rows, export_format, excel_engine, results))
+        process.start()
+        elapsed, peak_bytes, size = results.get()
+        process.join()
+        print(f"{label:<36}{elapsed:>10.2f}{peak_bytes / 2**20:>10.1f}{size / 2**20:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark: speed and accuracy of the blocked fuzzy matching pass.
+
+Builds a synthetic event and plants typos in the email and phone of a
+share of the registered signups: swapped adjacent characters and a
+misspelt email domain. The typos make those signups miss every exact key.
+Aadhaar is blanked, so exact matching can't fall back on it. The fuzzy
+pass should recover the planted signups' teams.
+
+A second run forces every signup to count as unmatched, to time the
+worst case. Run from the repository root:
+
+    python -m benchmarks.bench_fuzzy --signups 50000 --team-members 15000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.generate_data import generate_event
+from fuzzy_match import fuzzy_match_users
+from pipeline import clean_signup_data, match_users, process_registration_data
+
+DOMAIN_TYPOS = {'gmail.com': 'gmial.com', 'yahoo.com': 'yaho.com', 'outlook.com': 'outlok.com'}
+
+
+def swap_adjacent(rng, text):
+    """Swap two adjacent characters somewhere in text"""
+    if len(text) < 2:
+        return text
+    i = int(rng.integers(0, len(text) - 1))
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+def misspell_email(rng, email):
+    local, _, domain = email.partition('@')
+    if domain in DOMAIN_TYPOS and rng.random() < 0.5:
+        return f'{local}@{DOMAIN_TYPOS[domain]}'
+    return f'{swap_adjacent(rng, local)}@{domain}'
+
+def time_fuzzy(result_df, df_team_members):
+    start = time.perf_counter()
+    result_df = fuzzy_match_users(result_df, df_team_members)
+    return time.perf_counter() - start, result_df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signups', type=int, default=50_000)
+    parser.add_argument('--team-members', type=int, default=15_000)
+    parser.add_argument('--typo-fraction', type=float, default=0.2, help="Share of registered signups given typos")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    df_signup, df_registration = generate_event(args.signups, seed=args.seed,
+                                                registered_fraction=args.team_members / args.signups)
+    df_team_members = process_registration_data(df_registration)
+    df_signup['Aadhaar Last 4 Digits'] = None
+
+    truth = match_users(df_signup, df_team_members)
+    registered = np.flatnonzero(truth['Registered_Team'] == 'Yes')
+    planted = rng.choice(registered, size=int(len(registered) * args.typo_fraction), replace=False)
+    for row in planted:
+        df_signup.at[row, 'Email ID'] = misspell_email(rng, str(truth.at[row, 'Email_Clean']))
+        df_signup.at[row, 'Phone Number'] = swap_adjacent(rng, str(truth.at[row, 'Phone_Clean']))
+
+    print(f"{len(df_signup)} signups, {len(df_team_members)} team members, {len(planted)} planted typos")
+    result_df = match_users(df_signup, df_team_members)
+    missed = int((result_df.loc[planted, 'Registered_Team'] == 'No').sum())
+    elapsed, result_df = time_fuzzy(result_df, df_team_members)
+
+    fuzzy = result_df['Match_Type'] == 'Fuzzy'
+    correct = fuzzy & (result_df['Team_Name'] == truth['Team_Name'])
+    recovered = int(correct.iloc[planted].sum())
+    print(f"planted typos missed by exact matching: {missed}")
+    print(f"fuzzy pass: {elapsed:.2f}s, {int(fuzzy.sum())} matches, {int(correct.sum())} with the right team, "
+          f"{recovered}/{missed} planted typos recovered, "
+          f"median confidence {result_df.loc[fuzzy, 'Match_Confidence'].median():.3f}")
+
+    # Worst case: every signup goes through the fuzzy pass
+    all_unmatched = clean_signup_data(df_signup)
+    all_unmatched['Registered_Team'] = 'No'
+    all_unmatched['Team_Name'] = ''
+    all_unmatched['Team_Role'] = ''
+    elapsed, result_df = time_fuzzy(all_unmatched, df_team_members)
+    print(f"all {len(df_signup)} signups unmatched: {elapsed:.2f}s, "
+          f"{int((result_df['Match_Type'] == 'Fuzzy').sum())} fuzzy matches")
+
+
+if __name__ == '__main__':
+    main()
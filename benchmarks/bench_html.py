@@ -0,0 +1,54 @@
+"""Benchmark: reading a portal-style HTML "Excel" export.
+
+Compares pd.read_html(...)[0], which parses the whole page and every
+table, with the streaming read_first_html_table, and checks that both
+return the same frame. The page holds the signup table followed by a few
+small layout tables, as portal exports often do. Run from the
+repository root:
+
+    python -m benchmarks.bench_html --signups 100000
+"""
+import argparse
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.generate_data import generate_event
+from html_table import read_first_html_table
+from instrumentation import RssSampler
+
+
+def html_export(df, extra_tables):
+    """An HTML page with df as its first table and some small tables after it"""
+    footer = pd.DataFrame({'Generated by': ['portal'], 'Page': [1]}).to_html(index=False)
+    return (f'<html><head><meta charset="utf-8"></head><body>{df.to_html(index=False, na_rep="")}'
+            f'{footer * extra_tables}</body></html>').encode('utf-8')
+
+def measure(name, func, data):
+    with RssSampler() as sampler:
+        start = time.perf_counter()
+        df = func(BytesIO(data))
+        elapsed = time.perf_counter() - start
+    print(f"{name:<22}{elapsed:>9.2f}s{sampler.peak_increase / 1024 ** 2:>10.1f} MB peak +RSS")
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signups', type=int, default=100_000)
+    parser.add_argument('--extra-tables', type=int, default=20, help="Small tables after the data table")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df_signup, _ = generate_event(args.signups, seed=args.seed)
+    data = html_export(df_signup, args.extra_tables)
+    print(f"{len(df_signup)} rows, {len(data) / 1024 ** 2:.1f} MB of HTML")
+
+    streamed = measure('read_first_html_table', read_first_html_table, data)
+    expected = measure('pd.read_html()[0]', lambda file: pd.read_html(file)[0], data)
+    pd.testing.assert_frame_equal(streamed, expected)
+    print("same frame: yes")
+
+
+if __name__ == '__main__':
+    main()
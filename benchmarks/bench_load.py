@@ -0,0 +1,82 @@
+"""Benchmark: reading a signup export and a registration workbook, in-process vs in worker processes.
+
+Times each upload's parse on its own (against the estimate the loader
+decides with), then ingest.read_files_concurrently on both with each
+worker count, starting from an empty ingestion cache every time. Every
+result is checked against the in-process one. Run from the repository
+root, on the kind of host the app is deployed to:
+
+    python -m benchmarks.bench_load --signups 200000 --signup-format xlsx --workers 1 2
+"""
+import argparse
+import os
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.bench_parallel import default_worker_counts, time_call
+from benchmarks.generate_data import generate_event
+from export import export_tables
+from ingest import (
+    POOL_OVERHEAD_SECONDS, _parse_file, configure_ingest_cache, estimated_parse_seconds, parallel_saving_seconds,
+    read_files_concurrently,
+)
+from parallel_match import resolve_workers
+
+
+def upload(data, name):
+    """In-memory stand-in for a Streamlit upload"""
+    file = BytesIO(data)
+    file.name = name
+    return file
+
+def event_uploads(signups, signup_format='csv'):
+    """{label: upload} of one event: signups as CSV or xlsx, registrations as an xlsx workbook"""
+    df_signup, df_registration = generate_event(signups)
+    if signup_format == 'csv':
+        signup_upload = upload(df_signup.to_csv(index=False).encode(), 'signups.csv')
+    else:
+        signup_upload = upload(export_tables({'Sheet1': df_signup}, 'xlsx'), 'signups.xlsx')
+    return {
+        'signups': signup_upload,
+        'registrations': upload(export_tables({'Sheet1': df_registration}, 'xlsx'), 'registrations.xlsx'),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signups', type=int, default=200_000)
+    parser.add_argument('--signup-format', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--workers', type=int, nargs='+', default=default_worker_counts() + [2])
+    args = parser.parse_args()
+
+    files = event_uploads(args.signups, args.signup_format)
+    print(f"{os.cpu_count()} cores")
+    print(f"{'file':<22}{'MB':>8}{'estimate':>10}{'parse':>10}")
+    for file in files.values():
+        elapsed, _ = time_call(_parse_file, file, file.name)
+        print(f"{file.name:<22}{len(file.getvalue()) / 2**20:>8.1f}{estimated_parse_seconds(file):>9.2f}s"
+              f"{elapsed:>9.2f}s")
+    saving = parallel_saving_seconds(list(files.values()), resolve_workers(0))
+    print(f"Default (one worker per core): expected saving {saving:.2f}s vs {POOL_OVERHEAD_SECONDS:.2f}s overhead, "
+          f"{'worker processes' if saving > POOL_OVERHEAD_SECONDS else 'in-process'}")
+
+    expected = None
+    print(f"{'workers':>8}{'seconds':>10}")
+    for workers in sorted(set(args.workers)):
+        configure_ingest_cache(disk_dir=None)
+        start = time.perf_counter()
+        # min_saving=-1 so the pool is used whatever the files
+        results = read_files_concurrently(files, workers=workers, min_saving=-1)
+        elapsed = time.perf_counter() - start
+        for label, result in results.items():
+            if isinstance(result, Exception):
+                raise result
+            if expected is not None:
+                pd.testing.assert_frame_equal(result, expected[label])
+        expected = expected or results
+        print(f"{workers:>8}{elapsed:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Micro-benchmark: row-by-row cleaners vs the columnar normalizers.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_normalize --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from normalize import (
+    clean_aadhaar, clean_aadhaar_column, clean_email, clean_email_column,
+    clean_phone_column, clean_phone_number,
+)
+
+
+def make_columns(rows, seed=0):
+    """Build phone, email and Aadhaar columns shaped like real signup exports"""
+    rng = np.random.default_rng(seed)
+    missing = rng.random(rows) < 0.05
+
+    numbers = rng.integers(6_000_000_000, 9_999_999_999, rows).astype(str)
+    prefixes = rng.choice(['', '+91 ', '+91-', '0'], rows)
+    phones = pd.Series(np.char.add(prefixes, numbers), dtype=object).mask(missing)
+
+    users = rng.integers(0, rows, rows).astype(str)
+    domains = rng.choice(['@gmail.com ', '@Yahoo.com', ' @college.edu.in'], rows)
+    emails = pd.Series(np.char.add(np.char.add(' User', users), domains), dtype=object).mask(missing)
+
+    aadhaar = pd.Series(rng.integers(0, 10_000, rows).astype(str), dtype=object)
+    aadhaar = aadhaar.str.zfill(4).mask(missing)
+    return {'phone': phones, 'email': emails, 'aadhaar': aadhaar}
+
+def time_call(func, column):
+    """Return (seconds, result) for a single call"""
+    start = time.perf_counter()
+    result = func(column)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    columns = make_columns(args.rows)
+    cases = [
+        ('phone', clean_phone_number, clean_phone_column),
+        ('email', clean_email, clean_email_column),
+        ('aadhaar', clean_aadhaar, clean_aadhaar_column),
+    ]
+
+    print(f"{'column':<10}{'apply (s)':>12}{'columnar (s)':>14}{'speedup':>10}")
+    for name, row_func, column_func in cases:
+        apply_time, expected = time_call(lambda col: col.apply(row_func), columns[name])
+        column_time, result = time_call(column_func, columns[name])
+        if not expected.equals(result):
+            raise AssertionError(f"{name}: columnar output differs from row-by-row output")
+        print(f"{name:<10}{apply_time:>12.3f}{column_time:>14.3f}{apply_time / column_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark: scaling of partitioned parallel matching across worker processes.
+
+Matches one synthetic event with pipeline.match_users, then with
+match_users_parallel at each worker count. Every parallel result is
+checked against the serial one. Run from the repository root:
+
+    python -m benchmarks.bench_parallel --signups 2000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from benchmarks.generate_data import generate_event
+from parallel_match import match_users_parallel
+from pipeline import match_users, process_registration_data
+
+
+def default_worker_counts():
+    """1, 2, 4, ... up to the number of cores"""
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    return counts
+
+def time_call(func, *args, **kwargs):
+    """Return (seconds, result) for a single call"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signups', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=default_worker_counts())
+    args = parser.parse_args()
+
+    df_signup, df_registration = generate_event(args.signups)
+    df_team_members = process_registration_data(df_registration)
+    print(f"{len(df_signup)} signups, {len(df_team_members)} team members, {os.cpu_count()} cores")
+
+    serial_time, expected = time_call(match_users, df_signup, df_team_members)
+    print(f"{'workers':>8}{'seconds':>10}{'speedup':>10}")
+    print(f"{'serial':>8}{serial_time:>10.3f}{1:>9.2f}x")
+    for workers in args.workers:
+        # min_rows=0 so the pool is used even for small test sizes
+        elapsed, result = time_call(match_users_parallel, df_signup, df_team_members, workers=workers, min_rows=0)
+        pd.testing.assert_frame_equal(result, expected)
+        print(f"{workers:>8}{elapsed:>10.3f}{serial_time / elapsed:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark: resolving states from free-text addresses.
+
+Times resolve_states over synthetic addresses that mention a city, a
+state name or an abbreviation (or nothing known), first with every
+address distinct, then with the same number of rows drawn from a smaller
+set of addresses, as signup exports repeat campus addresses. Run from
+the repository root:
+
+    python -m benchmarks.bench_states --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from state_resolver import CITY_STATES, STATE_ABBREVIATIONS, STATE_NAMES, _cache, resolve_states
+
+
+def generate_addresses(rows, seed=0):
+    """Addresses like 'House 12, Street 4, Chennai, TN 600001'"""
+    rng = np.random.default_rng(seed)
+    places = [city.title() for cities in CITY_STATES.values() for city in cities]
+    places += [name.title() for names in STATE_NAMES.values() for name in names] + ['Springfield']
+    abbreviations = list(STATE_ABBREVIATIONS) + [''] * len(STATE_ABBREVIATIONS)
+    return pd.Series([
+        f"House {house}, Street {street}, {place}, {abbreviation} {pin}".replace(' ,', ',')
+        for house, street, place, abbreviation, pin in zip(
+            rng.integers(1, 10_000, rows), rng.integers(1, 500, rows), rng.choice(places, rows),
+            rng.choice(abbreviations, rows), rng.integers(100_000, 999_999, rows))
+    ])
+
+def measure(name, addresses):
+    _cache.clear()
+    start = time.perf_counter()
+    states = resolve_states(addresses)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28}{elapsed:>8.2f}s  {addresses.nunique():>9} distinct  {states.notna().mean():>6.1%} resolved")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--distinct', type=int, default=20_000, help="Distinct addresses in the repeated run")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    addresses = generate_addresses(args.rows, args.seed)
+    measure('distinct addresses', addresses)
+    repeated = addresses[:args.distinct].sample(args.rows, replace=True, random_state=args.seed)
+    measure('repeated addresses', repeated.reset_index(drop=True))
+
+
+if __name__ == '__main__':
+    main()
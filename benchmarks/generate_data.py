@@ -0,0 +1,173 @@
+"""Generate synthetic signup and registration files shaped like real event exports.
+
+Column names match what main.py expects ('Email ID', 'Phone Number',
+'Team Leader Email', 'Member N Name', ...). Identities carry the same
+noise real forms do: mixed-case emails with stray spaces, +91/0 phone
+prefixes, blanks, and team members who registered with a different email
+than they signed up with (so the phone/Aadhaar fallbacks get exercised).
+
+    python -m benchmarks.generate_data --signups 100000 --output-dir data/
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from pipeline import get_indian_states
+
+THEMES = ['AI/ML', 'Web3', 'HealthTech', 'FinTech', 'EdTech', 'AgriTech', 'Smart Cities', 'Open Innovation']
+ROLES = ['Developer', 'Designer', 'Presenter', 'Researcher']
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Ananya', 'Diya', 'Ishaan', 'Kavya', 'Rohan', 'Saanvi', 'Arjun',
+               'Meera', 'Kabir', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Nisha', 'Aman', 'Pooja', 'Karan']
+LAST_NAMES = ['Sharma', 'Verma', 'Patel', 'Reddy', 'Nair', 'Iyer', 'Gupta', 'Singh', 'Das', 'Khan',
+              'Mehta', 'Joshi', 'Rao', 'Kumar', 'Chatterjee', 'Menon', 'Bose', 'Pillai', 'Yadav', 'Jain']
+EMAIL_DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'college.edu.in', 'iitd.ac.in']
+
+# Team sizes (leader + members) and how often each occurs
+TEAM_SIZES = [2, 3, 4]
+TEAM_SIZE_WEIGHTS = [0.15, 0.25, 0.60]
+MAX_MEMBERS = max(TEAM_SIZES) - 1
+
+
+def _choice(rng, values, size, p=None):
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=p)]
+
+def _with_missing(rng, values, fraction):
+    values = values.astype(object)
+    values[rng.random(len(values)) < fraction] = None
+    return values
+
+def _noisy_emails(rng, emails):
+    """Upper-case some emails and pad some with spaces, like hand-typed form input"""
+    emails = emails.astype(object).copy()
+    upper = rng.random(len(emails)) < 0.1
+    emails[upper] = np.char.upper(emails[upper].astype(str))
+    padded = rng.random(len(emails)) < 0.05
+    emails[padded] = np.char.add(' ', emails[padded].astype(str))
+    return emails
+
+def _noisy_phones(rng, numbers):
+    prefixes = _choice(rng, ['', '+91 ', '+91-', '0', '91'], len(numbers), p=[0.6, 0.15, 0.1, 0.1, 0.05])
+    return np.char.add(prefixes.astype(str), numbers.astype(str)).astype(object)
+
+def generate_people(rng, count):
+    """Generate the underlying population: names, identities, universities and states"""
+    ids = np.arange(count)
+    first = _choice(rng, FIRST_NAMES, count)
+    last = _choice(rng, LAST_NAMES, count)
+    names = np.char.add(np.char.add(first.astype(str), ' '), last.astype(str))
+    emails = np.char.add(np.char.add(np.char.lower(first.astype(str)), ids.astype(str)),
+                         np.char.add('@', _choice(rng, EMAIL_DOMAINS, count).astype(str)))
+
+    universities = np.array([f'University {i}' for i in range(max(count // 200, 10))], dtype=object)
+    university_states = _choice(rng, get_indian_states(), len(universities))
+    university_idx = rng.integers(0, len(universities), count)
+
+    return pd.DataFrame({
+        'name': names.astype(object),
+        'email': emails.astype(object),
+        'phone': rng.integers(6_000_000_000, 9_999_999_999, count).astype(str),
+        'aadhaar': np.char.zfill(rng.integers(0, 10_000, count).astype(str), 4),
+        'university': universities[university_idx],
+        'state': university_states[university_idx],
+    })
+
+def generate_signups(rng, people):
+    """Build the signup export from the population"""
+    count = len(people)
+    return pd.DataFrame({
+        'Full Name': people['name'].values,
+        'Email ID': _with_missing(rng, _noisy_emails(rng, people['email'].values), 0.01),
+        'Phone Number': _with_missing(rng, _noisy_phones(rng, people['phone'].values), 0.02),
+        'Aadhaar Last 4 Digits': _with_missing(rng, people['aadhaar'].values, 0.03),
+        'University Name': people['university'].values,
+        'State': _with_missing(rng, people['state'].values, 0.02),
+        'Gender': _choice(rng, ['Male', 'Female', 'Other'], count, p=[0.55, 0.43, 0.02]),
+    })
+
+def generate_registrations(rng, people, registered_fraction=0.6):
+    """Group a share of the population into teams and build the registration export"""
+    registered = rng.permutation(len(people))[:int(len(people) * registered_fraction)]
+
+    # Split the registered people into consecutive teams of 2-4
+    sizes = _choice(rng, TEAM_SIZES, len(registered) // 2 + 1, p=TEAM_SIZE_WEIGHTS).astype(int)
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    bounds = bounds[bounds < len(registered)]
+    team_count = len(bounds)
+    starts = bounds
+    ends = np.append(bounds[1:], len(registered))
+
+    leaders = people.iloc[registered[starts]].reset_index(drop=True)
+    df_reg = pd.DataFrame({
+        'Team Name': [f'Team {i}' for i in range(team_count)],
+        'Theme': _choice(rng, THEMES, team_count),
+        'Team Leader Name': leaders['name'].values,
+        'Team Leader Email': _noisy_emails(rng, leaders['email'].values),
+        'Team Leader Phone Number': _noisy_phones(rng, leaders['phone'].values),
+        'Team Leader Aadhaar Last 4 Digits': leaders['aadhaar'].values,
+        'Team Leader University Name with address': (leaders['university'] + ', ' + leaders['state']).values,
+        'PPT Link / File Name': _with_missing(
+            rng, np.char.add(np.array([f'team_{i}' for i in range(team_count)]), '.pptx'), 0.2),
+        'Registration_Date': (pd.Timestamp('2025-08-01')
+                              + pd.to_timedelta(rng.integers(0, 30 * 24 * 3600, team_count), unit='s')),
+    })
+
+    for member in range(1, MAX_MEMBERS + 1):
+        position = starts + member
+        has_member = position < ends
+        member_idx = registered[np.where(has_member, position, starts)]
+        members = people.iloc[member_idx].reset_index(drop=True)
+
+        # Some members register with a different email than they signed up with
+        emails = members['email'].values.astype(object)
+        changed = rng.random(team_count) < 0.1
+        emails[changed] = np.char.add('alt.', emails[changed].astype(str))
+
+        df_reg[f'Member {member} Name'] = np.where(has_member, members['name'].values, None)
+        df_reg[f'Member {member} Email'] = np.where(has_member, _noisy_emails(rng, emails), None)
+        df_reg[f'Member {member} Phone Number'] = np.where(has_member, _noisy_phones(rng, members['phone'].values), None)
+        df_reg[f'Member {member} Aadhaar Last 4 Digits'] = np.where(has_member, members['aadhaar'].values, None)
+        df_reg[f'Member {member} Role'] = np.where(has_member, _choice(rng, ROLES, team_count), None)
+
+    return df_reg
+
+def generate_event(signups, seed=0, registered_fraction=0.6):
+    """Return (df_signup, df_registration) for a synthetic event with the given number of signups"""
+    rng = np.random.default_rng(seed)
+    people = generate_people(rng, signups)
+    return generate_signups(rng, people), generate_registrations(rng, people, registered_fraction)
+
+def write_table(df, path):
+    """Write a generated table as CSV, Excel or (for .xls) a portal-style HTML page, by extension"""
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False)
+    elif path.endswith('.xls'):
+        # Many registration portals export an HTML page with a .xls name
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(f'<html><head><meta charset="utf-8"></head><body>{df.to_html(index=False, na_rep="")}'
+                         '</body></html>')
+    else:
+        from export import export_tables
+        with open(path, 'wb') as output:
+            output.write(export_tables({'Sheet1': df}, 'xlsx'))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signups', type=int, default=10_000, help="Number of signup rows")
+    parser.add_argument('--output-dir', default='data')
+    parser.add_argument('--format', choices=['csv', 'xlsx', 'xls'], default='csv',
+                        help="xls writes an HTML page named .xls, like portal exports")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df_signup, df_registration = generate_event(args.signups, seed=args.seed)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name, df in [('signups', df_signup), ('registrations', df_registration)]:
+        path = os.path.join(args.output_dir, f'{name}_{args.signups}.{args.format}')
+        write_table(df, path)
+        print(f"Wrote {path} ({len(df)} rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Scaling benchmark: time and peak memory of each pipeline stage at several event sizes.
+
+For every size a synthetic event is generated, written to disk, and then
+pushed through the same stages the team analysis runs:
+
+    ingest -> reshape -> normalize -> match -> state stats -> compact -> export
+
+Results are saved as JSON (one record per size and stage) so runs can be
+compared; pass --compare with an earlier results file to flag stages that
+got slower (the exit status is 1 if any did, so it can gate CI).
+
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 100000 1000000
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/20250801_120000.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generate_data import generate_event, write_table
+from ingest import read_file_safely
+from instrumentation import RssSampler
+from pipeline import (
+    apply_team_matches, build_team_key_indexes, clean_signup_data, compact_dtypes, compute_state_stats,
+    create_downloadable_excel, extract_state_from_data, memory_usage_mb, process_registration_data,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# A stage counts as regressed when it is this much slower than the comparison run
+REGRESSION_RATIO = 1.25
+
+
+def measure(stage, size, func, *args):
+    """Run one stage, returning (result, record) with wall time, peak memory and row counts"""
+    gc.collect()
+    with RssSampler() as sampler:
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+
+    rows_out = len(result) if isinstance(result, (pd.DataFrame, pd.Series)) else None
+    record = {
+        'size': size,
+        'stage': stage,
+        'seconds': round(elapsed, 4),
+        'peak_mb': round(sampler.peak_increase / 2**20, 1),
+        'rows_out': rows_out,
+    }
+    print(f"{size:>9}  {stage:<12}{elapsed:>10.3f}{record['peak_mb']:>10.1f}{rows_out if rows_out is not None else '':>10}")
+    return result, record
+
+def _read(path):
+    with open(path, 'rb') as file:
+        return read_file_safely(file, os.path.basename(path), use_cache=False)
+
+def _match(df_signup_clean, df_team_members):
+    return apply_team_matches(df_signup_clean, build_team_key_indexes(df_team_members))
+
+def _state_stats(df_result):
+    df_result['State'] = extract_state_from_data(df_result)
+    return compute_state_stats(df_result)
+
+def run_size(size, input_format, export_format, work_dir):
+    """Benchmark every stage for one event size"""
+    df_signup, df_registration = generate_event(size)
+    signup_path = os.path.join(work_dir, f'signups_{size}.{input_format}')
+    registration_path = os.path.join(work_dir, f'registrations_{size}.{input_format}')
+    write_table(df_signup, signup_path)
+    write_table(df_registration, registration_path)
+    del df_signup, df_registration
+
+    records = []
+    df_signup, record = measure('ingest', size, _read, signup_path)
+    records.append(record)
+    df_registration, record = measure('ingest_reg', size, _read, registration_path)
+    records.append(record)
+    df_team_members, record = measure('reshape', size, process_registration_data, df_registration)
+    records.append(record)
+    df_signup_clean, record = measure('normalize', size, clean_signup_data, df_signup)
+    records.append(record)
+    df_result, record = measure('match', size, _match, df_signup_clean, df_team_members)
+    records.append(record)
+    _, record = measure('state_stats', size, _state_stats, df_result)
+    records.append(record)
+    before_mb = memory_usage_mb(df_result)
+    df_result, record = measure('compact', size, compact_dtypes, df_result)
+    record['frame_mb_before'] = round(before_mb, 1)
+    record['frame_mb_after'] = round(memory_usage_mb(df_result), 1)
+    print(f"{'':>11}result frame {record['frame_mb_before']} MB -> {record['frame_mb_after']} MB")
+    records.append(record)
+    _, record = measure('export', size, create_downloadable_excel, df_result, export_format)
+    records.append(record)
+    return records
+
+def compare(records, baseline_path):
+    """Print stages that got slower than in an earlier results file"""
+    with open(baseline_path) as baseline_file:
+        baseline = {(r['size'], r['stage']): r for r in json.load(baseline_file)['records']}
+
+    regressions = 0
+    print(f"\nCompared with {baseline_path}:")
+    for record in records:
+        old = baseline.get((record['size'], record['stage']))
+        if not old or not old['seconds']:
+            continue
+        ratio = record['seconds'] / old['seconds']
+        flag = '  <-- slower' if ratio > REGRESSION_RATIO else ''
+        regressions += bool(flag)
+        print(f"{record['size']:>9}  {record['stage']:<12}{old['seconds']:>10.3f} -> {record['seconds']:.3f} ({ratio:.2f}x){flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--input-format', choices=['csv', 'xlsx', 'xls'], default='csv',
+                        help="Format of the generated input files (xlsx makes ingest dominate; "
+                             "xls is an HTML page named .xls)")
+    parser.add_argument('--export-format', choices=['xlsx', 'csv', 'parquet'], default='xlsx')
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    print(f"{'size':>9}  {'stage':<12}{'seconds':>10}{'peak +MB':>10}{'rows out':>10}")
+    records = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in args.sizes:
+            records.extend(run_size(size, args.input_format, args.export_format, work_dir))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as results_file:
+        json.dump({
+            'created': pd.Timestamp.now().isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'input_format': args.input_format,
+            'export_format': args.export_format,
+            'records': records,
+        }, results_file, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare and compare(records, args.compare):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Chart rendering for the registration charts tab.
+
+Charts are drawn from already aggregated counts (a Series of category ->
+count), so callers can cache them on that small series instead of the
+data behind it. Static charts are rendered to PNG bytes on a standalone
+matplotlib Figure: pyplot never tracks it, and it is cleared once
+rendered, so reruns don't pile figures up in server memory.
+
+The same counts can instead be drawn natively in the browser as a
+Vega-Lite chart, which avoids rasterizing on the server and stays
+readable with many categories.
+"""
+from io import BytesIO
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+CHART_STYLES = ["Auto", "Static (matplotlib)", "Native (Vega-Lite)"]
+
+# With more categories than this, "Auto" draws native charts
+MAX_STATIC_CATEGORIES = 12
+
+
+def use_native_chart(style, categories):
+    """Whether a chart of this many categories is drawn natively under the chosen style"""
+    if style == "Auto":
+        return categories > MAX_STATIC_CATEGORIES
+    return style == "Native (Vega-Lite)"
+
+def _render_png(draw):
+    fig = Figure()
+    try:
+        draw(fig.subplots())
+        output = BytesIO()
+        fig.savefig(output, format='png', bbox_inches='tight')
+        return output.getvalue()
+    finally:
+        fig.clear()
+
+def pie_chart_png(counts):
+    """PNG of a pie chart of counts, labelled by category with percentages"""
+    def draw(ax):
+        ax.pie(counts.values, labels=counts.index.astype(str), autopct='%1.1f%%', startangle=90)
+        ax.axis('equal')
+    return _render_png(draw)
+
+def bar_chart_png(counts):
+    """PNG of a bar chart of counts, with the category labels slanted"""
+    def draw(ax):
+        ax.bar(counts.index.astype(str), counts.values)
+        ax.tick_params(axis='x', labelrotation=45)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')
+    return _render_png(draw)
+
+# Static chart kinds by name, for callers that cache on (kind, counts)
+CHART_RENDERERS = {'pie': pie_chart_png, 'bar': bar_chart_png}
+
+def counts_frame(counts, label):
+    """Counts as a two-column frame (label, Count) for native charts"""
+    return pd.DataFrame({label: counts.index.astype(str), 'Count': counts.values})
+
+def pie_chart_spec(label):
+    """Vega-Lite spec of a pie chart over counts_frame(counts, label)"""
+    return {
+        'mark': {'type': 'arc', 'tooltip': True},
+        'encoding': {
+            'theta': {'field': 'Count', 'type': 'quantitative', 'stack': True},
+            'color': {'field': label, 'type': 'nominal', 'sort': None},
+            'order': {'field': 'Count', 'type': 'quantitative', 'sort': 'descending'},
+        },
+    }
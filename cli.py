@@ -0,0 +1,136 @@
+"""Run the team-matching pipeline on files from disk, without the Streamlit UI.
+
+Examples:
+
+    # Signup analysis: state counts and a complete signup report
+    python cli.py --signup signups.csv --output-dir reports/
+
+    # Team analysis: match signups against team registrations
+    python cli.py --signup signups.xlsx --registration registrations.xlsx --output-dir reports/
+
+    # Hourly refresh: keep an identity index so only changes are re-matched
+    python cli.py --signup signups.csv --registration registrations.csv --index event.sqlite
+
+Only pandas-side modules are imported (no Streamlit, folium or matplotlib),
+so it starts quickly on minimal cron boxes.
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from export import DEFAULT_EXPORT_FORMAT, EXPORT_FORMATS, export_file_type, safe_file_stem
+from fuzzy_match import fuzzy_match_users
+from identity_index import IdentityIndex
+from ingest import iter_csv_chunks, read_file_safely, should_stream
+from parallel_match import MATCH_WORKERS, match_users_parallel
+from pipeline import (
+    SIGNUP_COLUMNS, compute_state_stats, create_downloadable_excel, create_state_wise_excel,
+    extract_state_from_data, process_registration_data, stream_signups,
+)
+
+
+def read_input(path):
+    """Read a signup/registration file from disk the same way uploads are read"""
+    with open(path, 'rb') as file:
+        return read_file_safely(file, os.path.basename(path), use_cache=False)
+
+def load_signups(path, df_team_members=None, workers=1):
+    """Load (and optionally match) signups, streaming large CSVs; returns (df, state_stats)"""
+    with open(path, 'rb') as file:
+        if should_stream(file, path):
+            return stream_signups(iter_csv_chunks(file, usecols=SIGNUP_COLUMNS), df_team_members)
+
+    df_signup = read_input(path)
+    if df_team_members is not None:
+        df_signup = match_users_parallel(df_signup, df_team_members, workers=workers)
+    df_signup['State'] = extract_state_from_data(df_signup)
+    return df_signup, compute_state_stats(df_signup)
+
+def load_signups_incremental(path, df_registration, index_path):
+    """Match signups through a persistent identity index; returns (df, state_stats)"""
+    df_signup = read_input(path)
+    with IdentityIndex(index_path) as index, index.exclusive():
+        sync_counts = index.sync_registrations(df_registration)
+        df_signup = index.match_users(df_signup)
+        match_stats = index.last_match_stats
+    print(f"Index {index_path}: {sync_counts['added']} new, {sync_counts['changed']} changed, "
+          f"{sync_counts['removed']} removed registrations | "
+          f"re-matched {match_stats['rematched']} of {match_stats['identities']} identities")
+    df_signup['State'] = extract_state_from_data(df_signup)
+    return df_signup, compute_state_stats(df_signup)
+
+def write_report(data, output_dir, name, extension):
+    """Write report bytes to output_dir and return the path"""
+    path = os.path.join(output_dir, f'{name}{extension}')
+    with open(path, 'wb') as output:
+        output.write(data)
+    return path
+
+def run(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    timestamp = pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')
+    written = []
+
+    if args.registration:
+        df_registration = read_input(args.registration)
+        if args.index:
+            df_result, state_stats = load_signups_incremental(args.signup, df_registration, args.index)
+        else:
+            df_team_members = process_registration_data(df_registration)
+            df_result, state_stats = load_signups(args.signup, df_team_members, args.workers)
+
+        if args.fuzzy:
+            df_result = fuzzy_match_users(df_result, process_registration_data(df_registration))
+            print(f"Fuzzy matching: {int((df_result['Match_Type'] == 'Fuzzy').sum())} more team members")
+
+        registered_in_team = int((df_result['Registered_Team'] == 'Yes').sum())
+        print(f"Signups: {len(df_result)} | Team registrations: {len(df_registration)} | "
+              f"Registered in teams: {registered_in_team} | Not in teams: {len(df_result) - registered_in_team}")
+
+        extension, _ = export_file_type(args.format, multi_sheet=True)
+        written.append(write_report(create_downloadable_excel(df_result, args.format), args.output_dir,
+                                    f'team_registration_report_{timestamp}', extension))
+    else:
+        df_result, state_stats = load_signups(args.signup)
+        print(f"Signups: {len(df_result)} | States represented: {len(state_stats)}")
+
+        extension, _ = export_file_type(args.format)
+        written.append(write_report(create_state_wise_excel(df_result, 'All_Participants', args.format),
+                                    args.output_dir, f'signup_report_{timestamp}', extension))
+
+    if args.per_state:
+        extension, _ = export_file_type(args.format)
+        for state, state_df in df_result.groupby('State', sort=False, observed=True):
+            written.append(write_report(create_state_wise_excel(state_df, state, args.format), args.output_dir,
+                                        f"{safe_file_stem(state)}_participants_{timestamp}", extension))
+
+    for path in written:
+        print(f"Wrote {path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--signup', required=True, help="Signup Excel/CSV/HTML export")
+    parser.add_argument('--registration', help="Team registration file; enables team matching")
+    parser.add_argument('--output-dir', default='reports', help="Directory for the generated reports")
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default=DEFAULT_EXPORT_FORMAT,
+                        help="Report format (csv/parquet reports with several sheets are zipped)")
+    parser.add_argument('--index', help="SQLite identity index to reuse between runs (incremental matching)")
+    parser.add_argument('--workers', type=int, default=MATCH_WORKERS,
+                        help="Processes for matching very large events (0 = one per core, 1 = no pool)")
+    parser.add_argument('--fuzzy', action='store_true',
+                        help="Also match signups whose email or phone is a near miss (adds Match_Confidence)")
+    parser.add_argument('--per-state', action='store_true', help="Also write one file per state")
+    args = parser.parse_args(argv)
+
+    try:
+        run(args)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Error processing files: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
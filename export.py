@@ -0,0 +1,155 @@
+import os
+import re
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+
+# File extension and MIME type for each export format
+EXPORT_FORMATS = {
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+ZIP_MIME = 'application/zip'
+
+# Format used when the caller doesn't pick one; override with CRC_EXPORT_FORMAT
+DEFAULT_EXPORT_FORMAT = os.environ.get('CRC_EXPORT_FORMAT', 'xlsx')
+
+# Excel writer: 'xlsxwriter' (constant memory), 'openpyxl' (write-only mode),
+# 'pandas' (pd.ExcelWriter, the old behaviour) or 'auto' for the fastest installed one
+EXCEL_ENGINE = os.environ.get('CRC_EXCEL_ENGINE', 'auto')
+
+# Rows a worksheet holds, header included; longer tables continue on '<name>_2', '<name>_3', ...
+EXCEL_MAX_ROWS = 1_048_576
+
+# Characters Excel doesn't allow in sheet names
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+def safe_sheet_name(name):
+    """Return a valid Excel sheet name (no []:*?/\\ and at most 31 characters)"""
+    return _INVALID_SHEET_CHARS.sub('_', str(name))[:31] or 'Sheet1'
+
+def safe_file_stem(name):
+    """Turn a state or team name into something safe to use in a file name"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(name)).strip('_') or 'Unknown'
+
+def export_file_type(export_format, multi_sheet=False):
+    """Return (extension, mime) of an export; several CSV/Parquet sheets are zipped"""
+    if export_format != 'xlsx' and multi_sheet:
+        return '.zip', ZIP_MIME
+    return EXPORT_FORMATS[export_format]
+
+def _resolve_excel_engine(engine):
+    if engine != 'auto':
+        return engine
+    try:
+        import xlsxwriter  # noqa: F401
+        return 'xlsxwriter'
+    except ImportError:
+        return 'openpyxl'
+
+# Rows converted to Python values at a time while writing, so the whole frame is never boxed at once
+_ROW_BLOCK_SIZE = 10_000
+
+def _iter_rows(df):
+    """Yield the rows of a DataFrame as tuples of plain Python values, missing values as None"""
+    for start in range(0, len(df), _ROW_BLOCK_SIZE):
+        block = df.iloc[start:start + _ROW_BLOCK_SIZE]
+        block = block.astype(object).where(block.notna(), None)
+        yield from block.itertuples(index=False, name=None)
+
+def _split_sheets(sheets):
+    """Yield (sheet name, DataFrame) per worksheet, spreading tables too long for one over several"""
+    rows_per_sheet = EXCEL_MAX_ROWS - 1
+    for sheet_name, df in sheets.items():
+        name = safe_sheet_name(sheet_name)
+        for part, start in enumerate(range(0, max(len(df), 1), rows_per_sheet), start=1):
+            suffix = f'_{part}' if part > 1 else ''
+            yield name[:31 - len(suffix)] + suffix, df.iloc[start:start + rows_per_sheet]
+
+def _write_xlsxwriter(sheets, output):
+    import xlsxwriter
+
+    # constant_memory flushes each row as soon as the next one starts, so rows must be written in order
+    workbook = xlsxwriter.Workbook(output, {
+        'constant_memory': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'remove_timezone': True,
+    })
+    for sheet_name, df in _split_sheets(sheets):
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, [str(col) for col in df.columns])
+        for row_idx, row in enumerate(_iter_rows(df), start=1):
+            # xlsxwriter returns -1 instead of raising for a row outside the sheet
+            if worksheet.write_row(row_idx, 0, row) == -1:
+                raise ValueError(f"Row {row_idx} doesn't fit in worksheet '{sheet_name}'")
+    workbook.close()
+
+def _write_openpyxl(sheets, output):
+    from openpyxl import Workbook
+
+    # write_only workbooks stream rows to disk instead of keeping every cell object
+    workbook = Workbook(write_only=True)
+    for sheet_name, df in _split_sheets(sheets):
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append([str(col) for col in df.columns])
+        for row in _iter_rows(df):
+            worksheet.append(row)
+    workbook.save(output)
+
+def _write_pandas(sheets, output):
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        for sheet_name, df in _split_sheets(sheets):
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+_EXCEL_WRITERS = {
+    'xlsxwriter': _write_xlsxwriter,
+    'openpyxl': _write_openpyxl,
+    'pandas': _write_pandas,
+}
+
+def _parquet_bytes(df):
+    output = BytesIO()
+    try:
+        df.to_parquet(output, index=False)
+    except Exception:
+        # Object columns mixing numbers and text can't be typed by Arrow; store them as text
+        object_columns = {col: 'string' for col in df.columns if df[col].dtype == object}
+        output = BytesIO()
+        df.astype(object_columns).to_parquet(output, index=False)
+    return output.getvalue()
+
+def _single_table_bytes(df, export_format):
+    if export_format == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    return _parquet_bytes(df)
+
+def export_tables(sheets, export_format=DEFAULT_EXPORT_FORMAT, excel_engine=None):
+    """Serialize named tables ({sheet name: DataFrame}) to bytes in the requested format
+
+    xlsx puts every table in one workbook, continuing tables longer than
+    a worksheet on '<name>_2', '<name>_3', ... sheets. csv and parquet return a
+    single file for one table and a ZIP with one file per table otherwise.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'. Choose one of: {', '.join(EXPORT_FORMATS)}")
+
+    if export_format == 'xlsx':
+        output = BytesIO()
+        engine = _resolve_excel_engine(excel_engine or EXCEL_ENGINE)
+        _EXCEL_WRITERS[engine](sheets, output)
+        return output.getvalue()
+
+    if len(sheets) == 1:
+        return _single_table_bytes(next(iter(sheets.values())), export_format)
+
+    extension = EXPORT_FORMATS[export_format][0]
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for sheet_name, df in sheets.items():
+            archive.writestr(f'{safe_sheet_name(sheet_name)}{extension}', _single_table_bytes(df, export_format))
+    return output.getvalue()
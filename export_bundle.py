@@ -0,0 +1,93 @@
+"""One ZIP with every per-theme, per-state and per-team export.
+
+The pages used to build one workbook per group on every render just to
+show its download button. Here the files are planned as plain
+{path: sheets} entries, and serialized only when the bundle is asked for.
+The serialization runs in a pool of worker processes, one file per task,
+and finished files are written into the ZIP in order as they arrive.
+"""
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from itertools import repeat
+
+from export import DEFAULT_EXPORT_FORMAT, EXPORT_FORMATS, export_tables, safe_file_stem
+from parallel_match import resolve_workers
+
+# Processes that serialize bundle files; 1 keeps it in-process. Unset or 0 means one per core.
+EXPORT_WORKERS = int(os.environ.get('CRC_EXPORT_WORKERS', '0')) or os.cpu_count() or 1
+
+# Below this many files starting the pool costs more than it saves
+PARALLEL_MIN_FILES = 8
+
+# Columns of a team's file in the team analysis bundle
+TEAM_EXPORT_COLUMNS = ['Full Name', 'Email ID', 'Phone Number', 'Team_Role', 'University Name',
+                       'State', 'Match_Type', 'Match_Confidence']
+
+
+def group_files(df, column, folder, sheet_name, columns=None):
+    """Plan one file per value of column: {'folder/<value>': {sheet: rows}}
+
+    sheet_name is formatted with the value (e.g. '{}_Participants').
+    Values that clean up to the same file name get a numeric suffix.
+    """
+    if column not in df.columns or df.empty:
+        return {}
+    frame = df if columns is None else df[[c for c in columns if c in df.columns]]
+    files = {}
+    for value, group in frame.groupby(df[column], sort=True, observed=True):
+        stem = path = f'{folder}/{safe_file_stem(value)}'
+        suffix = 2
+        while path in files:
+            path = f'{stem}_{suffix}'
+            suffix += 1
+        files[path] = {sheet_name.format(value): group}
+    return files
+
+def team_analysis_files(df_result, df_registration=None):
+    """Per-state, per-team and (when registrations have a Theme) per-theme files of a team analysis"""
+    registered = df_result[df_result['Registered_Team'] == 'Yes']
+    files = group_files(df_result, 'State', 'states', '{}_Participants')
+    files.update(group_files(registered, 'Team_Name', 'teams', 'Team Members', TEAM_EXPORT_COLUMNS))
+
+    if df_registration is not None and {'Team Name', 'Theme'} <= set(df_registration.columns):
+        team_themes = df_registration.drop_duplicates(subset='Team Name').set_index('Team Name')['Theme']
+        themed = registered.assign(Theme=registered['Team_Name'].astype(object).map(team_themes))
+        files.update(group_files(themed, 'Theme', 'themes', 'Theme Data'))
+    return files
+
+def registration_files(df_teams):
+    """Per-theme files of the registration analysis"""
+    return group_files(df_teams, 'Theme', 'themes', 'Theme Data')
+
+def build_export_bundle(files, export_format=DEFAULT_EXPORT_FORMAT, workers=None):
+    """Serialize every planned file and stream it into one ZIP; returns the ZIP bytes
+
+    workers=None uses EXPORT_WORKERS; small bundles are built in-process.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'. Choose one of: {', '.join(EXPORT_FORMATS)}")
+    extension = EXPORT_FORMATS[export_format][0]
+    workers = resolve_workers(EXPORT_WORKERS if workers is None else workers)
+    # Excel and Parquet files are compressed already
+    compression = zipfile.ZIP_DEFLATED if export_format == 'csv' else zipfile.ZIP_STORED
+
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', compression=compression) as bundle:
+        if workers < 2 or len(files) < PARALLEL_MIN_FILES:
+            exports = (export_tables(sheets, export_format) for sheets in files.values())
+            _write_files(bundle, files, exports, extension)
+        else:
+            # Spawned (not forked) workers: forking the threaded Streamlit server can deadlock
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                # A few chunks per worker keeps the pool busy without a round trip per small file
+                chunksize = max(1, len(files) // (workers * 4))
+                exports = pool.map(export_tables, files.values(), repeat(export_format), chunksize=chunksize)
+                _write_files(bundle, files, exports, extension)
+    return output.getvalue()
+
+def _write_files(bundle, files, exports, extension):
+    for path, data in zip(files, exports):
+        bundle.writestr(f'{path}{extension}', data)
@@ -0,0 +1,82 @@
+"""Precomputed filter indexes for interactive tables.
+
+A FilterIndex is built once per dataset. It stores:
+
+- the sorted row positions of every value in each value column
+- the row order of the date column when sorted
+
+Any combination of "value in chosen set" filters and one inclusive date
+range then resolves to row positions. The value filters use array
+unions and intersections, and the date range uses two binary searches.
+No pass over the whole frame is needed, and only the selected rows are
+ever materialized.
+"""
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """Row positions per value for value filters, plus a sorted date index"""
+
+    def __init__(self, df, value_columns, date_column=None):
+        self.size = len(df)
+        self.value_columns = [column for column in value_columns if column in df.columns]
+        self._positions = {}
+        for column in self.value_columns:
+            values = df[column]
+            positions = values.groupby(values, sort=False, observed=True, dropna=True).indices
+            # Values in order of first appearance, like Series.unique()
+            self._positions[column] = dict(sorted(positions.items(), key=lambda item: item[1][0]))
+
+        self.date_column = date_column if date_column in df.columns else None
+        self._date_order = np.array([], dtype=np.intp)
+        self._sorted_dates = pd.DatetimeIndex([])
+        if self.date_column:
+            dates = pd.DatetimeIndex(df[self.date_column])
+            known = np.flatnonzero(~dates.isna())
+            order = known[np.argsort(dates[known].values, kind='stable')]
+            self._date_order = order
+            self._sorted_dates = dates[order]
+
+    def date_bounds(self):
+        """Earliest and latest date (NaT when there are none)"""
+        if not len(self._sorted_dates):
+            return pd.NaT, pd.NaT
+        return self._sorted_dates[0], self._sorted_dates[-1]
+
+    def options(self, column):
+        """Distinct non-missing values of a value column, in order of first appearance"""
+        return list(self._positions.get(column, {}))
+
+    def value_positions(self, column, chosen):
+        """Sorted positions of the rows whose column value is one of chosen"""
+        positions = self._positions[column]
+        parts = [positions[value] for value in chosen if value in positions]
+        if not parts:
+            return np.array([], dtype=np.intp)
+        # Each row has one value, so the parts never overlap
+        return np.sort(np.concatenate(parts))
+
+    def date_positions(self, start, end):
+        """Sorted positions of the rows dated between start and end, both inclusive"""
+        low = self._sorted_dates.searchsorted(pd.Timestamp(start), side='left')
+        high = self._sorted_dates.searchsorted(pd.Timestamp(end), side='right')
+        return np.sort(self._date_order[low:high])
+
+    def select(self, filters, date_range=None):
+        """Row positions matching every non-empty filter ({column: chosen values}) and the date range
+
+        Returns None when nothing filters the rows, so callers can keep the
+        full frame without copying it.
+        """
+        selected = None
+        for column, chosen in filters.items():
+            if not chosen or column not in self._positions:
+                continue
+            positions = self.value_positions(column, chosen)
+            selected = positions if selected is None else np.intersect1d(selected, positions, assume_unique=True)
+
+        if date_range is not None and self.date_column:
+            positions = self.date_positions(*date_range)
+            selected = positions if selected is None else np.intersect1d(selected, positions, assume_unique=True)
+        return selected
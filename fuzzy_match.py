@@ -0,0 +1,232 @@
+"""Fuzzy second pass for signups that miss every exact key.
+
+Exact matching misses people whose email or phone has a typo (gmial.com,
+two swapped digits). This pass only looks at signups that are still
+unmatched and at team members nobody has claimed by email or phone yet.
+
+Comparing every pair would be far too slow, so candidates are blocked.
+A signup is only compared with team members that share at least one
+block key with it:
+
+- the same Aadhaar last 4 digits
+- the same first 5 or last 5 phone digits
+- the same email local part (the text before the '@')
+- the same first 6 characters of the email
+
+Blocks with more than MAX_BLOCK_SIZE team members are skipped.
+
+Each candidate pair is scored with edit-distance similarity on email,
+phone and name, plus Aadhaar equality. The edit distance counts an
+adjacent swap as one edit. The confidence is the weighted average over
+the fields both sides filled in. A pair is accepted only if its
+confidence is at least FUZZY_MIN_CONFIDENCE and its email or phone is at
+least FUZZY_MIN_KEY_SIMILARITY alike. Each signup and each team member
+takes part in at most one fuzzy match, the best-scoring one.
+"""
+import numpy as np
+import pandas as pd
+
+from normalize import clean_aadhaar_column, clean_email_column, clean_phone_column
+
+# Accept a candidate only at or above this weighted confidence...
+FUZZY_MIN_CONFIDENCE = 0.85
+# ...and only if its email or phone is at least this similar
+FUZZY_MIN_KEY_SIMILARITY = 0.8
+
+# Block keys shared by more team members than this are too common to be useful
+MAX_BLOCK_SIZE = 50
+
+# Longer strings are truncated before computing edit distances
+MAX_COMPARE_LENGTH = 48
+
+FIELD_WEIGHTS = {'email': 0.35, 'phone': 0.35, 'name': 0.2, 'aadhaar': 0.1}
+
+
+def _encode(strings, width):
+    """Turn strings into an (n, width) array of code points, zero-padded"""
+    fixed = np.asarray(strings, dtype=f'<U{width}')
+    return fixed.view(np.uint32).reshape(len(fixed), width), np.char.str_len(fixed)
+
+def _distances_and_lengths(left, right):
+    """Edit distances plus the (truncated) lengths of both sides"""
+    left = np.asarray(left, dtype=str)
+    right = np.asarray(right, dtype=str)
+    width = max(1, min(MAX_COMPARE_LENGTH, max(left.dtype.itemsize, right.dtype.itemsize) // 4))
+    a, a_len = _encode(left, width)
+    b, b_len = _encode(right, width)
+    pairs = len(a)
+    steps = np.arange(width + 1, dtype=np.int16)
+
+    distances = b_len.astype(np.int16)  # pairs with an empty left string
+    previous_row = None
+    row = np.broadcast_to(steps, (pairs, width + 1)).copy()
+    for i in range(1, int(a_len.max(initial=0)) + 1):
+        substitution = (a[:, i - 1:i] != b).astype(np.int16)
+        candidates = np.minimum(row[:, 1:] + 1, row[:, :-1] + substitution)
+        if previous_row is not None:
+            swapped = (a[:, i - 1:i] == b[:, :-1]) & (a[:, i - 2:i - 1] == b[:, 1:])
+            candidates[:, 1:] = np.where(swapped, np.minimum(candidates[:, 1:], previous_row[:, :-2] + 1),
+                                         candidates[:, 1:])
+        previous_row = row
+        row = np.empty_like(row)
+        row[:, 0] = i
+        row[:, 1:] = candidates
+        # Insertions: row[j] = min over k <= j of (row[k] + j - k)
+        row = np.minimum.accumulate(row - steps, axis=1) + steps
+
+        ends_here = a_len == i
+        distances[ends_here] = row[ends_here, b_len[ends_here]]
+    return distances, a_len, b_len
+
+def edit_distances(left, right):
+    """Edit distance (insertions, deletions, substitutions and adjacent swaps) for each pair of strings
+
+    All pairs run through one dynamic programming table at once, one row
+    per character of the left strings. Within a row the insertion chain
+    is resolved with a running minimum, so there is no per-character loop.
+    """
+    return _distances_and_lengths(left, right)[0]
+
+def similarities(left, right):
+    """1 - edit distance / longer length for each pair; NaN where either side is blank"""
+    left = np.asarray(left, dtype=object)
+    right = np.asarray(right, dtype=object)
+    scores = np.full(len(left), np.nan)
+    both = (left != '') & (right != '')
+    if both.any():
+        distances, left_len, right_len = _distances_and_lengths(left[both], right[both])
+        scores[both] = 1 - distances / np.maximum(left_len, right_len)
+    return scores
+
+def normalize_names(names):
+    """Lower-case names and collapse whitespace so formatting doesn't count as a typo"""
+    return (names.astype('string[pyarrow]').str.lower().str.split().str.join(' ')
+            .fillna('').astype(object))
+
+def block_keys(emails, phones, aadhaar):
+    """Return a frame of (row, block) pairs: every block key each row belongs to"""
+    emails = pd.Series(emails).reset_index(drop=True)
+    phones = pd.Series(phones).reset_index(drop=True)
+    aadhaar = pd.Series(aadhaar).reset_index(drop=True)
+    local_parts = emails.str.split('@').str[0]
+    blocks = [
+        ('a:' + aadhaar)[aadhaar != ''],
+        ('p<' + phones.str[:5])[phones.str.len() >= 8],
+        ('p>' + phones.str[-5:])[phones.str.len() >= 8],
+        ('l:' + local_parts)[local_parts.str.len() >= 3],
+        ('e:' + emails.str[:6])[emails.str.len() >= 6],
+    ]
+    blocks = pd.concat(blocks)
+    return pd.DataFrame({'row': blocks.index, 'block': blocks.values})
+
+def candidate_pairs(signup_blocks, team_blocks):
+    """Pair signups with team members that share a block key, skipping oversized blocks"""
+    block_sizes = team_blocks['block'].value_counts()
+    team_blocks = team_blocks[team_blocks['block'].map(block_sizes) <= MAX_BLOCK_SIZE]
+    pairs = signup_blocks.merge(team_blocks, on='block', suffixes=('_signup', '_team'))
+    return pairs[['row_signup', 'row_team']].drop_duplicates(ignore_index=True)
+
+def _confidence(field_scores, optimistic=()):
+    """Weighted average of the present field scores; fields in optimistic count as a perfect 1"""
+    weighted = 0
+    weights = 0
+    for field, scores in field_scores.items():
+        present = ~np.isnan(scores)
+        value = np.where(present, 1.0, 0) if field in optimistic else np.nan_to_num(scores)
+        weighted = weighted + FIELD_WEIGHTS[field] * value
+        weights = weights + FIELD_WEIGHTS[field] * present
+    return weighted / np.where(weights > 0, weights, 1)
+
+def score_pairs(signups, team, pairs, min_confidence=FUZZY_MIN_CONFIDENCE):
+    """Score candidate pairs, returning only those that pass both thresholds
+
+    Cheap fields are scored first. Pairs that could not reach
+    min_confidence even if every remaining field matched perfectly are
+    dropped before the longer email and name comparisons.
+    """
+    s = signups.iloc[pairs['row_signup']].reset_index(drop=True)
+    t = team.iloc[pairs['row_team']].reset_index(drop=True)
+
+    def blank_scores(field):
+        return np.where((s[field] != '') & (t[field] != ''), 0.0, np.nan)
+
+    field_scores = {
+        'aadhaar': np.where((s['aadhaar'] != '') & (t['aadhaar'] != ''),
+                            (s['aadhaar'] == t['aadhaar']).astype(float), np.nan),
+        'phone': similarities(s['phone'].values, t['phone'].values),
+        'email': blank_scores('email'),
+        'name': blank_scores('name'),
+    }
+    keep = _confidence(field_scores, optimistic=('email', 'name')) >= min_confidence
+    field_scores = {field: scores[keep] for field, scores in field_scores.items()}
+    s, t, pairs = s[keep], t[keep], pairs[keep]
+
+    field_scores['email'] = similarities(s['email'].values, t['email'].values)
+    keep = (np.fmax(field_scores['email'], field_scores['phone']) >= FUZZY_MIN_KEY_SIMILARITY) & \
+           (_confidence(field_scores, optimistic=('name',)) >= min_confidence)
+    field_scores = {field: scores[keep] for field, scores in field_scores.items()}
+    s, t, pairs = s[keep], t[keep], pairs[keep]
+
+    field_scores['name'] = similarities(s['name'].values, t['name'].values)
+    scored = pairs.copy()
+    scored['confidence'] = _confidence(field_scores)
+    return scored[scored['confidence'] >= min_confidence]
+
+def fuzzy_match_users(result_df, df_team_members, min_confidence=FUZZY_MIN_CONFIDENCE):
+    """Match still-unregistered signups to unclaimed team members by similarity
+
+    result_df is the output of match_users. It gains Match_Type ('Exact',
+    'Fuzzy' or '') and Match_Confidence (1.0 for exact matches, the
+    score for fuzzy ones), and fuzzy matches are marked as registered.
+    """
+    result_df['Match_Type'] = np.where(result_df['Registered_Team'] == 'Yes', 'Exact', '')
+    result_df['Match_Confidence'] = np.where(result_df['Registered_Team'] == 'Yes', 1.0, np.nan)
+
+    matched = result_df[result_df['Registered_Team'] == 'Yes']
+    team = pd.DataFrame({
+        'email': clean_email_column(df_team_members['Email']).values,
+        'phone': clean_phone_column(df_team_members['Phone']).values,
+        'aadhaar': clean_aadhaar_column(df_team_members['Aadhaar_Last4']).values,
+        'name': normalize_names(df_team_members['Name']).values,
+        'Team_Name': df_team_members['Team_Name'].values,
+        'Role': df_team_members['Role'].values,
+    })
+    # Team members whose email or phone an exact match already used are taken
+    claimed = ((team['email'] != '') & team['email'].isin(matched['Email_Clean'])) | \
+              ((team['phone'] != '') & team['phone'].isin(matched['Phone_Clean']))
+    team = team[~claimed.values].reset_index(drop=True)
+
+    unmatched_index = result_df.index[result_df['Registered_Team'] != 'Yes']
+    unmatched = result_df.loc[unmatched_index]
+    signups = pd.DataFrame({
+        'email': unmatched['Email_Clean'].values,
+        'phone': unmatched['Phone_Clean'].values,
+        'aadhaar': unmatched['Aadhaar_Clean'].values,
+        'name': normalize_names(unmatched['Full Name']).values if 'Full Name' in unmatched.columns else '',
+    })
+    if signups.empty or team.empty:
+        return result_df
+
+    pairs = candidate_pairs(
+        block_keys(signups['email'], signups['phone'], signups['aadhaar']),
+        block_keys(team['email'], team['phone'], team['aadhaar']),
+    )
+    if pairs.empty:
+        return result_df
+
+    scored = score_pairs(signups, team, pairs, min_confidence)
+
+    # Best pair first; each signup and each team member is used once
+    scored = scored.sort_values(['confidence', 'row_team'], ascending=[False, True], kind='stable')
+    scored = scored.drop_duplicates(subset='row_signup').drop_duplicates(subset='row_team')
+    if scored.empty:
+        return result_df
+
+    hits = unmatched_index[scored['row_signup'].values]
+    best_team = team.iloc[scored['row_team'].values]
+    result_df.loc[hits, 'Registered_Team'] = 'Yes'
+    result_df.loc[hits, 'Team_Name'] = best_team['Team_Name'].values
+    result_df.loc[hits, 'Team_Role'] = best_team['Role'].values
+    result_df.loc[hits, 'Match_Type'] = 'Fuzzy'
+    result_df.loc[hits, 'Match_Confidence'] = scored['confidence'].round(3).values
+    return result_df
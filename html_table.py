@@ -0,0 +1,190 @@
+"""Streaming reader for the first table of an HTML export.
+
+Many portals export "Excel" files that are really an HTML page with one
+big <table>. pd.read_html builds a tree of the whole page and turns every
+table into a DataFrame, only for us to keep the first one.
+read_first_html_table uses lxml's incremental parser instead:
+
+- each row is converted to text as soon as its </tr> is parsed, then
+  freed, so the tree never holds more than one row of cells
+- parsing stops at the end of the first table that yields data
+
+The text rules are the same as pd.read_html:
+
+- header rows come from <thead>, or else from the leading all-<th> rows
+- colspan/rowspan cells are repeated
+- <br> counts as whitespace
+- elements styled display:none are skipped
+- values are typed by the same TextParser, with ',' as thousands separator
+
+Unlike pd.read_html, rows of a table nested inside a cell are not read as
+rows of the outer table. Their text stays part of the enclosing cell.
+"""
+import re
+
+from lxml import etree
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+_RE_WHITESPACE = re.compile(r'[\r\n]+|\s{2,}')
+_CELL_TAGS = ('td', 'th')
+_SECTION_TAGS = ('thead', 'tbody', 'tfoot')
+
+
+def _is_hidden(element):
+    style = element.get('style')
+    return style is not None and 'display:none' in style.replace(' ', '')
+
+def _text(element):
+    """Visible text of an element, like lxml's text_content() after pd.read_html's clean-up"""
+    parts = [element.text or '']
+    for child in element:
+        # Comments and processing instructions only contribute their tail
+        if isinstance(child.tag, str):
+            if child.tag == 'br':
+                parts.append('\n')
+            elif child.tag != 'style' and not _is_hidden(child):
+                parts.append(_text(child))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+def _cell_text(cell):
+    # Most cells are plain text, which needs no walk over children
+    text = cell.text or '' if not len(cell) else _text(cell)
+    text = text.strip()
+    if '\n' in text or '\r' in text or '  ' in text or '\t' in text:
+        text = _RE_WHITESPACE.sub(' ', text)
+    return text
+
+def _row_entry(row):
+    """(all cells are <th>, cell texts, (rowspan, colspan) per cell or None when nothing spans)"""
+    cells = [cell for cell in row if cell.tag in _CELL_TAGS and not _is_hidden(cell)]
+    spans = [(int(cell.get('rowspan') or 1), int(cell.get('colspan') or 1)) for cell in cells]
+    return (
+        all(cell.tag == 'th' for cell in cells),
+        [_cell_text(cell) for cell in cells],
+        spans if any(span != (1, 1) for span in spans) else None,
+    )
+
+def expand_spans(rows):
+    """Turn rows of (texts, spans) into rows of text with spanned cells repeated"""
+    all_texts = []
+    remainder = []  # (index, text, rows left) carried down by rowspan
+    for cell_texts, spans in rows:
+        if spans is None and not remainder:
+            all_texts.append(cell_texts)
+            continue
+        texts = []
+        next_remainder = []
+        index = 0
+        for text, (rowspan, colspan) in zip(cell_texts, spans or [(1, 1)] * len(cell_texts)):
+            while remainder and remainder[0][0] <= index:
+                prev_index, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+                index += 1
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    # Rows that only exist because of a rowspan on the last row
+    while remainder:
+        texts = [text for _, text, _ in remainder]
+        remainder = [(index, text, rowspan - 1) for index, text, rowspan in remainder if rowspan > 1]
+        all_texts.append(texts)
+    return all_texts
+
+def table_to_frame(head, body, foot):
+    """Build a DataFrame from the cell rows of one table's sections, as pd.read_html does"""
+    if not head:
+        # No <thead>: leading rows made only of <th> cells are the header
+        while body and body[0][0]:
+            head.append(body.pop(0))
+    head, body, foot = (expand_spans([(texts, spans) for _, texts, spans in section]) for section in (head, body, foot))
+
+    header = None
+    if head:
+        body = head + body
+        # Several header rows become a MultiIndex; rows without any text are ignored
+        header = 0 if len(head) == 1 else [i for i, row in enumerate(head) if any(row)]
+    body += foot
+
+    # Pad ragged rows so every row has as many cells as the longest
+    width = max((len(row) for row in body), default=0)
+    body = [row + [''] * (width - len(row)) for row in body]
+    with TextParser(body, header=header, thousands=',') as parser:
+        return parser.read()
+
+def _section_of(row, table):
+    """The <thead>/<tbody>/<tfoot> holding row within table, 'root' for a direct row
+
+    None for rows pd.read_html wouldn't read: hidden ones and rows
+    wrapped in anything other than a table section.
+    """
+    section = 'root' if row.getparent() is table else None
+    for ancestor in row.iterancestors():
+        if ancestor is table:
+            return section
+        if _is_hidden(ancestor):
+            return None
+        if ancestor.tag in _SECTION_TAGS and section in ('root', None):
+            section = ancestor.tag
+    return section
+
+def read_first_html_table(file, encoding=None):
+    """Return the first table of an HTML file-like object with data in it, as pd.read_html(file)[0] would
+
+    Raises ValueError when the document has no such table.
+    """
+    tables = []  # <table> elements open around the current position
+    sections = None
+    # Events only for the tags that matter; cells are read from their finished row
+    for event, element in etree.iterparse(file, events=('start', 'end'), tag=('table', 'thead', 'tr'), html=True,
+                                          recover=True, encoding=encoding, remove_comments=True):
+        tag = element.tag
+        if event == 'start':
+            if tag == 'table':
+                tables.append(element)
+                if len(tables) == 1:
+                    sections = {'thead': [], 'tbody': [], 'root': [], 'tfoot': []}
+            continue
+        if not tables:
+            continue
+
+        table = tables[-1]
+        if tag == 'tr' and len(tables) == 1:
+            section = None if _is_hidden(element) else _section_of(element, table)
+            if section is not None:
+                sections[section].append(_row_entry(element))
+            # Free the row and the rows before it; only their text is needed
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            while element.getprevious() is not None and element.getprevious().tag == 'tr':
+                parent.remove(element.getprevious())
+        elif tag == 'thead' and len(tables) == 1 and element.getparent() is table and not _is_hidden(element):
+            # Broken <thead><th>...</th></thead> without a <tr>: the <thead> itself is the row
+            if any(child.tag in _CELL_TAGS for child in element):
+                sections['thead'].append(_row_entry(element))
+        elif tag == 'table':
+            tables.pop()
+            if tables or _is_hidden(element):
+                continue
+            rows = sections['thead'] + sections['tbody'] + sections['root'] + sections['tfoot']
+            # Like pd.read_html, tables without any text are skipped
+            if any(text for _, texts, _ in rows for text in texts):
+                try:
+                    return table_to_frame(sections['thead'], sections['tbody'] + sections['root'],
+                                          sections['tfoot'])
+                except EmptyDataError:
+                    pass
+            element.clear()
+    raise ValueError('No tables found')
@@ -0,0 +1,300 @@
+"""Persistent identity index for incremental team matching.
+
+The index lives in a SQLite file and remembers three things between runs:
+
+- registrations: one row per team registration (Team Name + Team Leader
+  Name), with a hash of its content and the order it was first seen in
+- members: the cleaned email/phone/Aadhaar of every team member
+- matches: the match result for every (email, phone, Aadhaar) triple
+  seen in a signup file
+
+When a registration file is synced, only new, changed or removed
+registrations touch the members table. Cached matches that involve one of
+their keys are dropped. Matching a signup file then runs the matcher only
+for triples that have no cached result, so an hourly refresh costs time
+proportional to what changed.
+
+As in match_users, the member from the earliest registration wins when
+several hold the same key. "Earliest" means the order the index first
+saw each registration in.
+
+A sync treats the registration file as the whole event, so each event
+keeps its own index file (event_index_path). A run that syncs and then
+matches holds the index for both steps (IdentityIndex.exclusive), so a
+concurrent sync can't land in between.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from export import safe_file_stem
+from pipeline import MATCH_KEY_PRIORITY, apply_team_matches, clean_signup_data, process_registration_data
+
+# Where the Streamlit app keeps one index per event; override with CRC_IDENTITY_INDEX_DIR
+DEFAULT_INDEX_DIR = os.environ.get('CRC_IDENTITY_INDEX_DIR', 'identity_indexes')
+
+# Seconds a connection waits for another process holding the index
+LOCK_TIMEOUT = 300
+
+# Columns match_users adds to the signups
+MATCH_RESULT_COLUMNS = ['Registered_Team', 'Team_Name', 'Team_Role']
+
+# Cleaned key columns in the members table, by the signup column they are matched against
+MEMBER_KEY_COLUMNS = {'Email_Clean': 'email', 'Phone_Clean': 'phone', 'Aadhaar_Clean': 'aadhaar'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrations (
+    reg_key TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    row_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS members (
+    reg_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    team_name TEXT,
+    role TEXT,
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    aadhaar TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS members_reg_key ON members (reg_key);
+CREATE INDEX IF NOT EXISTS members_email ON members (email, seq, slot);
+CREATE INDEX IF NOT EXISTS members_phone ON members (phone, seq, slot);
+CREATE INDEX IF NOT EXISTS members_aadhaar ON members (aadhaar, seq, slot);
+CREATE TABLE IF NOT EXISTS matches (
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    aadhaar TEXT NOT NULL,
+    registered TEXT NOT NULL,
+    team_name TEXT,
+    team_role TEXT,
+    PRIMARY KEY (email, phone, aadhaar)
+);
+CREATE INDEX IF NOT EXISTS matches_phone ON matches (phone);
+CREATE INDEX IF NOT EXISTS matches_aadhaar ON matches (aadhaar);
+"""
+
+
+def registration_keys(df_reg):
+    """Identify each registration row by its team name and team leader name"""
+    team = df_reg['Team Name'] if 'Team Name' in df_reg.columns else pd.Series('', index=df_reg.index)
+    leader = df_reg['Team Leader Name'] if 'Team Leader Name' in df_reg.columns else pd.Series('', index=df_reg.index)
+    return team.astype(str) + '\x1f' + leader.astype(str)
+
+def event_index_path(event, directory=DEFAULT_INDEX_DIR):
+    """Index file of an event, so events never sync over each other's registrations"""
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f'{safe_file_stem(event)}.sqlite')
+
+def _none_to_nan(series):
+    return series.astype(object).where(series.notna(), np.nan)
+
+def _sql_rows(df):
+    """Rows of df as tuples of plain Python values (None for missing), for executemany"""
+    values = df.astype(object)
+    return values.where(values.notna(), None).itertuples(index=False, name=None)
+
+# One lock per index file, serializing runs within this process
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+def _path_lock(path):
+    with _path_locks_guard:
+        return _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class IdentityIndex:
+    """On-disk index of team member identities with cached signup matches"""
+
+    def __init__(self, path):
+        self.path = path
+        self.last_match_stats = None
+        self._exclusive = False
+        self.conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the index (one transaction, other runs wait) for a sync followed by a match"""
+        with _path_lock(self.path):
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._exclusive = True
+            try:
+                yield self
+            except BaseException:
+                self.conn.rollback()
+                raise
+            else:
+                self.conn.commit()
+            finally:
+                self._exclusive = False
+
+    @contextmanager
+    def _transaction(self):
+        """Commit on success, unless already inside exclusive(), which commits at its end"""
+        if self._exclusive:
+            yield
+        else:
+            with self.conn:
+                yield
+
+    def _insert(self, table, df):
+        columns = ', '.join(df.columns)
+        placeholders = ', '.join('?' * len(df.columns))
+        self.conn.executemany(f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})", _sql_rows(df))
+
+    def _fill_temp_keys(self, name, keys):
+        """Load keys into a temporary single-column table used for joins"""
+        self.conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+        self.conn.execute(f"CREATE TEMP TABLE {name} (key TEXT PRIMARY KEY)")
+        self.conn.executemany(f"INSERT OR IGNORE INTO temp.{name} VALUES (?)", ((key,) for key in keys))
+
+    def sync_registrations(self, df_reg, remove_missing=True):
+        """Bring the index in line with a registration file; returns counts of what changed
+
+        remove_missing drops registrations that are no longer in df_reg,
+        which is what a full re-export of the registration sheet means.
+        """
+        df_reg = df_reg.reset_index(drop=True)
+        keys = registration_keys(df_reg)
+        first_rows = ~keys.duplicated(keep='first')
+        df_reg, keys = df_reg[first_rows].reset_index(drop=True), keys[first_rows].reset_index(drop=True)
+        hashes = pd.util.hash_pandas_object(df_reg, index=False).astype(str)
+
+        known = pd.read_sql("SELECT reg_key, seq, row_hash FROM registrations", self.conn).set_index('reg_key')
+        is_known = keys.isin(known.index)
+        changed = is_known & (hashes != keys.map(known['row_hash']))
+        added = ~is_known
+        removed = known.index.difference(keys) if remove_missing else pd.Index([])
+
+        # New registrations are ordered after everything already in the index
+        next_seq = int(known['seq'].max()) + 1 if len(known) else 0
+        seqs = keys.map(known['seq'])
+        seqs[added] = np.arange(next_seq, next_seq + int(added.sum()))
+
+        touched_rows = added | changed
+        stale_keys = list(keys[changed]) + list(removed)
+
+        with self._transaction():
+            # Every key held by a stale or new registration may now resolve differently
+            self._fill_temp_keys('stale_regs', stale_keys)
+            self._invalidate_matches_for(
+                "SELECT email, phone, aadhaar FROM members WHERE reg_key IN (SELECT key FROM temp.stale_regs)")
+            self.conn.execute("DELETE FROM members WHERE reg_key IN (SELECT key FROM temp.stale_regs)")
+            self.conn.execute("DELETE FROM registrations WHERE reg_key IN (SELECT key FROM temp.stale_regs)")
+
+            touched = df_reg[touched_rows.values]
+            members = process_registration_data(touched, keep_positions=True)
+            touched_keys = keys[touched_rows].reset_index(drop=True)
+            touched_seqs = seqs[touched_rows].reset_index(drop=True)
+            member_rows = pd.DataFrame({
+                'reg_key': touched_keys.iloc[members['Sheet_Row']].values,
+                'seq': touched_seqs.iloc[members['Sheet_Row']].values.astype(int),
+                'slot': members['Member_Slot'].astype(int).values,
+                'team_name': members['Team_Name'].values,
+                'role': members['Role'].values,
+                'email': members['Email'].values,
+                'phone': members['Phone'].values,
+                'aadhaar': members['Aadhaar_Last4'].values,
+            })
+            self.conn.executemany(
+                "INSERT INTO members (reg_key, seq, slot, team_name, role, email, phone, aadhaar) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _sql_rows(member_rows))
+            self._insert('registrations', pd.DataFrame({
+                'reg_key': touched_keys,
+                'seq': touched_seqs.astype(int),
+                'row_hash': hashes[touched_rows].values,
+            }))
+
+            self._invalidate_matches(member_rows['email'], member_rows['phone'], member_rows['aadhaar'])
+
+        return {'added': int(added.sum()), 'changed': int(changed.sum()), 'removed': len(removed)}
+
+    def _invalidate_matches_for(self, members_query):
+        stale = pd.read_sql(members_query, self.conn)
+        self._invalidate_matches(stale['email'], stale['phone'], stale['aadhaar'])
+
+    def _invalidate_matches(self, emails, phones, aadhaar):
+        """Drop cached matches whose triple contains any of the given keys"""
+        for column, keys in [('email', emails), ('phone', phones), ('aadhaar', aadhaar)]:
+            self._fill_temp_keys('stale_keys', (key for key in pd.unique(keys) if key))
+            self.conn.execute(f"DELETE FROM matches WHERE {column} IN (SELECT key FROM temp.stale_keys)")
+
+    def _lookup_key_indexes(self, triples):
+        """Build match_users-style key indexes restricted to the keys in triples"""
+        key_indexes = {}
+        for key_column, member_column in MEMBER_KEY_COLUMNS.items():
+            self._fill_temp_keys('lookup_keys', (key for key in pd.unique(triples[key_column]) if key))
+            holders = pd.read_sql(
+                f"SELECT m.{member_column} AS key, m.team_name AS Team_Name, m.role AS Role "
+                f"FROM members m JOIN temp.lookup_keys k ON m.{member_column} = k.key "
+                f"ORDER BY m.seq, m.slot",
+                self.conn,
+            )
+            holders = holders.drop_duplicates(subset='key', keep='first').set_index('key')
+            holders['Team_Name'] = _none_to_nan(holders['Team_Name'])
+            holders['Role'] = _none_to_nan(holders['Role'])
+            key_indexes[key_column] = holders
+        return key_indexes
+
+    def _cached_matches(self, triples):
+        """Cached results for the given triples, joined in SQLite; positions index into triples"""
+        self.conn.execute("DROP TABLE IF EXISTS temp.lookup_triples")
+        self.conn.execute(
+            "CREATE TEMP TABLE lookup_triples (pos INTEGER PRIMARY KEY, email TEXT, phone TEXT, aadhaar TEXT)")
+        self.conn.executemany("INSERT INTO temp.lookup_triples VALUES (?, ?, ?, ?)",
+                              ((pos, *triple) for pos, triple in enumerate(_sql_rows(triples))))
+        return pd.read_sql(
+            "SELECT t.pos, m.registered AS Registered_Team, m.team_name AS Team_Name, m.team_role AS Team_Role "
+            "FROM temp.lookup_triples t JOIN matches m "
+            "ON m.email = t.email AND m.phone = t.phone AND m.aadhaar = t.aadhaar",
+            self.conn,
+        ).set_index('pos')
+
+    def match_users(self, df_signup):
+        """Match signups like pipeline.match_users, reusing cached results for known identities
+
+        Only the distinct triples of this file are looked up in the index,
+        and only the ones it hasn't resolved yet go through the matcher.
+        """
+        result_df = clean_signup_data(df_signup)  # no-op when the keys are already cleaned
+        # Number the distinct triples by a vectorized row hash instead of deduplicating the strings
+        codes, _ = pd.factorize(pd.util.hash_pandas_object(result_df[MATCH_KEY_PRIORITY], index=False))
+        _, first_rows = np.unique(codes, return_index=True)
+        triples = result_df[MATCH_KEY_PRIORITY].iloc[first_rows].reset_index(drop=True)
+
+        matches = pd.DataFrame(index=pd.RangeIndex(len(triples)), columns=MATCH_RESULT_COLUMNS, dtype=object)
+        cached = self._cached_matches(triples)
+        matches.loc[cached.index, MATCH_RESULT_COLUMNS] = cached[MATCH_RESULT_COLUMNS].values
+
+        misses = np.flatnonzero(~matches.index.isin(cached.index))
+        if len(misses):
+            missing = triples.iloc[misses].reset_index(drop=True)
+            fresh = apply_team_matches(missing, self._lookup_key_indexes(missing))
+            with self._transaction():
+                self._insert('matches', fresh.rename(columns={
+                    'Email_Clean': 'email', 'Phone_Clean': 'phone', 'Aadhaar_Clean': 'aadhaar',
+                    'Registered_Team': 'registered', 'Team_Name': 'team_name', 'Team_Role': 'team_role',
+                })[['email', 'phone', 'aadhaar', 'registered', 'team_name', 'team_role']])
+            matches.loc[misses, MATCH_RESULT_COLUMNS] = fresh[MATCH_RESULT_COLUMNS].values
+
+        self.last_match_stats = {'identities': len(triples), 'rematched': len(misses)}
+        # Spread the per-triple results back over the signup rows
+        return result_df.assign(**{
+            column: _none_to_nan(pd.Series(matches[column].values[codes], index=result_df.index))
+            for column in MATCH_RESULT_COLUMNS
+        })
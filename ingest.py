@@ -0,0 +1,317 @@
+import codecs
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+import pandas as pd
+
+from html_table import read_first_html_table
+from parallel_match import resolve_workers
+
+# Parsed uploads kept in memory (bytes of DataFrame memory); override with CRC_INGEST_CACHE_MB
+DEFAULT_CACHE_BYTES = int(os.environ.get('CRC_INGEST_CACHE_MB', 512)) * 1024 * 1024
+
+# CSV uploads larger than this are read in chunks instead of in one pd.read_csv call
+STREAMING_THRESHOLD_BYTES = int(os.environ.get('CRC_STREAMING_THRESHOLD_MB', 200)) * 1024 * 1024
+
+# Rows per chunk when streaming a CSV
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Processes that parse several uploads side by side; 1 parses them one by one. Unset or 0 means one per core,
+# so single-core hosts parse in-process.
+LOAD_WORKERS = int(os.environ.get('CRC_LOAD_WORKERS', '0'))
+
+# Rough in-process parse time per MB of each upload format (benchmarks/bench_load.py prints it for a host):
+# workbooks are zipped XML parsed cell by cell, so a few MB of xlsx take seconds where CSV takes a fraction
+PARSE_SECONDS_PER_MB = {'xlsx': 5.0, 'xls': 5.0, 'html': 0.35, 'csv': 0.05}
+
+# Starting spawned workers (a fresh interpreter importing pandas) and shipping the frames back.
+# Worker processes are used only when parsing side by side is expected to save more than this.
+POOL_OVERHEAD_SECONDS = 1.5
+
+# Optional directory for Parquet copies of parsed uploads, shared across server restarts
+DEFAULT_CACHE_DIR = os.environ.get('CRC_INGEST_CACHE_DIR') or None
+
+# Bytes read from the start of an upload to detect its format
+SNIFF_BYTES = 64 * 1024
+
+# Leading bytes of each binary format: XLSX is a ZIP archive, legacy XLS an OLE2 compound file
+_XLSX_MAGIC = b'PK\x03\x04'
+_XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# Delimiters tried for text uploads, in order of preference on a tie
+CSV_DELIMITERS = [',', '\t', ';', '|']
+
+
+class IngestCache:
+    """LRU cache of parsed uploads keyed by file content hash, optionally backed by Parquet files"""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.parquet')
+
+    def get(self, key):
+        """Return the cached DataFrame for a key, or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                df = pd.read_parquet(self._disk_path(key))
+            except Exception:
+                return None
+            self._remember(key, df)
+            return df
+        return None
+
+    def put(self, key, df):
+        """Store a parsed DataFrame in memory and, if configured, on disk"""
+        self._remember(key, df)
+        if self.disk_dir:
+            try:
+                df.to_parquet(self._disk_path(key), index=False)
+            except Exception:
+                # Mixed-type columns can't always be written as Parquet; memory cache still works
+                pass
+
+    def _remember(self, key, df):
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            self._entries[key] = df
+            self._sizes[key] = size
+            self._total_bytes += size
+
+            # Evict least recently used uploads until we fit the budget again
+            while self._total_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(old_key)
+
+    def clear(self):
+        """Drop every in-memory entry (Parquet files are left in place)"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+
+_cache = IngestCache(disk_dir=DEFAULT_CACHE_DIR)
+
+def configure_ingest_cache(max_bytes=DEFAULT_CACHE_BYTES, disk_dir=None):
+    """Replace the shared ingestion cache with a new size budget and disk directory"""
+    global _cache
+    _cache = IngestCache(max_bytes=max_bytes, disk_dir=disk_dir)
+    return _cache
+
+def get_ingest_cache():
+    """Return the shared ingestion cache"""
+    return _cache
+
+def file_content_hash(file):
+    """Return the SHA-256 hex digest of a file-like object's content"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(1024 * 1024), b''):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+def _head(file, size=SNIFF_BYTES):
+    file.seek(0)
+    head = file.read(size)
+    file.seek(0)
+    return head
+
+def _text_encoding(head):
+    """Encoding of a text upload from its byte order mark (UTF-8 when there is none)"""
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    return 'utf-8'
+
+def sniff_format(file):
+    """Detect an upload's real format from its first bytes: 'xlsx', 'xls', 'html', 'csv' or None
+
+    None means unrecognised binary content. The extension is ignored, so a portal's HTML page saved as .xls or a
+    TSV named .xls still goes to the right parser first time.
+    """
+    head = _head(file)
+    if head.startswith(_XLSX_MAGIC):
+        return 'xlsx'
+    if head.startswith(_XLS_MAGIC):
+        return 'xls'
+
+    text = head.decode(_text_encoding(head), errors='ignore').lstrip('\ufeff \t\r\n')
+    if text.startswith('<') or '<html' in text[:2048].lower():
+        return 'html'
+    if '\x00' in text:
+        return None
+    return 'csv'
+
+def sniff_delimiter(file):
+    """Pick the CSV delimiter that splits the header line the most (',' on a tie or when none do)"""
+    head = _head(file)
+    text = head.decode(_text_encoding(head), errors='ignore').lstrip('\ufeff')
+    header = text.splitlines()[0] if text else ''
+    return max(CSV_DELIMITERS, key=lambda delimiter: (header.count(delimiter), -CSV_DELIMITERS.index(delimiter)))
+
+def _parse_file(file, file_name):
+    """Parse an uploaded Excel/HTML/CSV file into a DataFrame, with the parser its content calls for"""
+    try:
+        file_format = sniff_format(file)
+        if file_format == 'html':
+            # Portal exports are one big table; only the first is ever used
+            return read_first_html_table(file)
+        if file_format == 'xlsx':
+            return pd.read_excel(file, engine='openpyxl')
+        if file_format == 'xls':
+            return pd.read_excel(file, engine='xlrd')
+        if file_format is None:
+            raise ValueError(f"'{file_name}' is not an Excel, HTML or CSV file")
+        return pd.read_csv(file, sep=sniff_delimiter(file), encoding=_text_encoding(_head(file, 4)))
+    except Exception as e:
+        raise ValueError(f"❌ Unable to read '{file_name}'. Make sure it's a valid Excel or CSV file.") from e
+    finally:
+        file.seek(0)
+
+def read_file_safely(file, file_name, use_cache=True):
+    """Safely read uploaded files with validation, reusing earlier parses of the same content"""
+    if not use_cache:
+        return _parse_file(file, file_name)
+
+    # The parser is chosen from the content alone, so the content hash is the key
+    key = file_content_hash(file)
+
+    df = _cache.get(key)
+    if df is None:
+        df = _parse_file(file, file_name)
+        _cache.put(key, df)
+
+    # Callers add columns to the frame they get back, so never hand out the cached one
+    return df.copy()
+
+def _parse_bytes(data, file_name):
+    """Parse an upload's raw bytes (runs in a worker)"""
+    return _parse_file(BytesIO(data), file_name)
+
+def estimated_parse_seconds(file):
+    """Rough in-process parse time of an upload, from its size and sniffed format"""
+    return file_size(file) / 2**20 * PARSE_SECONDS_PER_MB.get(sniff_format(file), PARSE_SECONDS_PER_MB['xlsx'])
+
+def parallel_saving_seconds(files, workers):
+    """Expected parse time saved by parsing files side by side in workers instead of one by one"""
+    seconds = [estimated_parse_seconds(file) for file in files]
+    if workers < 2 or len(seconds) < 2:
+        return 0.0
+    return sum(seconds) - max(max(seconds), sum(seconds) / workers)
+
+def read_files_concurrently(files, on_ready=None, workers=None, min_saving=POOL_OVERHEAD_SECONDS):
+    """Read several uploads like read_file_safely, parsing them side by side in worker processes
+
+    files maps a label to an upload (any object with .name). on_ready(label, df), if given, is
+    called in this thread as soon as each file is parsed, while the others are still parsing; its
+    return value becomes that file's result. Returns {label: result, or the exception raised for
+    that file}, so one bad file doesn't hide what happened to the others.
+
+    Uploads already in the cache aren't parsed again. workers=None uses LOAD_WORKERS. Files are
+    parsed in-process one by one unless side by side is expected to save more than min_saving
+    seconds (parallel_saving_seconds), which takes several workers and costly parses.
+    """
+    results = {}
+    to_parse = {}
+    for label, file in files.items():
+        key = file_content_hash(file)
+        df = _cache.get(key)
+        if df is None:
+            to_parse[label] = (file, key)
+        else:
+            results[label] = _finish(label, df.copy(), on_ready)
+
+    workers = min(resolve_workers(LOAD_WORKERS if workers is None else workers), len(to_parse))
+    if workers < 2 or parallel_saving_seconds([file for file, _ in to_parse.values()], workers) <= min_saving:
+        for label, (file, key) in to_parse.items():
+            try:
+                df = _parse_file(file, file.name)
+            except Exception as e:
+                results[label] = e
+                continue
+            _cache.put(key, df)
+            results[label] = _finish(label, df.copy(), on_ready)
+        return results
+
+    # Spawned (not forked) workers: forking the threaded Streamlit server can deadlock
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(_parse_bytes, _head(file, -1), file.name): label for label, (file, _) in to_parse.items()}
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                results[label] = e
+                continue
+            _cache.put(to_parse[label][1], df)
+            results[label] = _finish(label, df.copy(), on_ready)
+    return results
+
+def _finish(label, df, on_ready):
+    if on_ready is None:
+        return df
+    try:
+        return on_ready(label, df)
+    except Exception as e:
+        return e
+
+def file_size(file):
+    """Return the size in bytes of a seekable file-like object"""
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return size
+
+def should_stream(file, file_name):
+    """Return True for CSV/TSV uploads (whatever their extension) large enough to be read in chunks"""
+    return file_size(file) > STREAMING_THRESHOLD_BYTES and sniff_format(file) == 'csv'
+
+def iter_csv_chunks(file, usecols=None, chunksize=DEFAULT_CHUNK_ROWS, progress_callback=None):
+    """Yield a CSV in chunks of rows, keeping only the wanted columns
+
+    Columns are read as strings so every chunk has the same dtypes and
+    phone numbers never pass through float. progress_callback, if given,
+    is called with the fraction of the file read so far after each chunk.
+    """
+    total_bytes = file_size(file) or 1
+    wanted = set(usecols) if usecols is not None else None
+
+    reader = pd.read_csv(
+        file,
+        sep=sniff_delimiter(file),
+        encoding=_text_encoding(_head(file, 4)),
+        usecols=(lambda col: col in wanted) if wanted is not None else None,
+        dtype=str,
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk
+            if progress_callback:
+                progress_callback(min(file.tell() / total_bytes, 1.0))
+    file.seek(0)
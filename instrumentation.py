@@ -0,0 +1,158 @@
+"""Per-stage timing and memory instrumentation.
+
+A Diagnostics records one row per pipeline stage: wall time, rows in and
+out, cache status, and how far the process RSS peaked above its level
+when the stage started. Stages are recorded either by StageGraph.run or
+around any other step with `with diagnostics.stage(name):`. The records
+export as JSON, and a cProfile of the run can be captured between
+start_profile() and stop_profile(). A Diagnostics created with
+enabled=False still times stages for its callers but samples no memory
+and keeps no records, so it costs next to nothing when nobody looks.
+
+Peak memory is sampled from /proc by a background thread, so it is
+Linux-only (reported as 0 elsewhere). It is the whole process's memory,
+so stages that run while other sessions work can show their usage too.
+"""
+import cProfile
+import io
+import json
+import marshal
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class RssSampler:
+    """Track the peak resident set size of this process from a background thread (Linux /proc)"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.baseline = self.peak = self.current()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current():
+        try:
+            with open('/proc/self/statm') as statm:
+                return int(statm.read().split()[1]) * PAGE_SIZE
+        except OSError:
+            return 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.peak = self.current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+    @property
+    def peak_increase(self):
+        """Bytes by which RSS peaked above its value when sampling started"""
+        return self.peak - self.baseline
+
+
+def row_count(value):
+    """Rows of a DataFrame/Series (or of the first one in a tuple), else None"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, tuple):
+        return next((len(item) for item in value if isinstance(item, (pd.DataFrame, pd.Series))), None)
+    return None
+
+
+class Diagnostics:
+    """Stage records (and optionally a cProfile dump) for one run"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.records = []
+        self.profile_stats = None
+        self._profiler = None
+        self.started = pd.Timestamp.now()
+
+    @contextmanager
+    def stage(self, name, rows_in=None, cache=None):
+        """Time the block as one stage; set record['Rows out'] (or call set_output) inside it"""
+        record = {'Stage': name, 'Cache': cache, 'Seconds': None, 'Rows in': rows_in, 'Rows out': None,
+                  'Peak +MB': None}
+        with RssSampler() if self.enabled else nullcontext() as sampler:
+            start = time.perf_counter()
+            try:
+                yield record
+            finally:
+                record['Seconds'] = round(time.perf_counter() - start, 4)
+        if self.enabled:
+            record['Peak +MB'] = round(sampler.peak_increase / 2**20, 1)
+            self.records.append(record)
+
+    @staticmethod
+    def set_output(record, output):
+        """Fill in a stage record's row count from its output; returns the output"""
+        record['Rows out'] = row_count(output)
+        return output
+
+    def start_profile(self):
+        """Start capturing a cProfile of this thread; stop_profile() stores it in profile_stats"""
+        self._profiler = cProfile.Profile()
+        try:
+            self._profiler.enable()
+        except ValueError:
+            # Another profiler is already running in this process (Python 3.12+)
+            self._profiler = None
+
+    def stop_profile(self):
+        profiler, self._profiler = self._profiler, None
+        if profiler is not None:
+            profiler.disable()
+            profiler.create_stats()
+            self.profile_stats = profiler.stats
+
+    def table(self):
+        """Stage records as a frame for display"""
+        table = pd.DataFrame(self.records, columns=['Stage', 'Cache', 'Seconds', 'Rows in', 'Rows out', 'Peak +MB'])
+        return table.astype({'Rows in': 'Int64', 'Rows out': 'Int64'})
+
+    def to_json(self):
+        """Stage records, their total time and the run's start, as JSON"""
+        return json.dumps({
+            'started': self.started.isoformat(),
+            'total_seconds': round(sum(record['Seconds'] for record in self.records), 4),
+            'stages': self.records,
+        }, indent=2)
+
+    def profile_dump(self):
+        """The captured profile in pstats' file format (open with pstats or snakeviz), or None"""
+        return marshal.dumps(self.profile_stats) if self.profile_stats is not None else None
+
+    def profile_summary(self, limit=25):
+        """Text of the slowest functions by cumulative time, or None without a profile"""
+        if self.profile_stats is None:
+            return None
+        stats = pstats.Stats(_LoadedProfile(self.profile_stats), stream=io.StringIO())
+        stats.sort_stats('cumulative').print_stats(limit)
+        return stats.stream.getvalue()
+
+
+class _LoadedProfile:
+    """Stand-in profiler that hands pstats already collected stats"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
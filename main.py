@@ -1,98 +1,34 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-from io import BytesIO
-import re
-import matplotlib.pyplot as plt
+import streamlit.components.v1 as components
 import folium
-from streamlit_folium import st_folium
-
-def clean_phone_number(phone):
-    """Clean and standardize phone numbers"""
-    if pd.isna(phone):
-        return ""
-    phone_str = str(phone).strip()
-    # Remove any non-digit characters
-    phone_clean = re.sub(r'\D', '', phone_str)
-    # Take last 10 digits if longer
-    if len(phone_clean) > 10:
-        phone_clean = phone_clean[-10:]
-    return phone_clean
-
-def clean_email(email):
-    """Clean and standardize email addresses"""
-    if pd.isna(email):
-        return ""
-    return str(email).strip().lower()
-
-def clean_aadhaar(aadhaar):
-    """Clean and standardize Aadhaar last 4 digits"""
-    if pd.isna(aadhaar):
-        return ""
-    return str(aadhaar).strip()
-
-def get_indian_states():
-    """Return list of all Indian states and union territories"""
-    return [
-        'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar', 'Chhattisgarh', 'Goa', 
-        'Gujarat', 'Haryana', 'Himachal Pradesh', 'Jharkhand', 'Karnataka', 'Kerala', 
-        'Madhya Pradesh', 'Maharashtra', 'Manipur', 'Meghalaya', 'Mizoram', 'Nagaland', 
-        'Odisha', 'Punjab', 'Rajasthan', 'Sikkim', 'Tamil Nadu', 'Telangana', 'Tripura', 
-        'Uttar Pradesh', 'Uttarakhand', 'West Bengal', 'Andaman and Nicobar Islands', 
-        'Chandigarh', 'Dadra and Nagar Haveli and Daman and Diu', 'Delhi', 'Jammu and Kashmir', 
-        'Ladakh', 'Lakshadweep', 'Puducherry'
-    ]
-
-def get_state_coordinates():
-    """Return approximate coordinates for Indian states and union territories"""
-    return {
-        'Andhra Pradesh': [15.9129, 79.7400],
-        'Arunachal Pradesh': [28.2180, 94.7278],
-        'Assam': [26.2006, 92.9376],
-        'Bihar': [25.0961, 85.3131],
-        'Chhattisgarh': [21.2787, 81.8661],
-        'Goa': [15.2993, 74.1240],
-        'Gujarat': [23.0225, 72.5714],
-        'Haryana': [29.0588, 76.0856],
-        'Himachal Pradesh': [31.1048, 77.1734],
-        'Jharkhand': [23.6102, 85.2799],
-        'Karnataka': [15.3173, 75.7139],
-        'Kerala': [10.8505, 76.2711],
-        'Madhya Pradesh': [22.9734, 78.6569],
-        'Maharashtra': [19.7515, 75.7139],
-        'Manipur': [24.6637, 93.9063],
-        'Meghalaya': [25.4670, 91.3662],
-        'Mizoram': [23.1645, 92.9376],
-        'Nagaland': [26.1584, 94.5624],
-        'Odisha': [20.9517, 85.0985],
-        'Punjab': [31.1471, 75.3412],
-        'Rajasthan': [27.0238, 74.2179],
-        'Sikkim': [27.5330, 88.5122],
-        'Tamil Nadu': [11.1271, 78.6569],
-        'Telangana': [18.1124, 79.0193],
-        'Tripura': [23.9408, 91.9882],
-        'Uttar Pradesh': [26.8467, 80.9462],
-        'Uttarakhand': [30.0668, 79.0193],
-        'West Bengal': [22.9868, 87.8550],
-        'Andaman and Nicobar Islands': [11.7401, 92.6586],
-        'Chandigarh': [30.7333, 76.7794],
-        'Dadra and Nagar Haveli and Daman and Diu': [20.1809, 73.0169],
-        'Delhi': [28.7041, 77.1025],
-        'Jammu and Kashmir': [34.0837, 74.7973],
-        'Ladakh': [34.2996, 78.2932],
-        'Lakshadweep': [10.5667, 72.6417],
-        'Puducherry': [11.9416, 79.8083]
-    }
-
-def create_indian_map_with_data(df, show_registration_status=False):
-    """Create an interactive map of India with state-wise participant data"""
+
+from charts import (
+    CHART_RENDERERS, CHART_STYLES, MAX_STATIC_CATEGORIES, counts_frame, pie_chart_spec, use_native_chart,
+)
+from export import DEFAULT_EXPORT_FORMAT, EXPORT_FORMATS, ZIP_MIME, export_file_type
+from export_bundle import build_export_bundle, registration_files, team_analysis_files
+from identity_index import event_index_path
+from instrumentation import Diagnostics
+from ingest import iter_csv_chunks, read_file_safely, should_stream
+from table_view import GroupIndex, TableView, page_count
+from stages import (
+    TEAM_UPLOAD_CHAINS, preload_uploads, registration_analysis_graph, stage_key, streaming_signup_graph,
+    streaming_team_analysis_graph, team_analysis_graph, upload_source, value_key,
+)
+from pipeline import (
+    SIGNUP_COLUMNS, build_state_statistics_table, compact_dtypes, compute_state_stats, create_state_wise_excel,
+    dataframe_fingerprint, extract_state_from_data, get_state_coordinates, stream_signups, team_summary,
+)
+
+def create_indian_map_with_data(state_stats, show_registration_status=False):
+    """Create an interactive map of India from per-state participant counts"""
     
     # Get state coordinates
     state_coords = get_state_coordinates()
     
-    # Calculate state-wise statistics
-    state_counts = df['State'].value_counts().to_dict()
-    
     # Create base map centered on India
     india_map = folium.Map(
         location=[20.5937, 78.9629],  # Center of India
@@ -101,14 +37,15 @@ def create_indian_map_with_data(df, show_registration_status=False):
     )
     
     # Add markers for states with participants
-    for state, count in state_counts.items():
+    for state, stats in state_stats.iterrows():
+        count = stats['Total_Participants']
         if state in state_coords and count > 0:
             coords = state_coords[state]
             
-            # Calculate additional statistics if registration status is available
-            if show_registration_status and 'Registered_Team' in df.columns:
-                registered_count = len(df[(df['State'] == state) & (df['Registered_Team'] == 'Yes')])
-                not_registered_count = count - registered_count
+            # Add registration breakdown if registration status is available
+            if show_registration_status:
+                registered_count = stats['Registered_in_Teams']
+                not_registered_count = stats['Not_in_Teams']
                 popup_text = f"""
                 <b>{state}</b><br>
                 Total Participants: {count}<br>
@@ -168,230 +105,232 @@ def create_indian_map_with_data(df, show_registration_status=False):
     
     return india_map
 
-def extract_state_from_data(df):
-    """Extract state information from dataframe, checking multiple possible columns"""
-    state_column = None
-    possible_state_columns = ['State', 'state', 'State Name', 'state_name', 'State/UT', 'Location', 'Address']
-    
-    for col in possible_state_columns:
-        if col in df.columns:
-            state_column = col
-            break
-    
-    if state_column:
-        return df[state_column].fillna('Unknown')
-    else:
-        # If no state column found, return 'Unknown' for all rows
-        return pd.Series(['Unknown'] * len(df), index=df.index)
-
-def create_state_wise_excel(df, state_name):
-    """Create downloadable Excel file for a specific state"""
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name=f'{state_name}_Participants', index=False)
-    output.seek(0)
-    return output.getvalue()
-
-def process_registration_data(df_reg):
-    """Process registration data to extract all team members"""
-    members_list = []
-    
-    for _, row in df_reg.iterrows():
-        team_name = row.get('Team Name', '')
-        team_leader = row.get('Team Leader Name', '')
-        
-        # Add team leader
-        if pd.notna(row.get('Team Leader Name')):
-            members_list.append({
-                'Name': row.get('Team Leader Name', ''),
-                'Email': clean_email(row.get('Team Leader Email')),
-                'Phone': clean_phone_number(row.get('Team Leader Phone Number')),
-                'Aadhaar_Last4': clean_aadhaar(row.get('Team Leader Aadhaar Last 4 Digits')),
-                'Team_Name': team_name,
-                'Role': 'Team Leader'
-            })
-        
-        # Add other members
-        for i in range(1, 4):  # Member 1, 2, 3
-            member_name = row.get(f'Member {i} Name')
-            if pd.notna(member_name) and member_name.strip():
-                members_list.append({
-                    'Name': member_name,
-                    'Email': clean_email(row.get(f'Member {i} Email')),
-                    'Phone': clean_phone_number(row.get(f'Member {i} Phone Number')),
-                    'Aadhaar_Last4': clean_aadhaar(row.get(f'Member {i} Aadhaar Last 4 Digits')),
-                    'Team_Name': team_name,
-                    'Role': row.get(f'Member {i} Role', 'Member')
-                })
-    
-    return pd.DataFrame(members_list)
-
-def match_users(df_signup, df_team_members):
-    """Match signup users with team members"""
-    # Clean signup data
-    df_signup_clean = df_signup.copy()
-    df_signup_clean['Email_Clean'] = df_signup_clean['Email ID'].apply(clean_email)
-    df_signup_clean['Phone_Clean'] = df_signup_clean['Phone Number'].apply(clean_phone_number)
-    df_signup_clean['Aadhaar_Clean'] = df_signup_clean['Aadhaar Last 4 Digits'].apply(clean_aadhaar)
-    
-    # Clean team members data
-    df_team_clean = df_team_members.copy()
-    df_team_clean['Email_Clean'] = df_team_clean['Email'].apply(clean_email)
-    df_team_clean['Phone_Clean'] = df_team_clean['Phone'].apply(clean_phone_number)
-    df_team_clean['Aadhaar_Clean'] = df_team_clean['Aadhaar_Last4'].apply(clean_aadhaar)
-    
-    # Create result dataframe
-    result_df = df_signup_clean.copy()
-    result_df['Registered_Team'] = 'No'
-    result_df['Team_Name'] = ''
-    result_df['Team_Role'] = ''
-    
-    # Match based on multiple criteria
-    for idx, signup_row in df_signup_clean.iterrows():
-        matched = False
-        
-        # Try to match by email first (most reliable)
-        if signup_row['Email_Clean']:
-            email_match = df_team_clean[df_team_clean['Email_Clean'] == signup_row['Email_Clean']]
-            if not email_match.empty:
-                result_df.at[idx, 'Registered_Team'] = 'Yes'
-                result_df.at[idx, 'Team_Name'] = email_match.iloc[0]['Team_Name']
-                result_df.at[idx, 'Team_Role'] = email_match.iloc[0]['Role']
-                matched = True
-        
-        # If no email match, try phone number
-        if not matched and signup_row['Phone_Clean']:
-            phone_match = df_team_clean[df_team_clean['Phone_Clean'] == signup_row['Phone_Clean']]
-            if not phone_match.empty:
-                result_df.at[idx, 'Registered_Team'] = 'Yes'
-                result_df.at[idx, 'Team_Name'] = phone_match.iloc[0]['Team_Name']
-                result_df.at[idx, 'Team_Role'] = phone_match.iloc[0]['Role']
-                matched = True
-        
-        # If no phone match, try Aadhaar
-        if not matched and signup_row['Aadhaar_Clean']:
-            aadhaar_match = df_team_clean[df_team_clean['Aadhaar_Clean'] == signup_row['Aadhaar_Clean']]
-            if not aadhaar_match.empty:
-                result_df.at[idx, 'Registered_Team'] = 'Yes'
-                result_df.at[idx, 'Team_Name'] = aadhaar_match.iloc[0]['Team_Name']
-                result_df.at[idx, 'Team_Role'] = aadhaar_match.iloc[0]['Role']
-                matched = True
-    
-    return result_df
-
-def create_downloadable_excel(df_result):
-    """Create downloadable Excel file"""
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Main sheet with all data
-        df_result.to_excel(writer, sheet_name='Registration Status', index=False)
-        
-        # Summary sheet
-        registered_count = len(df_result[df_result['Registered_Team'] == 'Yes'])
-        not_registered_count = len(df_result[df_result['Registered_Team'] == 'No'])
-        
-        summary_df = pd.DataFrame({
-            'Status': ['Registered in Team', 'Not Registered in Team', 'Total'],
-            'Count': [registered_count, not_registered_count, len(df_result)]
-        })
-        summary_df.to_excel(writer, sheet_name='Summary', index=False)
-        
-        # Team-wise breakdown
-        if registered_count > 0:
-            team_summary = df_result[df_result['Registered_Team'] == 'Yes'].groupby('Team_Name').size().reset_index(name='Members_Count')
-            team_summary.to_excel(writer, sheet_name='Team Summary', index=False)
-    
-    output.seek(0)
-    return output.getvalue()
-
-def read_file_safely(file, file_name):
-    """Safely read uploaded files with validation"""
-    # Reset file pointer
-    file.seek(0)
-    first_bytes = file.read(2048)
-    file.seek(0)
-
-    # Check if file is actually HTML (common with fake .xls files)
-    if first_bytes.startswith(b'<') or b'<html' in first_bytes.lower():
-        dfs = pd.read_html(file)
-        df = dfs[0]  # Take first table
-        return df
-
-    # Read CSV
-    if file_name.endswith('.csv'):
-        return pd.read_csv(file)
-
-    # Try reading as real Excel
-    try:
-        if file_name.endswith('.xls'):
-            return pd.read_excel(file, engine='xlrd')
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_indian_map_html(stats_hash, show_registration_status, _state_stats):
+    """Return the rendered map HTML, building it once per state-count table"""
+    india_map = create_indian_map_with_data(_state_stats, show_registration_status)
+    return india_map.get_root().render()
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def get_state_wise_excel(dataset_hash, state_name, export_format, _df):
+    """Return the state's export, building it once per (dataset, state, format)"""
+    return create_state_wise_excel(_df[_df['State'] == state_name], state_name, export_format)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_chart_png(kind, counts):
+    """Return a static chart's PNG, rendering it once per (kind, aggregated counts)"""
+    return CHART_RENDERERS[kind](counts)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def get_export_bundle(dataset_hash, export_format, _plan_files):
+    """Return the ZIP of every per-group file, building it once per (dataset, format)"""
+    return build_export_bundle(_plan_files(), export_format)
+
+def export_bundle_button(dataset_hash, plan_files, file_stem):
+    """One "export everything" action: build the ZIP on request, then offer it for download"""
+    export_format = st.session_state.get('export_format', DEFAULT_EXPORT_FORMAT)
+    bundle_key = (dataset_hash, export_format)
+    if 'prepared_bundles' not in st.session_state:
+        st.session_state.prepared_bundles = set()
+
+    if st.button("📦 Export Everything", key=f"prepare_bundle_{file_stem}",
+                 help="Every per-group file in one ZIP, built in parallel worker processes"):
+        st.session_state.prepared_bundles.add(bundle_key)
+
+    if bundle_key in st.session_state.prepared_bundles:
+        with st.spinner("Building every file..."):
+            bundle = get_export_bundle(dataset_hash, export_format, plan_files)
+        st.download_button(
+            label="📥 Download All Files (ZIP)",
+            data=bundle,
+            file_name=f"{file_stem}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.zip",
+            mime=ZIP_MIME,
+            key=f"download_bundle_{file_stem}"
+        )
+
+# Rows per page offered by paginated previews
+PREVIEW_PAGE_SIZES = [25, 50, 100, 250]
+
+def paginated_dataframe(df, key, dataset_hash=None, style=None, default_sort=None, **dataframe_kwargs):
+    """Show df a page at a time with search and sort; only the visible page is sent (and styled)
+
+    The view's sort orders and search results (row positions only) are
+    kept in the session per key until dataset_hash changes; the rows come
+    from df on each rerun. style, if given, takes the page frame and
+    returns a Styler. Returns the page's rows.
+    """
+    if dataset_hash is None:
+        dataset_hash = dataframe_fingerprint(df)
+    if 'table_views' not in st.session_state:
+        st.session_state.table_views = {}
+    cached = st.session_state.table_views.get(key)
+    if cached is None or cached[0] != dataset_hash:
+        # Let the old dataset's state go before building the new one
+        release_table_view(key)
+        cached = st.session_state.table_views[key] = (dataset_hash, {})
+    view = TableView(df, cached[1])
+
+    no_sort = "(original order)"
+    sort_options = [no_sort, *df.columns]
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    search = col1.text_input("🔎 Search", key=f"{key}_search", placeholder="Text in any column")
+    sort_by = col2.selectbox("Sort by", sort_options, key=f"{key}_sort",
+                             index=sort_options.index(default_sort) if default_sort in sort_options else 0)
+    descending = col3.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order") == "Descending"
+    page_size = col4.selectbox("Rows", PREVIEW_PAGE_SIZES, key=f"{key}_page_size", index=1)
+
+    positions = view.positions(search, None if sort_by == no_sort else sort_by, ascending=not descending)
+    pages = page_count(len(positions), page_size)
+    # A new search or page size can leave the remembered page past the end
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    page_df = view.page(positions, page, page_size)
+    st.dataframe(style(page_df) if style else page_df, **dataframe_kwargs)
+    first = (page - 1) * page_size
+    st.caption(f"Rows {min(first + 1, len(positions))}–{first + len(page_df)} of {len(positions)}"
+               + (f" (search matched {len(positions)} of {len(df)})" if search.strip() else ""))
+    return page_df
+
+def release_table_view(key):
+    """Drop a paged table's session state, e.g. once its upload is gone"""
+    st.session_state.get('table_views', {}).pop(key, None)
+
+def team_browser(df_members, key, dataset_hash, member_columns):
+    """Searchable, paged table of teams; only the team picked from the current page has its rows taken
+
+    Team membership comes from one groupby (a GroupIndex). Only its row
+    positions and the team summary are kept in the session, until
+    dataset_hash changes; the rows come from df_members on each rerun.
+    """
+    if 'team_indexes' not in st.session_state:
+        st.session_state.team_indexes = {}
+    cached = st.session_state.team_indexes.get(key)
+    if cached is None or cached[0] != dataset_hash:
+        # Let the old dataset's state go before building the new one
+        release_team_browser(key)
+        teams = GroupIndex(df_members, 'Team_Name')
+        cached = st.session_state.team_indexes[key] = (dataset_hash, teams.positions, team_summary(df_members))
+    _, positions, summary = cached
+    teams = GroupIndex(df_members, 'Team_Name', positions)
+
+    page_df = paginated_dataframe(summary, f"{key}_teams", dataset_hash=dataset_hash, default_sort='Team_Name',
+                                  use_container_width=True, hide_index=True)
+    if page_df.empty:
+        return
+    # Options change with the page, so the pick resets to the page's first team
+    team = st.selectbox("👥 Show members of", page_df['Team_Name'].tolist(), key=f"{key}_team")
+    if team is not None and team in teams:
+        members = teams.rows(team)
+        st.dataframe(members[[c for c in member_columns if c in members.columns]],
+                     use_container_width=True, hide_index=True)
+
+def release_team_browser(key):
+    """Drop a team browser's session state, e.g. once its dataset is gone"""
+    st.session_state.get('team_indexes', {}).pop(key, None)
+    release_table_view(f"{key}_teams")
+
+def load_uploads_with_progress(graph, sources, file_names, diagnostics):
+    """Read and normalize uploads, with a status line per file; False if any failed
+
+    file_names maps each upload source of the graph to its file name.
+    """
+    messages = {'reading': "⏳ Reading {}...", 'normalizing': "🧹 Normalizing {}...", 'done': "✅ {} ready"}
+    with st.status("📂 Loading files...", expanded=True) as status:
+        lines = {source: st.empty() for source in file_names}
+
+        def on_update(source, state, error):
+            if state == 'failed':
+                lines[source].error(f"❌ {file_names[source]}: {str(error).removeprefix('❌ ')}")
+            else:
+                lines[source].write(messages[state].format(file_names[source]))
+
+        errors = preload_uploads(graph, sources, {source: TEAM_UPLOAD_CHAINS[source] for source in file_names},
+                                 diagnostics=diagnostics, on_update=on_update)
+        if errors:
+            status.update(label=f"📂 {len(errors)} of {len(file_names)} files could not be loaded", state="error")
         else:
-            return pd.read_excel(file, engine='openpyxl')
-    except Exception as e:
-        # Attempt fallback to HTML parsing for mislabelled .xls
-        file.seek(0)
-        try:
-            dfs = pd.read_html(file)
-            df = dfs[0]
-            return df
-        except:
-            raise ValueError(f"❌ Unable to read '{file_name}'. Make sure it's a valid Excel or CSV file.")
-
-def display_state_statistics(df, show_registration_status=False):
-    """Display state-wise statistics with download buttons"""
+            status.update(label="📂 Files loaded", state="complete", expanded=False)
+    return not errors
+
+def display_diagnostics(diagnostics):
+    """Expander with this run's stage timings, their JSON export and any captured profile"""
+    with st.expander("🩺 Diagnostics", expanded=True):
+        if diagnostics.records:
+            st.dataframe(diagnostics.table(), use_container_width=True, hide_index=True)
+            st.download_button(
+                label="📥 Download Diagnostics (JSON)",
+                data=diagnostics.to_json(),
+                file_name=f"diagnostics_{diagnostics.started.strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                key="download_diagnostics"
+            )
+        else:
+            st.info("No pipeline stages ran in this run")
+
+        profile_summary = diagnostics.profile_summary()
+        if profile_summary:
+            st.write("**cProfile of this run** (slowest by cumulative time)")
+            st.code(profile_summary)
+            st.download_button(
+                label="📥 Download Profile (.prof)",
+                data=diagnostics.profile_dump(),
+                file_name=f"profile_{diagnostics.started.strftime('%Y%m%d_%H%M%S')}.prof",
+                mime="application/octet-stream",
+                key="download_profile"
+            )
+
+def export_format_selector():
+    """Sidebar choice of download format; Excel unless the user asks for something lighter"""
+    formats = list(EXPORT_FORMATS)
+    return st.sidebar.selectbox(
+        "📦 Download format",
+        options=formats,
+        index=formats.index(DEFAULT_EXPORT_FORMAT),
+        format_func=lambda fmt: {'xlsx': 'Excel (.xlsx)', 'csv': 'CSV', 'parquet': 'Parquet'}[fmt],
+        help="CSV and Parquet downloads are much faster to build than Excel for large datasets",
+        key="export_format"
+    )
+
+def stream_signup_file(signup_file, df_team_members=None):
+    """Stream a large signup CSV in chunks with a progress bar, returning (df, state_stats)"""
+    progress = st.progress(0.0, text=f"Reading {signup_file.name} in chunks...")
+    chunks = iter_csv_chunks(
+        signup_file,
+        usecols=SIGNUP_COLUMNS,
+        progress_callback=lambda done: progress.progress(done, text=f"Reading {signup_file.name}: {done:.0%}")
+    )
+    result = stream_signups(chunks, df_team_members)
+    progress.empty()
+    return result
+
+def display_state_statistics(df, show_registration_status=False, state_stats=None, dataset_hash=None):
+    """Display state-wise statistics with download buttons
+
+    dataset_hash identifies df for the export cache; pass one you already
+    have (e.g. a stage key) to skip hashing the whole frame on every rerun.
+    """
     st.subheader("🗺️ State-wise Statistics")
     
     # Add the interactive map
     st.subheader("🌍 Interactive India Map")
     st.write("Click on the markers to see detailed information for each state:")
     
+    # Aggregate once; the map and the stats grid both read from this table
+    if state_stats is None:
+        state_stats = compute_state_stats(df)
+
     try:
-        india_map = create_indian_map_with_data(df, show_registration_status)
-        st_folium(india_map, width=700, height=500)
+        # Static HTML: panning and clicking markers happen in the browser without a rerun
+        map_html = get_indian_map_html(dataframe_fingerprint(state_stats), show_registration_status, state_stats)
+        components.html(map_html, width=700, height=500)
     except Exception as e:
         st.warning(f"Map could not be loaded: {str(e)}")
         st.info("📊 Showing tabular data instead:")
     
-    # Get all Indian states
-    all_states = get_indian_states()
-    
-    # Get actual state counts from data
-    actual_state_counts = df['State'].value_counts().to_dict()
-    
-    # Create comprehensive state statistics
-    state_stats = []
-    for state in all_states:
-        count = actual_state_counts.get(state, 0)
-        if show_registration_status and count > 0:
-            registered_count = len(df[(df['State'] == state) & (df['Registered_Team'] == 'Yes')])
-        else:
-            registered_count = 0
-        
-        state_stats.append({
-            'State': state,
-            'Total_Participants': count,
-            'Registered_in_Teams': registered_count,
-            'Not_in_Teams': count - registered_count
-        })
-    
-    # Add states that are in data but not in the predefined list
-    for state in actual_state_counts.keys():
-        if state not in all_states:
-            count = actual_state_counts[state]
-            if show_registration_status:
-                registered_count = len(df[(df['State'] == state) & (df['Registered_Team'] == 'Yes')])
-            else:
-                registered_count = 0
-            state_stats.append({
-                'State': state,
-                'Total_Participants': count,
-                'Registered_in_Teams': registered_count,
-                'Not_in_Teams': count - registered_count
-            })
-    
-    # Convert to DataFrame and sort by participant count
-    state_stats_df = pd.DataFrame(state_stats)
-    state_stats_df = state_stats_df.sort_values('Total_Participants', ascending=False)
+    # One row per state (predefined list first, then anything else found in the data)
+    state_stats_df = build_state_statistics_table(state_stats, show_registration_status)
     
     # Display state statistics
     states_with_participants = state_stats_df[state_stats_df['Total_Participants'] > 0]
@@ -399,6 +338,13 @@ def display_state_statistics(df, show_registration_status=False):
     
     if len(states_with_participants) > 0:
         st.write("**States with Participants:**")
+
+        if dataset_hash is None:
+            dataset_hash = dataframe_fingerprint(df)
+        export_format = st.session_state.get('export_format', DEFAULT_EXPORT_FORMAT)
+        extension, mime = export_file_type(export_format)
+        if 'prepared_state_exports' not in st.session_state:
+            st.session_state.prepared_state_exports = set()
         
         # Create columns for better display
         num_cols = 3
@@ -413,15 +359,18 @@ def display_state_statistics(df, show_registration_status=False):
                 else:
                     st.write(f"Total: {row['Total_Participants']} participants")
                 
-                # Download button for this state
-                state_data = df[df['State'] == row['State']]
-                if len(state_data) > 0:
-                    excel_data = create_state_wise_excel(state_data, row['State'])
+                # Build the state's workbook only once someone asks for it
+                export_key = (dataset_hash, row['State'])
+                if st.button(f"⚙️ Prepare {row['State']} Data", key=f"prepare_{row['State']}_{idx}"):
+                    st.session_state.prepared_state_exports.add(export_key)
+
+                if export_key in st.session_state.prepared_state_exports:
+                    excel_data = get_state_wise_excel(dataset_hash, row['State'], export_format, df)
                     st.download_button(
                         label=f"📥 Download {row['State']} Data",
                         data=excel_data,
-                        file_name=f"{row['State'].replace(' ', '_')}_participants_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        file_name=f"{row['State'].replace(' ', '_')}_participants_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}{extension}",
+                        mime=mime,
                         key=f"download_{row['State']}_{idx}"
                     )
                 st.write("---")
@@ -446,541 +395,652 @@ st.markdown("Choose your analysis type and upload the required files")
 
 # Install instruction notice
 
-# Main selection
-st.subheader("🎯 What would you like to analyze?")
+# Download format used by every export on the page
+export_format = export_format_selector()
 
-col1, col2, col3 = st.columns(3)
+# Stage timings of this run, only sampled and kept while shown; the button profiles one run of the whole page
+show_diagnostics = st.sidebar.checkbox(
+    "🩺 Show diagnostics",
+    key="show_diagnostics",
+    help="Time, rows and peak memory of every pipeline stage, exportable as JSON"
+)
+diagnostics = Diagnostics(enabled=show_diagnostics)
+if show_diagnostics and st.sidebar.button("🧪 Profile one run", help="Rerun the page under cProfile"):
+    diagnostics.start_profile()
 
-with col1:
-    st.markdown("""
-    <div style="border: 2px solid #FF6B6B; border-radius: 10px; padding: 20px; text-align: center; margin: 10px 0;">
-        <h3 style="color: #FF6B6B;">Signup Analysis Only</h3>
-        <p>Analyze individual signups and get state-wise statistics with interactive map</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    signup_only = st.button("Choose Signup Analysis", key="signup_only", use_container_width=True)
+# Widget changes stop the run with an exception; the profiler must stop either way
+try:
+    # Main selection
+    st.subheader("🎯 What would you like to analyze?")
 
-with col3:
-    st.markdown("""
-    <div style="border: 2px solid #FF6B6B; border-radius: 10px; padding: 20px; text-align: center; margin: 10px 0;">
-        <h3 style="color: #FF6B6B;">Registration Analysis Only</h3>
-        <p>Analyze individual registrations and get state-wise statistics</p>
-    </div>
-    """, unsafe_allow_html=True)
+    col1, col2, col3 = st.columns(3)
 
-    registration_only = st.button("Choose Registration Analysis", key="registration_only", use_container_width=True)
+    with col1:
+        st.markdown("""
+        <div style="border: 2px solid #FF6B6B; border-radius: 10px; padding: 20px; text-align: center; margin: 10px 0;">
+            <h3 style="color: #FF6B6B;">Signup Analysis Only</h3>
+            <p>Analyze individual signups and get state-wise statistics with interactive map</p>
+        </div>
+        """, unsafe_allow_html=True)
 
-with col2:
-    st.markdown("""
-    <div style="border: 2px solid #4ECDC4; border-radius: 10px; padding: 20px; text-align: center; margin: 10px 0;">
-        <h3 style="color: #4ECDC4;">Complete Team Analysis</h3>
-        <p>Full analysis comparing signups with team registrations with interactive map</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    team_analysis = st.button("Choose Team Analysis", key="team_analysis", use_container_width=True)
-
-# Initialize session state
-if 'analysis_type' not in st.session_state:
-    st.session_state.analysis_type = None
-
-# Set analysis type based on button clicks
-if signup_only:
-    st.session_state.analysis_type = 'signup_only'
-elif team_analysis:
-    st.session_state.analysis_type = 'team_analysis'
-elif registration_only:
-    st.session_state.analysis_type = 'registration_only'
-
-# Show file upload and analysis based on selection
-if st.session_state.analysis_type == 'signup_only':
-    st.markdown("---")
-    st.subheader("📝 Signup Analysis")
-    
-    signup_file = st.file_uploader(
-        "Upload Signup Excel/CSV", 
-        type=['xlsx', 'xls', 'csv'], 
-        key="signup_file",
-        help="Upload your signup data file containing participant information"
-    )
-    
-    if signup_file:
-        try:
-            # Load signup data
-            df_signup = read_file_safely(signup_file, signup_file.name)
-            
-            # Extract state information
-            df_signup['State'] = extract_state_from_data(df_signup)
-            
-            st.success(f"✅ {len(df_signup)} signup records loaded successfully!")
-            
-            # Basic statistics
-            st.subheader("📈 Statistics")
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Total Signups", len(df_signup))
-            with col2:
-                unique_states = len(df_signup['State'].value_counts())
-                st.metric("States Represented", unique_states)
-            with col3:
-                top_state = df_signup['State'].mode().iloc[0] if len(df_signup) > 0 else "N/A"
-                st.metric("Top State", top_state)
-            
-            # State-wise statistics with interactive map
-            display_state_statistics(df_signup, show_registration_status=False)
-            
-            # Download complete report
-            st.subheader("💾 Download Results")
-            excel_data = create_state_wise_excel(df_signup, "All_Participants")
-            st.download_button(
-                label="📥 Download Complete Signup Report",
-                data=excel_data,
-                file_name=f"signup_report_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-            
-        except Exception as e:
-            st.error(f"❌ Error processing files: {str(e)}")
-            st.write("Please ensure your files have the correct format and column names.")
-    
-    elif signup_file:
-        st.info("📁 Please upload both signup and registration files for complete analysis")
-
-elif st.session_state.analysis_type == 'registration_only':
-    st.markdown("---")
-    st.subheader("📋 Registration Analysis")
-
-    reg_file = st.file_uploader(
-        "📝 Upload Registration Data", 
-        type=['xlsx', 'xls', 'csv'], 
-        key="reg_file",
-        help="Upload your team registration data file"
-    )
+        signup_only = st.button("Choose Signup Analysis", key="signup_only", use_container_width=True)
 
-    if reg_file:
-        try:
-            # Load registration data safely
-            df = read_file_safely(reg_file, reg_file.name)
+    with col3:
+        st.markdown("""
+        <div style="border: 2px solid #FF6B6B; border-radius: 10px; padding: 20px; text-align: center; margin: 10px 0;">
+            <h3 style="color: #FF6B6B;">Registration Analysis Only</h3>
+            <p>Analyze individual registrations and get state-wise statistics</p>
+        </div>
+        """, unsafe_allow_html=True)
 
-            # Convert Registration_Date if column exists
-            if "Registration_Date" in df.columns:
-                df["Registration_Date"] = pd.to_datetime(df["Registration_Date"], errors="coerce")
+        registration_only = st.button("Choose Registration Analysis", key="registration_only", use_container_width=True)
 
-            # Remove duplicate teams
-            if "Team Name" in df.columns and "Team Leader Name" in df.columns:
-                df_clean = df.drop_duplicates(subset=["Team Name", "Team Leader Name"])
-            else:
-                df_clean = df.copy()
+    with col2:
+        st.markdown("""
+        <div style="border: 2px solid #4ECDC4; border-radius: 10px; padding: 20px; text-align: center; margin: 10px 0;">
+            <h3 style="color: #4ECDC4;">Complete Team Analysis</h3>
+            <p>Full analysis comparing signups with team registrations with interactive map</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+        team_analysis = st.button("Choose Team Analysis", key="team_analysis", use_container_width=True)
+
+    # Initialize session state
+    if 'analysis_type' not in st.session_state:
+        st.session_state.analysis_type = None
+
+    # Set analysis type based on button clicks
+    if signup_only:
+        st.session_state.analysis_type = 'signup_only'
+    elif team_analysis:
+        st.session_state.analysis_type = 'team_analysis'
+    elif registration_only:
+        st.session_state.analysis_type = 'registration_only'
+
+    # Show file upload and analysis based on selection
+    if st.session_state.analysis_type == 'signup_only':
+        st.markdown("---")
+        st.subheader("📝 Signup Analysis")
 
-            # Find missing PPT if column exists
-            if "PPT Link / File Name" in df_clean.columns:
-                missing_ppt = df_clean[df_clean["PPT Link / File Name"].isna()]
-            else:
-                missing_ppt = pd.DataFrame()
+        signup_file = st.file_uploader(
+            "Upload Signup Excel/CSV", 
+            type=['xlsx', 'xls', 'csv'], 
+            key="signup_file",
+            help="Upload your signup data file containing participant information"
+        )
 
-            # Calculate team size if member columns exist
-            member_cols = [col for col in df_clean.columns if "Member" in col and "Name" in col]
-            if member_cols:
-                df_clean["Team Size"] = df_clean[member_cols].notna().sum(axis=1) + 1
-                avg_team_size = df_clean["Team Size"].mean()
-            else:
-                avg_team_size = 0
-
-            # Sidebar filters
-            st.sidebar.header("🔍 Filters")
-            if "Theme" in df_clean.columns:
-                theme_filter = st.sidebar.multiselect(
-                    "Select Theme(s)", 
-                    options=df_clean["Theme"].dropna().unique()
+        if signup_file:
+            try:
+                if should_stream(signup_file, signup_file.name):
+                    # Large CSV: read, project and count states chunk by chunk, once per upload
+                    outputs, _, _ = streaming_signup_graph(stream_signup_file).run(
+                        {'signup_upload': upload_source(signup_file)}, diagnostics=diagnostics)
+                    df_signup = outputs['signups_compact']
+                    state_stats = outputs['streamed'][1]
+                else:
+                    # Load signup data
+                    with diagnostics.stage("read_file_safely") as record:
+                        df_signup = diagnostics.set_output(record, read_file_safely(signup_file, signup_file.name))
+
+                    # Extract state information
+                    with diagnostics.stage("extract_state", rows_in=len(df_signup)) as record:
+                        df_signup['State'] = diagnostics.set_output(record, extract_state_from_data(df_signup))
+                    state_stats = None
+
+                    # Repetitive columns (State, University Name, ...) as categoricals
+                    with diagnostics.stage("compact_dtypes", rows_in=len(df_signup)) as record:
+                        df_signup = diagnostics.set_output(record, compact_dtypes(df_signup))
+
+                st.success(f"✅ {len(df_signup)} signup records loaded successfully!")
+
+                # Basic statistics
+                st.subheader("📈 Statistics")
+                col1, col2, col3 = st.columns(3)
+
+                with col1:
+                    st.metric("Total Signups", len(df_signup))
+                with col2:
+                    unique_states = df_signup['State'].nunique()
+                    st.metric("States Represented", unique_states)
+                with col3:
+                    top_state = df_signup['State'].mode().iloc[0] if len(df_signup) > 0 else "N/A"
+                    st.metric("Top State", top_state)
+
+                # State-wise statistics with interactive map, keyed by the upload's content instead of the frame
+                signup_hash = stage_key('signup_analysis', [upload_source(signup_file)[0]])
+                with diagnostics.stage("display_state_statistics", rows_in=len(df_signup)):
+                    display_state_statistics(df_signup, show_registration_status=False, state_stats=state_stats,
+                                             dataset_hash=signup_hash)
+
+                # Download complete report
+                st.subheader("💾 Download Results")
+                with diagnostics.stage("create_state_wise_excel", rows_in=len(df_signup)):
+                    excel_data = create_state_wise_excel(df_signup, "All_Participants", export_format)
+                extension, mime = export_file_type(export_format)
+                st.download_button(
+                    label="📥 Download Complete Signup Report",
+                    data=excel_data,
+                    file_name=f"signup_report_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}{extension}",
+                    mime=mime
                 )
-            else:
-                theme_filter = []
 
-            if "Team Leader University Name with address" in df_clean.columns:
-                uni_filter = st.sidebar.multiselect(
-                    "Select University(s)", 
-                    options=df_clean["Team Leader University Name with address"].dropna().unique()
-                )
-            else:
-                uni_filter = []
+            except Exception as e:
+                st.error(f"❌ Error processing files: {str(e)}")
+                st.write("Please ensure your files have the correct format and column names.")
 
-            # Date range filter if available
-            if "Registration_Date" in df_clean.columns:
-                min_date = df_clean["Registration_Date"].min()
-                max_date = df_clean["Registration_Date"].max()
-                date_range = st.sidebar.date_input("Select Date Range", [min_date, max_date])
-            else:
-                date_range = None
-
-            # Apply filters
-            filtered_df = df_clean.copy()
-            if theme_filter and "Theme" in filtered_df.columns:
-                filtered_df = filtered_df[filtered_df["Theme"].isin(theme_filter)]
-            if uni_filter and "Team Leader University Name with address" in filtered_df.columns:
-                filtered_df = filtered_df[filtered_df["Team Leader University Name with address"].isin(uni_filter)]
-            if date_range and len(date_range) == 2 and "Registration_Date" in filtered_df.columns:
-                start_date, end_date = date_range
-                filtered_df = filtered_df[
-                    (filtered_df["Registration_Date"] >= pd.to_datetime(start_date)) &
-                    (filtered_df["Registration_Date"] <= pd.to_datetime(end_date))
-                ]
-
-            # Tabs
-            tab1, tab2, tab3, tab4 = st.tabs(["📄 Data Preview", "📊 Charts", "⚠ Missing PPT", "📥 Downloads"])
-
-            # Tab 1 - Data Preview
-            with tab1:
-                st.subheader("📌 Key Stats")
-                col1, col2, col3, col4 = st.columns(4)
-                col1.metric("Total Teams", len(filtered_df))
-                if "Team Leader University Name with address" in filtered_df.columns:
-                    col2.metric("Unique Universities", filtered_df["Team Leader University Name with address"].nunique())
+        elif signup_file:
+            st.info("📁 Please upload both signup and registration files for complete analysis")
+
+    elif st.session_state.analysis_type == 'registration_only':
+        st.markdown("---")
+        st.subheader("📋 Registration Analysis")
+
+        reg_file = st.file_uploader(
+            "📝 Upload Registration Data", 
+            type=['xlsx', 'xls', 'csv'], 
+            key="reg_file",
+            help="Upload your team registration data file"
+        )
+
+        if reg_file:
+            try:
+                # Cleaned teams and their filter index are built once per upload
+                outputs, stage_keys, _ = registration_analysis_graph().run({'registration_upload': upload_source(reg_file)},
+                                                                          diagnostics=diagnostics)
+                df_clean = outputs['teams']
+                filter_index = outputs['filter_index']
+
+                # Find missing PPT if column exists
+                if "PPT Link / File Name" in df_clean.columns:
+                    missing_ppt = df_clean[df_clean["PPT Link / File Name"].isna()]
                 else:
-                    col2.metric("Unique Universities", "N/A")
-                col3.metric("Avg Team Size", f"{avg_team_size:.2f}")
-                col4.metric("Missing PPT", len(missing_ppt))
-
-                st.subheader("📄 Filtered Data")
-                st.dataframe(filtered_df)
-
-            # Tab 2 - Charts
-            with tab2:
-                if "Theme" in filtered_df.columns and not filtered_df.empty:
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        st.subheader("🎯 Teams per Theme")
-                        theme_counts = filtered_df["Theme"].value_counts()
-                        fig1, ax1 = plt.subplots()
-                        ax1.pie(theme_counts, labels=theme_counts.index, autopct='%1.1f%%', startangle=90)
-                        ax1.axis('equal')
-                        st.pyplot(fig1)
-
-                    with col2:
-                        if "Team Leader University Name with address" in filtered_df.columns:
-                            st.subheader("🏫 Top 5 Universities by Participation")
-                            top_unis = filtered_df["Team Leader University Name with address"].value_counts().head(5)
-                            fig2, ax2 = plt.subplots()
-                            ax2.bar(top_unis.index, top_unis.values)
-                            plt.xticks(rotation=45, ha='right')
-                            st.pyplot(fig2)
-
-                # Line Chart - Registrations Over Time
-                if "Registration_Date" in filtered_df.columns:
-                    st.subheader("📅 Registrations Over Time")
-                    registrations_by_date = filtered_df.groupby(filtered_df["Registration_Date"].dt.date).size()
-                    st.line_chart(registrations_by_date)
-
-                # 📌 NEW: Theme-wise Data with Download
-                if "Theme" in filtered_df.columns:
-                    st.markdown("---")
-                    st.subheader("📂 Theme-wise Data & Downloads")
-                    
-                    theme_groups = filtered_df.groupby("Theme")
-                    for theme_name, theme_df in theme_groups:
-                        st.write(f"### 🎯 {theme_name} — {len(theme_df)} Teams")
-                        theme_excel = BytesIO()
-                        with pd.ExcelWriter(theme_excel, engine='openpyxl') as writer:
-                            theme_df.to_excel(writer, index=False, sheet_name="Theme Data")
-                        theme_excel.seek(0)
-
-                        st.download_button(
-                            label=f"📥 Download '{theme_name}' Data",
-                            data=theme_excel,
-                            file_name=f"{theme_name.replace(' ', '_')}_teams.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                        )
+                    missing_ppt = pd.DataFrame()
 
-            # Tab 3 - Missing PPT
-            with tab3:
-                st.subheader("⚠ Teams Missing PPT")
-                if not missing_ppt.empty:
-                    def highlight_missing(s):
-                        return ['background-color: #ffcccc' if pd.isna(v) else '' for v in s]
-                    st.dataframe(missing_ppt.style.apply(highlight_missing, subset=["PPT Link / File Name"]))
+                # Calculate team size if member columns exist
+                if "Team Size" in df_clean.columns:
+                    avg_team_size = df_clean["Team Size"].mean()
                 else:
-                    st.info("✅ No missing PPTs found.")
+                    avg_team_size = 0
+
+                # Sidebar filters
+                st.sidebar.header("🔍 Filters")
+                if "Theme" in df_clean.columns:
+                    theme_filter = st.sidebar.multiselect(
+                        "Select Theme(s)", 
+                        options=filter_index.options("Theme")
+                    )
+                else:
+                    theme_filter = []
 
-            # Tab 4 - Downloads
-            with tab4:
-                st.subheader("📥 Download Data")
-                st.download_button("Download Cleaned CSV", df_clean.to_csv(index=False), "registrations_cleaned.csv", "text/csv")
-                if not missing_ppt.empty:
-                    st.download_button("Download Missing PPT List", missing_ppt.to_csv(index=False), "teams_missing_ppt.csv", "text/csv")
+                if "Team Leader University Name with address" in df_clean.columns:
+                    uni_filter = st.sidebar.multiselect(
+                        "Select University(s)", 
+                        options=filter_index.options("Team Leader University Name with address")
+                    )
+                else:
+                    uni_filter = []
 
-        except Exception as e:
-            st.error(f"❌ Error processing registration file: {str(e)}")
-    else:
-        st.info("📁 Please upload the registration file to proceed.")
+                # Date range filter if available
+                if "Registration_Date" in df_clean.columns:
+                    min_date, max_date = filter_index.date_bounds()
+                    date_range = st.sidebar.date_input("Select Date Range", [min_date, max_date])
+                else:
+                    date_range = None
 
+                # Apply filters: intersect precomputed row positions, then take only those rows
+                positions = filter_index.select(
+                    {"Theme": theme_filter, "Team Leader University Name with address": uni_filter},
+                    date_range=tuple(pd.to_datetime(d) for d in date_range) if date_range and len(date_range) == 2 else None
+                )
+                filtered_df = df_clean if positions is None else df_clean.iloc[positions]
+                filtered_hash = stage_key('filtered', [stage_keys['teams'], value_key((theme_filter, uni_filter, date_range))])
+
+                # Tabs
+                tab1, tab2, tab3, tab4 = st.tabs(["📄 Data Preview", "📊 Charts", "⚠ Missing PPT", "📥 Downloads"])
+
+                # Tab 1 - Data Preview
+                with tab1:
+                    st.subheader("📌 Key Stats")
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("Total Teams", len(filtered_df))
+                    if "Team Leader University Name with address" in filtered_df.columns:
+                        col2.metric("Unique Universities", filtered_df["Team Leader University Name with address"].nunique())
+                    else:
+                        col2.metric("Unique Universities", "N/A")
+                    col3.metric("Avg Team Size", f"{avg_team_size:.2f}")
+                    col4.metric("Missing PPT", len(missing_ppt))
+
+                    st.subheader("📄 Filtered Data")
+                    paginated_dataframe(filtered_df, "filtered_preview", dataset_hash=filtered_hash)
+
+                # Tab 2 - Charts
+                with tab2:
+                    if "Theme" in filtered_df.columns and not filtered_df.empty:
+                        col1, col2 = st.columns(2)
+
+                        chart_style = st.radio(
+                            "Chart style", CHART_STYLES, horizontal=True, key="chart_style",
+                            help=f"Auto draws charts in the browser when there are more than "
+                                 f"{MAX_STATIC_CATEGORIES} categories"
+                        )
 
+                        with col1:
+                            st.subheader("🎯 Teams per Theme")
+                            theme_counts = filtered_df["Theme"].value_counts()
+                            theme_counts = theme_counts[theme_counts > 0]
+                            if use_native_chart(chart_style, len(theme_counts)):
+                                st.vega_lite_chart(counts_frame(theme_counts, "Theme"), pie_chart_spec("Theme"),
+                                                   use_container_width=True)
+                            else:
+                                st.image(get_chart_png('pie', theme_counts))
+
+                        with col2:
+                            if "Team Leader University Name with address" in filtered_df.columns:
+                                st.subheader("🏫 Top 5 Universities by Participation")
+                                top_unis = filtered_df["Team Leader University Name with address"].value_counts()
+                                top_unis = top_unis[top_unis > 0].head(5)
+                                if use_native_chart(chart_style, len(top_unis)):
+                                    st.bar_chart(counts_frame(top_unis, "University"), x="University", y="Count")
+                                else:
+                                    st.image(get_chart_png('bar', top_unis))
+
+                    # Line Chart - Registrations Over Time
+                    if "Registration_Date" in filtered_df.columns:
+                        st.subheader("📅 Registrations Over Time")
+                        registrations_by_date = filtered_df.groupby(filtered_df["Registration_Date"].dt.date).size()
+                        st.line_chart(registrations_by_date)
+
+                    # 📌 NEW: Theme-wise Data with Download
+                    if "Theme" in filtered_df.columns:
+                        st.markdown("---")
+                        st.subheader("📂 Theme-wise Data & Downloads")
+
+                        theme_sizes = filtered_df["Theme"].value_counts(sort=False).sort_index()
+                        for theme_name, team_count in theme_sizes[theme_sizes > 0].items():
+                            st.write(f"### 🎯 {theme_name} — {team_count} Teams")
+
+                        # One file per theme, all in one ZIP built only on request
+                        export_bundle_button(filtered_hash, lambda: registration_files(filtered_df), "theme_files")
+
+                # Tab 3 - Missing PPT
+                with tab3:
+                    st.subheader("⚠ Teams Missing PPT")
+                    if not missing_ppt.empty:
+                        def highlight_missing(s):
+                            return ['background-color: #ffcccc' if pd.isna(v) else '' for v in s]
+                        paginated_dataframe(
+                            missing_ppt, "missing_ppt_preview", dataset_hash=stage_key('missing_ppt', [stage_keys['teams']]),
+                            style=lambda page: page.style.apply(highlight_missing, subset=["PPT Link / File Name"])
+                        )
+                    else:
+                        release_table_view("missing_ppt_preview")
+                        st.info("✅ No missing PPTs found.")
+
+                # Tab 4 - Downloads
+                with tab4:
+                    st.subheader("📥 Download Data")
+                    st.download_button("Download Cleaned CSV", df_clean.to_csv(index=False), "registrations_cleaned.csv", "text/csv")
+                    if not missing_ppt.empty:
+                        st.download_button("Download Missing PPT List", missing_ppt.to_csv(index=False), "teams_missing_ppt.csv", "text/csv")
+
+            except Exception as e:
+                st.error(f"❌ Error processing registration file: {str(e)}")
+        else:
+            release_table_view("filtered_preview")
+            release_table_view("missing_ppt_preview")
+            st.info("📁 Please upload the registration file to proceed.")
 
-elif st.session_state.analysis_type == 'team_analysis':
-    st.markdown("---")
-    st.subheader("👥 Team Registration Analysis")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        signup_file = st.file_uploader(
-            "📝 Upload Signup Data", 
-            type=['xlsx', 'xls', 'csv'], 
-            key="signup_team_file",
-            help="Upload your signup data file"
-        )
-    
-    with col2:
-        registration_file = st.file_uploader(
-            "👥 Upload Registration Data", 
-            type=['xlsx', 'xls', 'csv'], 
-            key="registration_file",
-            help="Upload your team registration data file"
+
+
+    elif st.session_state.analysis_type == 'team_analysis':
+        st.markdown("---")
+        st.subheader("👥 Team Registration Analysis")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            signup_file = st.file_uploader(
+                "📝 Upload Signup Data", 
+                type=['xlsx', 'xls', 'csv'], 
+                key="signup_team_file",
+                help="Upload your signup data file"
+            )
+
+        with col2:
+            registration_file = st.file_uploader(
+                "👥 Upload Registration Data", 
+                type=['xlsx', 'xls', 'csv'], 
+                key="registration_file",
+                help="Upload your team registration data file"
+            )
+
+        incremental = st.checkbox(
+            "♻️ Incremental matching",
+            key="incremental_matching",
+            help="Keep a team member index on disk so re-uploads during the event only re-match what changed"
         )
-    
-    if signup_file and registration_file:
-        try:
-            # Load data files
-            df_signup = read_file_safely(signup_file, signup_file.name)
-            df_registration = read_file_safely(registration_file, registration_file.name)
-            
-            st.success(f"✅ Files loaded: {len(df_signup)} signups, {len(df_registration)} team registrations")
-            
-            # Process data
-            with st.spinner("Processing team matching..."):
-                # Extract team members from registration data
-                df_team_members = process_registration_data(df_registration)
-                
-                # Match signup users with team members
-                df_result = match_users(df_signup, df_team_members)
-                
-                # Extract state information
-                df_result['State'] = extract_state_from_data(df_result)
-            
-            # Display statistics
-            st.subheader("📈 Statistics")
-            
-            col1, col2, col3, col4 = st.columns(4)
-            
-            total_signups = len(df_result)
-            registered_in_team = len(df_result[df_result['Registered_Team'] == 'Yes'])
-            not_registered = total_signups - registered_in_team
-            unique_teams = df_result[df_result['Registered_Team'] == 'Yes']['Team_Name'].nunique()
-            
-            with col1:
-                st.metric("Total Signups", total_signups)
-            
-            with col2:
-                st.metric("Registered in Teams", registered_in_team, 
-                         delta=f"{(registered_in_team/total_signups*100):.1f}%")
-            
-            with col3:
-                st.metric("Not in Teams", not_registered, 
-                         delta=f"{(not_registered/total_signups*100):.1f}%")
-            
-            with col4:
-                st.metric("Unique Teams", unique_teams)
-            
-            # State-wise statistics
-            display_state_statistics(df_result, show_registration_status=True)
-            
-            # Download section
-            st.subheader("💾 Download Results")
-            
-            # Create downloadable file
-            excel_data = create_downloadable_excel(df_result)
-            
-            st.download_button(
-                label="📥 Download Complete Team Analysis Report",
-                data=excel_data,
-                file_name=f"team_registration_report_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        event_name = ""
+        if incremental:
+            event_name = st.text_input(
+                "🏷️ Event",
+                key="incremental_event",
+                placeholder="Name of the registration file",
+                help="Each event keeps its own index; re-uploads under the same event name reuse it"
             )
-            
-            # Team-wise breakdown
-            if registered_in_team > 0:
-                st.subheader("🏆 Team-wise Breakdown")
-                
-                for team in df_result[df_result['Registered_Team'] == 'Yes']['Team_Name'].unique():
-                    team_data = df_result[df_result['Team_Name'] == team]
-                    with st.expander(f"Team: {team} ({len(team_data)} members)"):
-                        st.dataframe(team_data[['Full Name', 'Email ID', 'Phone Number', 'Team_Role', 'University Name']], 
-                                   use_container_width=True)
-            
-        except Exception as e:
-            st.error(f"❌ Error processing files: {str(e)}")
-            st.write("Please ensure your files have the correct format and column names.")
-    
-    elif signup_file or registration_file:
-        st.info("📁 Please upload both signup and registration files for complete analysis")
-# elif st.session_state.analysis_type == 'registration_only':
-#     st.markdown("---")
-#     st.subheader("📋 Registration Analysis")
-
-#     reg_file = st.file_uploader(
-#         "📝 Upload Registration Data", 
-#         type=['xlsx', 'xls', 'csv'], 
-#         key="reg_file",
-#         help="Upload your team registration data file"
-#     )
-
-#     if reg_file:
-#         try:
-#             # Load registration data safely
-#             df = read_file_safely(reg_file, reg_file.name)
-
-#             # Convert Registration_Date if column exists
-#             if "Registration_Date" in df.columns:
-#                 df["Registration_Date"] = pd.to_datetime(df["Registration_Date"], errors="coerce")
-
-#             # Remove duplicate teams
-#             if "Team Name" in df.columns and "Team Leader Name" in df.columns:
-#                 df_clean = df.drop_duplicates(subset=["Team Name", "Team Leader Name"])
-#             else:
-#                 df_clean = df.copy()
-
-#             # Find missing PPT if column exists
-#             if "PPT Link / File Name" in df_clean.columns:
-#                 missing_ppt = df_clean[df_clean["PPT Link / File Name"].isna()]
-#             else:
-#                 missing_ppt = pd.DataFrame()
-
-#             # Calculate team size if member columns exist
-#             member_cols = [col for col in df_clean.columns if "Member" in col and "Name" in col]
-#             if member_cols:
-#                 df_clean["Team Size"] = df_clean[member_cols].notna().sum(axis=1) + 1
-#                 avg_team_size = df_clean["Team Size"].mean()
-#             else:
-#                 avg_team_size = 0
-
-#             # Sidebar filters
-#             st.sidebar.header("🔍 Filters")
-#             if "Theme" in df_clean.columns:
-#                 theme_filter = st.sidebar.multiselect(
-#                     "Select Theme(s)", 
-#                     options=df_clean["Theme"].dropna().unique()
-#                 )
-#             else:
-#                 theme_filter = []
-
-#             if "Team Leader University Name with address" in df_clean.columns:
-#                 uni_filter = st.sidebar.multiselect(
-#                     "Select University(s)", 
-#                     options=df_clean["Team Leader University Name with address"].dropna().unique()
-#                 )
-#             else:
-#                 uni_filter = []
-
-#             # Date range filter if available
-#             if "Registration_Date" in df_clean.columns:
-#                 min_date = df_clean["Registration_Date"].min()
-#                 max_date = df_clean["Registration_Date"].max()
-#                 date_range = st.sidebar.date_input("Select Date Range", [min_date, max_date])
-#             else:
-#                 date_range = None
-
-#             # Apply filters
-#             filtered_df = df_clean.copy()
-#             if theme_filter and "Theme" in filtered_df.columns:
-#                 filtered_df = filtered_df[filtered_df["Theme"].isin(theme_filter)]
-#             if uni_filter and "Team Leader University Name with address" in filtered_df.columns:
-#                 filtered_df = filtered_df[filtered_df["Team Leader University Name with address"].isin(uni_filter)]
-#             if date_range and len(date_range) == 2 and "Registration_Date" in filtered_df.columns:
-#                 start_date, end_date = date_range
-#                 filtered_df = filtered_df[
-#                     (filtered_df["Registration_Date"] >= pd.to_datetime(start_date)) &
-#                     (filtered_df["Registration_Date"] <= pd.to_datetime(end_date))
-#                 ]
-
-#             # Tabs
-#             tab1, tab2, tab3, tab4 = st.tabs(["📄 Data Preview", "📊 Charts", "⚠ Missing PPT", "📥 Downloads"])
-
-#             # Tab 1 - Data Preview
-#             with tab1:
-#                 st.subheader("📌 Key Stats")
-#                 col1, col2, col3, col4 = st.columns(4)
-#                 col1.metric("Total Teams", len(filtered_df))
-#                 if "Team Leader University Name with address" in filtered_df.columns:
-#                     col2.metric("Unique Universities", filtered_df["Team Leader University Name with address"].nunique())
-#                 else:
-#                     col2.metric("Unique Universities", "N/A")
-#                 col3.metric("Avg Team Size", f"{avg_team_size:.2f}")
-#                 col4.metric("Missing PPT", len(missing_ppt))
-
-#                 st.subheader("📄 Filtered Data")
-#                 st.dataframe(filtered_df)
-
-#             # Tab 2 - Charts
-#             with tab2:
-#                 if "Theme" in filtered_df.columns and not filtered_df.empty:
-#                     col1, col2 = st.columns(2)
-
-#                     with col1:
-#                         st.subheader("🎯 Teams per Theme")
-#                         theme_counts = filtered_df["Theme"].value_counts()
-#                         fig1, ax1 = plt.subplots()
-#                         ax1.pie(theme_counts, labels=theme_counts.index, autopct='%1.1f%%', startangle=90)
-#                         ax1.axis('equal')
-#                         st.pyplot(fig1)
-
-#                     with col2:
-#                         if "Team Leader University Name with address" in filtered_df.columns:
-#                             st.subheader("🏫 Top 5 Universities by Participation")
-#                             top_unis = filtered_df["Team Leader University Name with address"].value_counts().head(5)
-#                             fig2, ax2 = plt.subplots()
-#                             ax2.bar(top_unis.index, top_unis.values)
-#                             plt.xticks(rotation=45, ha='right')
-#                             st.pyplot(fig2)
-
-#                 # Line Chart - Registrations Over Time
-#                 if "Registration_Date" in filtered_df.columns:
-#                     st.subheader("📅 Registrations Over Time")
-#                     registrations_by_date = filtered_df.groupby(filtered_df["Registration_Date"].dt.date).size()
-#                     st.line_chart(registrations_by_date)
-
-#                 # 📌 NEW: Theme-wise Data with Download
-#                 if "Theme" in filtered_df.columns:
-#                     st.markdown("---")
-#                     st.subheader("📂 Theme-wise Data & Downloads")
-                    
-#                     theme_groups = filtered_df.groupby("Theme")
-#                     for theme_name, theme_df in theme_groups:
-#                         st.write(f"### 🎯 {theme_name} — {len(theme_df)} Teams")
-#                         theme_excel = BytesIO()
-#                         with pd.ExcelWriter(theme_excel, engine='openpyxl') as writer:
-#                             theme_df.to_excel(writer, index=False, sheet_name="Theme Data")
-#                         theme_excel.seek(0)
-
-#                         st.download_button(
-#                             label=f"📥 Download '{theme_name}' Data",
-#                             data=theme_excel,
-#                             file_name=f"{theme_name.replace(' ', '_')}_teams.xlsx",
-#                             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-#                         )
-
-#             # Tab 3 - Missing PPT
-#             with tab3:
-#                 st.subheader("⚠ Teams Missing PPT")
-#                 if not missing_ppt.empty:
-#                     def highlight_missing(s):
-#                         return ['background-color: #ffcccc' if pd.isna(v) else '' for v in s]
-#                     st.dataframe(missing_ppt.style.apply(highlight_missing, subset=["PPT Link / File Name"]))
-#                 else:
-#                     st.info("✅ No missing PPTs found.")
-
-#             # Tab 4 - Downloads
-#             with tab4:
-#                 st.subheader("📥 Download Data")
-#                 st.download_button("Download Cleaned CSV", df_clean.to_csv(index=False), "registrations_cleaned.csv", "text/csv")
-#                 if not missing_ppt.empty:
-#                     st.download_button("Download Missing PPT List", missing_ppt.to_csv(index=False), "teams_missing_ppt.csv", "text/csv")
-
-#         except Exception as e:
-#             st.error(f"❌ Error processing registration file: {str(e)}")
-#     else:
-#         st.info("📁 Please upload the registration file to proceed.")
- 
-
-else:
-    st.info("👆 Please choose an analysis type to begin")
+        fuzzy = st.checkbox(
+            "🔍 Fuzzy matching for typos",
+            key="fuzzy_matching",
+            help="Also match signups whose email or phone is a near miss (typos, swapped digits), with a confidence score"
+        )
+
+        if signup_file and registration_file:
+            try:
+                if should_stream(signup_file, signup_file.name):
+                    # Large signup CSV: build the team indexes first, then match chunk by chunk.
+                    # Memoized like the graph below, so reruns don't read the CSV again.
+                    with st.spinner("Processing team matching..."):
+                        outputs, stage_keys, _ = streaming_team_analysis_graph(stream_signup_file).run({
+                            'signup_upload': upload_source(signup_file),
+                            'registration_upload': upload_source(registration_file),
+                            'fuzzy': (value_key(fuzzy), fuzzy),
+                            'export_format': (value_key(export_format), export_format),
+                        }, diagnostics=diagnostics)
+                    df_result = outputs['result']
+                    state_stats = outputs['state_stats']
+                    report_data = outputs['report']
+                    df_registration = outputs['registrations']
+                    dataset_hash = stage_keys['result']
+
+                    st.success(f"✅ Files loaded: {len(df_result)} signups, {len(df_registration)} team registrations")
+                else:
+                    graph = team_analysis_graph(incremental)
+                    sources = {
+                        'signup_upload': upload_source(signup_file),
+                        'registration_upload': upload_source(registration_file),
+                        'fuzzy': (value_key(fuzzy), fuzzy),
+                        'export_format': (value_key(export_format), export_format),
+                    }
+                    if incremental:
+                        index_path = event_index_path(event_name.strip() or os.path.splitext(registration_file.name)[0])
+                        sources['identity_index'] = (value_key(index_path), index_path)
+                    # Each file is normalized as soon as it is read (side by side with CRC_LOAD_WORKERS > 1)
+                    if not load_uploads_with_progress(graph, sources, {'signup_upload': signup_file.name,
+                                                                      'registration_upload': registration_file.name},
+                                                      diagnostics):
+                        raise ValueError("Fix the files marked above and upload them again")
+                    # Memoized stages: a rerun only recomputes stages whose inputs changed
+                    with st.spinner("Processing team matching..."):
+                        outputs, stage_keys, _ = graph.run(sources, diagnostics=diagnostics)
+                    df_result = outputs['result']
+                    state_stats = outputs['state_stats']
+                    report_data = outputs['report']
+                    df_registration = outputs['registrations']
+                    dataset_hash = stage_keys['result']
+
+                    st.success(f"✅ Files loaded: {len(outputs['signups'])} signups, "
+                               f"{len(outputs['registrations'])} team registrations")
+
+                    if incremental:
+                        index_stats = outputs['matched'].attrs['identity_index']
+                        sync_counts, match_stats = index_stats['sync'], index_stats['match']
+                        st.info(f"♻️ Index: {sync_counts['added']} new, {sync_counts['changed']} changed, "
+                                f"{sync_counts['removed']} removed registrations; "
+                                f"re-matched {match_stats['rematched']} of {match_stats['identities']} identities")
+
+                memory_mb = df_result.attrs['memory_mb']
+                st.caption(f"🧮 Result table: {memory_mb['after']:.1f} MB in memory "
+                           f"({memory_mb['before']:.1f} MB before compacting repetitive columns)")
+
+                if fuzzy:
+                    fuzzy_matches = df_result[df_result['Match_Type'] == 'Fuzzy']
+                    if len(fuzzy_matches):
+                        st.info(f"🔍 Fuzzy matching found {len(fuzzy_matches)} more team members "
+                                f"(confidence {fuzzy_matches['Match_Confidence'].min():.2f}–"
+                                f"{fuzzy_matches['Match_Confidence'].max():.2f}); see Match_Confidence in the report")
+                    else:
+                        st.info("🔍 Fuzzy matching found no near-miss matches")
+
+                # Display statistics
+                st.subheader("📈 Statistics")
+
+                col1, col2, col3, col4 = st.columns(4)
+
+                total_signups = len(df_result)
+                registered_in_team = len(df_result[df_result['Registered_Team'] == 'Yes'])
+                not_registered = total_signups - registered_in_team
+                unique_teams = df_result[df_result['Registered_Team'] == 'Yes']['Team_Name'].nunique()
+
+                with col1:
+                    st.metric("Total Signups", total_signups)
+
+                with col2:
+                    st.metric("Registered in Teams", registered_in_team, 
+                             delta=f"{(registered_in_team/total_signups*100):.1f}%")
+
+                with col3:
+                    st.metric("Not in Teams", not_registered, 
+                             delta=f"{(not_registered/total_signups*100):.1f}%")
+
+                with col4:
+                    st.metric("Unique Teams", unique_teams)
+
+                # State-wise statistics
+                with diagnostics.stage("display_state_statistics", rows_in=len(df_result)):
+                    display_state_statistics(df_result, show_registration_status=True, state_stats=state_stats,
+                                             dataset_hash=dataset_hash)
+
+                # Download section
+                st.subheader("💾 Download Results")
+
+                # Built once by the report stage
+                excel_data = report_data
+                extension, mime = export_file_type(export_format, multi_sheet=True)
+
+                st.download_button(
+                    label="📥 Download Complete Team Analysis Report",
+                    data=excel_data,
+                    file_name=f"team_registration_report_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}{extension}",
+                    mime=mime
+                )
+
+                # Team-wise breakdown
+                if registered_in_team > 0:
+                    st.subheader("🏆 Team-wise Breakdown")
+
+                    # Browse teams a page at a time; members are shown for the picked team only
+                    team_columns = ['Full Name', 'Email ID', 'Phone Number', 'Team_Role', 'University Name', 'State',
+                                    'Match_Confidence']
+                    team_browser(df_result[df_result['Registered_Team'] == 'Yes'], "team_browser",
+                                 stage_key('team_members', [dataset_hash]), team_columns)
+                else:
+                    release_team_browser("team_browser")
+
+                # Every per-state, per-team and per-theme file in one ZIP
+                st.subheader("📦 Export Everything")
+                st.write("One file per state, per team and per theme, zipped together.")
+                export_bundle_button(dataset_hash, lambda: team_analysis_files(df_result, df_registration),
+                                     "team_analysis_files")
+
+            except Exception as e:
+                st.error(f"❌ Error processing files: {str(e)}")
+                st.write("Please ensure your files have the correct format and column names.")
+
+        else:
+            release_team_browser("team_browser")
+            if signup_file or registration_file:
+                st.info("📁 Please upload both signup and registration files for complete analysis")
+    # elif st.session_state.analysis_type == 'registration_only':
+    #     st.markdown("---")
+    #     st.subheader("📋 Registration Analysis")
+
+    #     reg_file = st.file_uploader(
+    #         "📝 Upload Registration Data", 
+    #         type=['xlsx', 'xls', 'csv'], 
+    #         key="reg_file",
+    #         help="Upload your team registration data file"
+    #     )
+
+    #     if reg_file:
+    #         try:
+    #             # Load registration data safely
+    #             df = read_file_safely(reg_file, reg_file.name)
+
+    #             # Convert Registration_Date if column exists
+    #             if "Registration_Date" in df.columns:
+    #                 df["Registration_Date"] = pd.to_datetime(df["Registration_Date"], errors="coerce")
+
+    #             # Remove duplicate teams
+    #             if "Team Name" in df.columns and "Team Leader Name" in df.columns:
+    #                 df_clean = df.drop_duplicates(subset=["Team Name", "Team Leader Name"])
+    #             else:
+    #                 df_clean = df.copy()
+
+    #             # Find missing PPT if column exists
+    #             if "PPT Link / File Name" in df_clean.columns:
+    #                 missing_ppt = df_clean[df_clean["PPT Link / File Name"].isna()]
+    #             else:
+    #                 missing_ppt = pd.DataFrame()
+
+    #             # Calculate team size if member columns exist
+    #             member_cols = [col for col in df_clean.columns if "Member" in col and "Name" in col]
+    #             if member_cols:
+    #                 df_clean["Team Size"] = df_clean[member_cols].notna().sum(axis=1) + 1
+    #                 avg_team_size = df_clean["Team Size"].mean()
+    #             else:
+    #                 avg_team_size = 0
+
+    #             # Sidebar filters
+    #             st.sidebar.header("🔍 Filters")
+    #             if "Theme" in df_clean.columns:
+    #                 theme_filter = st.sidebar.multiselect(
+    #                     "Select Theme(s)", 
+    #                     options=df_clean["Theme"].dropna().unique()
+    #                 )
+    #             else:
+    #                 theme_filter = []
+
+    #             if "Team Leader University Name with address" in df_clean.columns:
+    #                 uni_filter = st.sidebar.multiselect(
+    #                     "Select University(s)", 
+    #                     options=df_clean["Team Leader University Name with address"].dropna().unique()
+    #                 )
+    #             else:
+    #                 uni_filter = []
+
+    #             # Date range filter if available
+    #             if "Registration_Date" in df_clean.columns:
+    #                 min_date = df_clean["Registration_Date"].min()
+    #                 max_date = df_clean["Registration_Date"].max()
+    #                 date_range = st.sidebar.date_input("Select Date Range", [min_date, max_date])
+    #             else:
+    #                 date_range = None
+
+    #             # Apply filters
+    #             filtered_df = df_clean.copy()
+    #             if theme_filter and "Theme" in filtered_df.columns:
+    #                 filtered_df = filtered_df[filtered_df["Theme"].isin(theme_filter)]
+    #             if uni_filter and "Team Leader University Name with address" in filtered_df.columns:
+    #                 filtered_df = filtered_df[filtered_df["Team Leader University Name with address"].isin(uni_filter)]
+    #             if date_range and len(date_range) == 2 and "Registration_Date" in filtered_df.columns:
+    #                 start_date, end_date = date_range
+    #                 filtered_df = filtered_df[
+    #                     (filtered_df["Registration_Date"] >= pd.to_datetime(start_date)) &
+    #                     (filtered_df["Registration_Date"] <= pd.to_datetime(end_date))
+    #                 ]
+
+    #             # Tabs
+    #             tab1, tab2, tab3, tab4 = st.tabs(["📄 Data Preview", "📊 Charts", "⚠ Missing PPT", "📥 Downloads"])
+
+    #             # Tab 1 - Data Preview
+    #             with tab1:
+    #                 st.subheader("📌 Key Stats")
+    #                 col1, col2, col3, col4 = st.columns(4)
+    #                 col1.metric("Total Teams", len(filtered_df))
+    #                 if "Team Leader University Name with address" in filtered_df.columns:
+    #                     col2.metric("Unique Universities", filtered_df["Team Leader University Name with address"].nunique())
+    #                 else:
+    #                     col2.metric("Unique Universities", "N/A")
+    #                 col3.metric("Avg Team Size", f"{avg_team_size:.2f}")
+    #                 col4.metric("Missing PPT", len(missing_ppt))
+
+    #                 st.subheader("📄 Filtered Data")
+    #                 st.dataframe(filtered_df)
+
+    #             # Tab 2 - Charts
+    #             with tab2:
+    #                 if "Theme" in filtered_df.columns and not filtered_df.empty:
+    #                     col1, col2 = st.columns(2)
+
+    #                     with col1:
+    #                         st.subheader("🎯 Teams per Theme")
+    #                         theme_counts = filtered_df["Theme"].value_counts()
+    #                         fig1, ax1 = plt.subplots()
+    #                         ax1.pie(theme_counts, labels=theme_counts.index, autopct='%1.1f%%', startangle=90)
+    #                         ax1.axis('equal')
+    #                         st.pyplot(fig1)
+
+    #                     with col2:
+    #                         if "Team Leader University Name with address" in filtered_df.columns:
+    #                             st.subheader("🏫 Top 5 Universities by Participation")
+    #                             top_unis = filtered_df["Team Leader University Name with address"].value_counts().head(5)
+    #                             fig2, ax2 = plt.subplots()
+    #                             ax2.bar(top_unis.index, top_unis.values)
+    #                             plt.xticks(rotation=45, ha='right')
+    #                             st.pyplot(fig2)
+
+    #                 # Line Chart - Registrations Over Time
+    #                 if "Registration_Date" in filtered_df.columns:
+    #                     st.subheader("📅 Registrations Over Time")
+    #                     registrations_by_date = filtered_df.groupby(filtered_df["Registration_Date"].dt.date).size()
+    #                     st.line_chart(registrations_by_date)
+
+    #                 # 📌 NEW: Theme-wise Data with Download
+    #                 if "Theme" in filtered_df.columns:
+    #                     st.markdown("---")
+    #                     st.subheader("📂 Theme-wise Data & Downloads")
+
+    #                     theme_groups = filtered_df.groupby("Theme")
+    #                     for theme_name, theme_df in theme_groups:
+    #                         st.write(f"### 🎯 {theme_name} — {len(theme_df)} Teams")
+    #                         theme_excel = BytesIO()
+    #                         with pd.ExcelWriter(theme_excel, engine='openpyxl') as writer:
+    #                             theme_df.to_excel(writer, index=False, sheet_name="Theme Data")
+    #                         theme_excel.seek(0)
+
+    #                         st.download_button(
+    #                             label=f"📥 Download '{theme_name}' Data",
+    #                             data=theme_excel,
+    #                             file_name=f"{theme_name.replace(' ', '_')}_teams.xlsx",
+    #                             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    #                         )
+
+    #             # Tab 3 - Missing PPT
+    #             with tab3:
+    #                 st.subheader("⚠ Teams Missing PPT")
+    #                 if not missing_ppt.empty:
+    #                     def highlight_missing(s):
+    #                         return ['background-color: #ffcccc' if pd.isna(v) else '' for v in s]
+    #                     st.dataframe(missing_ppt.style.apply(highlight_missing, subset=["PPT Link / File Name"]))
+    #                 else:
+    #                     st.info("✅ No missing PPTs found.")
+
+    #             # Tab 4 - Downloads
+    #             with tab4:
+    #                 st.subheader("📥 Download Data")
+    #                 st.download_button("Download Cleaned CSV", df_clean.to_csv(index=False), "registrations_cleaned.csv", "text/csv")
+    #                 if not missing_ppt.empty:
+    #                     st.download_button("Download Missing PPT List", missing_ppt.to_csv(index=False), "teams_missing_ppt.csv", "text/csv")
+
+    #         except Exception as e:
+    #             st.error(f"❌ Error processing registration file: {str(e)}")
+    #     else:
+    #         st.info("📁 Please upload the registration file to proceed.")
+
+
+    else:
+        st.info("👆 Please choose an analysis type to begin")
+finally:
+    diagnostics.stop_profile()
+
+if show_diagnostics:
+    display_diagnostics(diagnostics)
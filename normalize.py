@@ -0,0 +1,56 @@
+import re
+
+import pandas as pd
+
+# Arrow-backed strings run .str operations in native code instead of a Python loop per cell
+_STRING_DTYPE = 'string[pyarrow]'
+
+
+def clean_phone_number(phone):
+    """Clean and standardize phone numbers"""
+    if pd.isna(phone):
+        return ""
+    phone_str = str(phone).strip()
+    # Remove any non-digit characters
+    phone_clean = re.sub(r'\D', '', phone_str)
+    # Take last 10 digits if longer
+    if len(phone_clean) > 10:
+        phone_clean = phone_clean[-10:]
+    return phone_clean
+
+def clean_email(email):
+    """Clean and standardize email addresses"""
+    if pd.isna(email):
+        return ""
+    return str(email).strip().lower()
+
+def clean_aadhaar(aadhaar):
+    """Clean and standardize Aadhaar last 4 digits"""
+    if pd.isna(aadhaar):
+        return ""
+    return str(aadhaar).strip()
+
+def _as_string_column(series):
+    """Convert any column to arrow-backed strings, keeping missing values as NA"""
+    return pd.Series(series, copy=False).astype(_STRING_DTYPE)
+
+def _to_object_column(series):
+    """Return a normalized column as plain Python strings with NaN replaced by ''"""
+    return series.fillna('').astype(object)
+
+def clean_phone_column(phones):
+    """Clean and standardize a whole column of phone numbers"""
+    phone_clean = _as_string_column(phones)
+    # Remove any non-digit characters and keep the last 10 digits
+    phone_clean = phone_clean.str.replace(r'\D+', '', regex=True).str.slice(-10)
+    return _to_object_column(phone_clean)
+
+def clean_email_column(emails):
+    """Clean and standardize a whole column of email addresses"""
+    email_clean = _as_string_column(emails).str.strip().str.lower()
+    return _to_object_column(email_clean)
+
+def clean_aadhaar_column(aadhaar):
+    """Clean and standardize a whole column of Aadhaar last 4 digits"""
+    aadhaar_clean = _as_string_column(aadhaar).str.strip()
+    return _to_object_column(aadhaar_clean)
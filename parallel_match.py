@@ -0,0 +1,122 @@
+"""Multi-core team matching for very large events.
+
+match_users_parallel gives the same result as pipeline.match_users. It
+spreads the expensive parts over a process pool:
+
+1. Cleaning: signups and team members are split into contiguous slices,
+   and each worker normalizes the email/phone/Aadhaar columns of one slice.
+2. Indexing: for every match key, signup keys and team member keys are
+   hash-partitioned by their cleaned value. Every copy of a key lands in
+   the same partition, in its original order. Each worker builds the key
+   index for one partition, keeping only keys some signup holds.
+3. Merging: the partition indexes are concatenated, which gives the full
+   index for that key. The signups are then matched against the indexes
+   in one vectorized pass, so email still wins over phone, and phone over
+   Aadhaar.
+
+Worker processes only receive the columns they need, never whole frames.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from normalize import clean_aadhaar_column, clean_email_column, clean_phone_column
+from pipeline import MATCH_KEY_PRIORITY, apply_team_matches, build_key_index, match_users
+
+# Default worker count; 1 (or unset) keeps matching in-process. Use 0 for one worker per core.
+MATCH_WORKERS = int(os.environ.get('CRC_MATCH_WORKERS', '1')) or os.cpu_count() or 1
+
+# Below this many signups the pool costs more than it saves, so matching runs in-process
+PARALLEL_MIN_ROWS = 200_000
+
+# Cleaner for each match key, and the raw column it is built from in each table
+KEY_CLEANERS = {
+    'Email_Clean': clean_email_column,
+    'Phone_Clean': clean_phone_column,
+    'Aadhaar_Clean': clean_aadhaar_column,
+}
+SIGNUP_KEY_COLUMNS = {'Email_Clean': 'Email ID', 'Phone_Clean': 'Phone Number', 'Aadhaar_Clean': 'Aadhaar Last 4 Digits'}
+TEAM_KEY_COLUMNS = {'Email_Clean': 'Email', 'Phone_Clean': 'Phone', 'Aadhaar_Clean': 'Aadhaar_Last4'}
+
+
+def resolve_workers(workers=None):
+    """Turn a requested worker count (None = MATCH_WORKERS, 0 = all cores) into a positive int"""
+    if workers is None:
+        workers = MATCH_WORKERS
+    return max(int(workers) or os.cpu_count() or 1, 1)
+
+def partition_ids(keys, partitions):
+    """Assign each key to a partition by a hash that is stable across processes"""
+    # Most keys are unique, so hashing them directly beats factorizing first
+    return pd.util.hash_array(np.asarray(keys, dtype=object), categorize=False) % partitions
+
+def _clean_slice(key_column, raw_values):
+    """Clean one slice of a raw identity column (runs in a worker)"""
+    return KEY_CLEANERS[key_column](raw_values).values
+
+def _index_partition(key_column, signup_keys, team_keys, team_names, roles):
+    """Build the key index for one hash partition (runs in a worker)"""
+    team = pd.DataFrame({key_column: team_keys, 'Team_Name': team_names, 'Role': roles})
+    team = team[team[key_column].isin(signup_keys)]
+    return build_key_index(team, key_column)
+
+def _clean_columns(pool, df, raw_columns, workers):
+    """Clean every identity column of df in parallel slices; returns {key_column: cleaned values}"""
+    bounds = np.linspace(0, len(df), workers + 1).astype(int)
+    futures = {
+        key_column: [
+            pool.submit(_clean_slice, key_column, df[raw_column].iloc[start:end])
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        for key_column, raw_column in raw_columns.items()
+    }
+    return {
+        key_column: np.concatenate([future.result() for future in slices])
+        for key_column, slices in futures.items()
+    }
+
+def _build_indexes(pool, signup_keys, team_keys, team_names, roles, workers):
+    """Build the team key index for every match key from hash partitions"""
+    futures = {}
+    for key_column in MATCH_KEY_PRIORITY:
+        unique_signup_keys = pd.unique(signup_keys[key_column])
+        signup_parts = partition_ids(unique_signup_keys, workers)
+        team_parts = partition_ids(team_keys[key_column], workers)
+        futures[key_column] = [
+            pool.submit(
+                _index_partition, key_column,
+                unique_signup_keys[signup_parts == part],
+                team_keys[key_column][team_parts == part],
+                team_names[team_parts == part],
+                roles[team_parts == part],
+            )
+            for part in range(workers)
+        ]
+    return {key_column: pd.concat([future.result() for future in parts]) for key_column, parts in futures.items()}
+
+def match_users_parallel(df_signup, df_team_members, workers=None, min_rows=PARALLEL_MIN_ROWS):
+    """Match signup users with team members across a process pool, like match_users"""
+    workers = resolve_workers(workers)
+    if workers < 2 or len(df_signup) < min_rows:
+        return match_users(df_signup, df_team_members)
+
+    # Spawned (not forked) workers: forking the threaded Streamlit server can deadlock
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        if all(key_column in df_signup.columns for key_column in SIGNUP_KEY_COLUMNS):
+            # Cleaned already by clean_signup_data
+            signup_keys = {key_column: df_signup[key_column].values for key_column in SIGNUP_KEY_COLUMNS}
+        else:
+            signup_keys = _clean_columns(pool, df_signup, SIGNUP_KEY_COLUMNS, workers)
+        team_keys = _clean_columns(pool, df_team_members, TEAM_KEY_COLUMNS, workers)
+        team_key_indexes = _build_indexes(
+            pool, signup_keys, team_keys,
+            df_team_members['Team_Name'].values, df_team_members['Role'].values, workers,
+        )
+
+    result_df = df_signup.copy(deep=False)
+    for key_column in MATCH_KEY_PRIORITY:
+        result_df[key_column] = signup_keys[key_column]
+    return apply_team_matches(result_df, team_key_indexes)
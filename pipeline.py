@@ -0,0 +1,383 @@
+import hashlib
+import re
+
+import numpy as np
+import pandas as pd
+
+from export import DEFAULT_EXPORT_FORMAT, export_tables
+from normalize import clean_aadhaar_column, clean_email_column, clean_phone_column
+from state_resolver import resolve_states
+
+def get_indian_states():
+    """Return list of all Indian states and union territories"""
+    return [
+        'Andhra Pradesh', 'Arunachal Pradesh', 'Assam', 'Bihar', 'Chhattisgarh', 'Goa', 
+        'Gujarat', 'Haryana', 'Himachal Pradesh', 'Jharkhand', 'Karnataka', 'Kerala', 
+        'Madhya Pradesh', 'Maharashtra', 'Manipur', 'Meghalaya', 'Mizoram', 'Nagaland', 
+        'Odisha', 'Punjab', 'Rajasthan', 'Sikkim', 'Tamil Nadu', 'Telangana', 'Tripura', 
+        'Uttar Pradesh', 'Uttarakhand', 'West Bengal', 'Andaman and Nicobar Islands', 
+        'Chandigarh', 'Dadra and Nagar Haveli and Daman and Diu', 'Delhi', 'Jammu and Kashmir', 
+        'Ladakh', 'Lakshadweep', 'Puducherry'
+    ]
+
+def get_state_coordinates():
+    """Return approximate coordinates for Indian states and union territories"""
+    return {
+        'Andhra Pradesh': [15.9129, 79.7400],
+        'Arunachal Pradesh': [28.2180, 94.7278],
+        'Assam': [26.2006, 92.9376],
+        'Bihar': [25.0961, 85.3131],
+        'Chhattisgarh': [21.2787, 81.8661],
+        'Goa': [15.2993, 74.1240],
+        'Gujarat': [23.0225, 72.5714],
+        'Haryana': [29.0588, 76.0856],
+        'Himachal Pradesh': [31.1048, 77.1734],
+        'Jharkhand': [23.6102, 85.2799],
+        'Karnataka': [15.3173, 75.7139],
+        'Kerala': [10.8505, 76.2711],
+        'Madhya Pradesh': [22.9734, 78.6569],
+        'Maharashtra': [19.7515, 75.7139],
+        'Manipur': [24.6637, 93.9063],
+        'Meghalaya': [25.4670, 91.3662],
+        'Mizoram': [23.1645, 92.9376],
+        'Nagaland': [26.1584, 94.5624],
+        'Odisha': [20.9517, 85.0985],
+        'Punjab': [31.1471, 75.3412],
+        'Rajasthan': [27.0238, 74.2179],
+        'Sikkim': [27.5330, 88.5122],
+        'Tamil Nadu': [11.1271, 78.6569],
+        'Telangana': [18.1124, 79.0193],
+        'Tripura': [23.9408, 91.9882],
+        'Uttar Pradesh': [26.8467, 80.9462],
+        'Uttarakhand': [30.0668, 79.0193],
+        'West Bengal': [22.9868, 87.8550],
+        'Andaman and Nicobar Islands': [11.7401, 92.6586],
+        'Chandigarh': [30.7333, 76.7794],
+        'Dadra and Nagar Haveli and Daman and Diu': [20.1809, 73.0169],
+        'Delhi': [28.7041, 77.1025],
+        'Jammu and Kashmir': [34.0837, 74.7973],
+        'Ladakh': [34.2996, 78.2932],
+        'Lakshadweep': [10.5667, 72.6417],
+        'Puducherry': [11.9416, 79.8083]
+    }
+
+def compute_state_stats(df):
+    """Count total, registered and individual participants per state in a single groupby"""
+    if 'Registered_Team' in df.columns:
+        registered = df['Registered_Team'] == 'Yes'
+    else:
+        registered = pd.Series(False, index=df.index)
+
+    state_stats = registered.groupby(df['State'], sort=False, observed=True).agg(['size', 'sum'])
+    state_stats.columns = ['Total_Participants', 'Registered_in_Teams']
+    # Plain state names, also when State is categorical
+    state_stats.index = state_stats.index.astype(object)
+    state_stats['Registered_in_Teams'] = state_stats['Registered_in_Teams'].astype(int)
+    state_stats['Not_in_Teams'] = state_stats['Total_Participants'] - state_stats['Registered_in_Teams']
+    state_stats.index.name = 'State'
+    return state_stats.sort_values('Total_Participants', ascending=False, kind='stable')
+
+def build_state_statistics_table(state_stats, show_registration_status=False):
+    """Expand per-state counts to every Indian state plus any other values found in the data"""
+    all_states = get_indian_states()
+    other_states = [state for state in state_stats.index if state not in all_states]
+
+    state_stats_df = state_stats.reindex(all_states + other_states, fill_value=0)
+    if not show_registration_status:
+        state_stats_df['Registered_in_Teams'] = 0
+        state_stats_df['Not_in_Teams'] = state_stats_df['Total_Participants']
+
+    state_stats_df = state_stats_df.rename_axis('State').reset_index()
+    return state_stats_df.sort_values('Total_Participants', ascending=False, kind='stable')
+
+# Columns that may hold a participant's state, in order of preference
+POSSIBLE_STATE_COLUMNS = ['State', 'state', 'State Name', 'state_name', 'State/UT', 'Location', 'Address']
+
+# Free-text columns of those, searched for a state name, abbreviation or city
+ADDRESS_COLUMNS = ['Location', 'Address']
+
+# Signup columns kept when large CSVs are streamed in chunks
+SIGNUP_COLUMNS = ['Full Name', 'Email ID', 'Phone Number', 'Aadhaar Last 4 Digits', 'University Name'] + POSSIBLE_STATE_COLUMNS
+
+def extract_state_from_data(df):
+    """Extract state information from dataframe, checking multiple possible columns
+
+    State columns are mapped to canonical names ("TN" -> "Tamil Nadu"); values
+    that name no known state are kept as they are. Rows without a state are
+    looked up in the Location/Address text, and are 'Unknown' if none is found.
+    """
+    states = None
+    for col in POSSIBLE_STATE_COLUMNS:
+        if col not in df.columns:
+            continue
+        if col in ADDRESS_COLUMNS:
+            # Free text: only the state found in it counts
+            found = resolve_states(df[col])
+        else:
+            found = resolve_states(df[col]).fillna(df[col].astype(object))
+        states = found if states is None else states.fillna(found)
+        if not states.hasnans:
+            break
+
+    if states is None:
+        # If no state column found, return 'Unknown' for all rows
+        return pd.Series(['Unknown'] * len(df), index=df.index)
+    return states.fillna('Unknown')
+
+def create_state_wise_excel(df, state_name, export_format=DEFAULT_EXPORT_FORMAT):
+    """Create downloadable Excel (or CSV/Parquet) file for a specific state"""
+    return export_tables({f'{state_name}_Participants': df}, export_format)
+
+# Repetitive text columns stored as categoricals once a frame is final
+COMPACT_COLUMNS = [
+    'State', 'Registered_Team', 'Team_Name', 'Team_Role', 'Role', 'Theme',
+    'Team Leader University Name with address', 'University Name', 'Gender',
+]
+
+# Columns with more distinct values than this share of rows stay as strings
+COMPACT_MAX_UNIQUE_RATIO = 0.5
+
+def compact_dtypes(df, columns=COMPACT_COLUMNS):
+    """Return df with repetitive text columns converted to categoricals
+
+    The frame is copied shallowly, so the other columns are shared with df.
+    Registered_Team always becomes a No/Yes categorical. Equality checks
+    such as == 'Yes' work the same on categoricals.
+    """
+    compact = df.copy(deep=False)
+    for column in columns:
+        if column not in compact.columns or compact[column].dtype != object:
+            continue
+        values = compact[column]
+        if column == 'Registered_Team':
+            compact[column] = pd.Categorical(values, categories=['No', 'Yes'])
+        elif len(values) and values.nunique(dropna=True) <= len(values) * COMPACT_MAX_UNIQUE_RATIO:
+            compact[column] = values.astype('category')
+    return compact
+
+def memory_usage_mb(df):
+    """Deep memory use of a DataFrame in MB"""
+    return float(df.memory_usage(index=True, deep=True).sum()) / 2**20
+
+def prepare_registrations(df):
+    """Clean a registration sheet for the registration analysis: dates, one row per team, team size"""
+    df = compact_dtypes(df)
+
+    # Convert Registration_Date if column exists
+    if "Registration_Date" in df.columns:
+        df["Registration_Date"] = pd.to_datetime(df["Registration_Date"], errors="coerce")
+
+    # Remove duplicate teams
+    if "Team Name" in df.columns and "Team Leader Name" in df.columns:
+        df_clean = df.drop_duplicates(subset=["Team Name", "Team Leader Name"])
+    else:
+        df_clean = df.copy(deep=False)
+
+    # Calculate team size if member columns exist
+    member_cols = [col for col in df_clean.columns if "Member" in col and "Name" in col]
+    if member_cols:
+        df_clean["Team Size"] = df_clean[member_cols].notna().sum(axis=1) + 1
+    return df_clean
+
+def dataframe_fingerprint(df):
+    """Return a hash of a DataFrame's columns and values, used as a cache key"""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    digest.update(repr(list(df.columns)).encode())
+    return digest.hexdigest()
+
+# Matches "Member 1 Name", "Member 12 Name", ... in registration sheets
+MEMBER_NAME_PATTERN = re.compile(r'^Member (\d+) Name$')
+
+# Columns of the long team members table built from a registration sheet
+TEAM_MEMBER_COLUMNS = ['Name', 'Email', 'Phone', 'Aadhaar_Last4', 'Team_Name', 'Role']
+
+def get_member_numbers(columns):
+    """Return the sorted member slot numbers present in a registration sheet"""
+    numbers = set()
+    for col in columns:
+        match = MEMBER_NAME_PATTERN.match(str(col))
+        if match:
+            numbers.add(int(match.group(1)))
+    return sorted(numbers)
+
+def _column_or_default(df, column, default):
+    """Return a column, or a constant column if the sheet doesn't have it"""
+    if column in df.columns:
+        return df[column].reset_index(drop=True)
+    return pd.Series([default] * len(df), dtype=object)
+
+def _member_slot_frame(df_reg, prefix, slot, default_role):
+    """Project one leader/member column group into the long team members layout"""
+    names = _column_or_default(df_reg, f'{prefix} Name', None)
+    if default_role == 'Team Leader':
+        role = pd.Series(['Team Leader'] * len(df_reg), dtype=object)
+    else:
+        role = _column_or_default(df_reg, f'{prefix} Role', default_role)
+
+    slot_df = pd.DataFrame({
+        'Name': names,
+        'Email': _column_or_default(df_reg, f'{prefix} Email', None),
+        'Phone': _column_or_default(df_reg, f'{prefix} Phone Number', None),
+        'Aadhaar_Last4': _column_or_default(df_reg, f'{prefix} Aadhaar Last 4 Digits', None),
+        'Team_Name': _column_or_default(df_reg, 'Team Name', ''),
+        'Role': role,
+        '_row': np.arange(len(df_reg)),
+        '_slot': slot,
+    })
+
+    # Team leaders only need a name; members also need a non-blank one
+    present = names.notna()
+    if default_role != 'Team Leader':
+        present &= names.astype(str).str.strip() != ''
+    return slot_df[present.values]
+
+def process_registration_data(df_reg, keep_positions=False):
+    """Process registration data to extract all team members
+
+    With keep_positions, each member also carries Sheet_Row (its row's
+    position in df_reg) and Member_Slot (0 for the leader, N for Member N).
+    """
+    columns = TEAM_MEMBER_COLUMNS + (['Sheet_Row', 'Member_Slot'] if keep_positions else [])
+
+    slot_frames = [_member_slot_frame(df_reg, 'Team Leader', 0, 'Team Leader')]
+    for i in get_member_numbers(df_reg.columns):
+        slot_frames.append(_member_slot_frame(df_reg, f'Member {i}', i, 'Member'))
+
+    members_df = pd.concat(slot_frames, ignore_index=True)
+    if members_df.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Keep each team's leader followed by its members, in sheet order
+    members_df = members_df.sort_values(['_row', '_slot'], kind='stable', ignore_index=True)
+
+    members_df['Email'] = clean_email_column(members_df['Email'])
+    members_df['Phone'] = clean_phone_column(members_df['Phone'])
+    members_df['Aadhaar_Last4'] = clean_aadhaar_column(members_df['Aadhaar_Last4'])
+    members_df = members_df.rename(columns={'_row': 'Sheet_Row', '_slot': 'Member_Slot'})
+    return members_df[columns]
+
+# Cleaned identity columns in the order they are tried when matching
+MATCH_KEY_PRIORITY = ['Email_Clean', 'Phone_Clean', 'Aadhaar_Clean']
+
+def build_key_index(df_team_clean, key_column):
+    """Index team members by a cleaned key, keeping the first member for each key"""
+    keyed = df_team_clean[df_team_clean[key_column] != '']
+    keyed = keyed.drop_duplicates(subset=key_column, keep='first')
+    return keyed.set_index(key_column)[['Team_Name', 'Role']]
+
+def build_team_key_indexes(df_team_members):
+    """Clean team member identities and index them by every match key"""
+    df_team_clean = df_team_members.copy()
+    df_team_clean['Email_Clean'] = clean_email_column(df_team_clean['Email'])
+    df_team_clean['Phone_Clean'] = clean_phone_column(df_team_clean['Phone'])
+    df_team_clean['Aadhaar_Clean'] = clean_aadhaar_column(df_team_clean['Aadhaar_Last4'])
+    return {key_column: build_key_index(df_team_clean, key_column) for key_column in MATCH_KEY_PRIORITY}
+
+def clean_signup_data(df_signup):
+    """Return a copy of the signup data with cleaned email, phone and Aadhaar columns
+
+    Signups cleaned already (e.g. as soon as they were loaded) are returned as they are.
+    """
+    # Shallow: only new columns are added, so the signup columns can be shared
+    df_signup_clean = df_signup.copy(deep=False)
+    if all(column in df_signup_clean.columns for column in MATCH_KEY_PRIORITY):
+        return df_signup_clean
+    df_signup_clean['Email_Clean'] = clean_email_column(df_signup_clean['Email ID'])
+    df_signup_clean['Phone_Clean'] = clean_phone_column(df_signup_clean['Phone Number'])
+    df_signup_clean['Aadhaar_Clean'] = clean_aadhaar_column(df_signup_clean['Aadhaar Last 4 Digits'])
+    return df_signup_clean
+
+def apply_team_matches(result_df, team_key_indexes):
+    """Fill Registered_Team, Team_Name and Team_Role on cleaned signups from team key indexes"""
+    result_df['Registered_Team'] = 'No'
+    result_df['Team_Name'] = ''
+    result_df['Team_Role'] = ''
+
+    # Match in priority order: email first (most reliable), then phone, then Aadhaar.
+    # Each key is looked up in a hash index built once, instead of scanning the
+    # team members table for every signup.
+    unmatched = pd.Series(True, index=result_df.index)
+    for key_column in MATCH_KEY_PRIORITY:
+        key_index = team_key_indexes[key_column]
+        hits = unmatched & result_df[key_column].isin(key_index.index)
+        if not hits.any():
+            continue
+
+        matched_keys = result_df.loc[hits, key_column]
+        result_df.loc[hits, 'Registered_Team'] = 'Yes'
+        result_df.loc[hits, 'Team_Name'] = matched_keys.map(key_index['Team_Name']).values
+        result_df.loc[hits, 'Team_Role'] = matched_keys.map(key_index['Role']).values
+        unmatched &= ~hits
+
+    return result_df
+
+def match_users(df_signup, df_team_members):
+    """Match signup users with team members"""
+    result_df = clean_signup_data(df_signup)
+    return apply_team_matches(result_df, build_team_key_indexes(df_team_members))
+
+def stream_signups(chunks, df_team_members=None):
+    """Match and count signups chunk by chunk, returning (result_df, state_stats)
+
+    Each chunk is cleaned, matched against team indexes built once and
+    added to the running state counts before the next chunk is read, so
+    only the projected result rows are kept in memory.
+    """
+    team_key_indexes = build_team_key_indexes(df_team_members) if df_team_members is not None else None
+    result_chunks = []
+    state_stats = None
+
+    for chunk in chunks:
+        if team_key_indexes is not None:
+            chunk = apply_team_matches(clean_signup_data(chunk), team_key_indexes)
+        chunk['State'] = extract_state_from_data(chunk)
+
+        chunk_stats = compute_state_stats(chunk)
+        state_stats = chunk_stats if state_stats is None else state_stats.add(chunk_stats, fill_value=0)
+        result_chunks.append(chunk)
+
+    if not result_chunks:
+        return pd.DataFrame(), compute_state_stats(pd.DataFrame({'State': []}))
+
+    result_df = pd.concat(result_chunks, ignore_index=True)
+    state_stats = state_stats.astype(int).sort_values('Total_Participants', ascending=False, kind='stable')
+    return result_df, state_stats
+
+def team_summary(df_members):
+    """One row per team of matched members: Team_Name, Members, Leader, University Name, States"""
+    grouped = df_members.groupby('Team_Name', observed=True, sort=True)
+    summary = grouped.size().rename('Members').to_frame()
+    if 'Full Name' in df_members.columns:
+        leaders = df_members.loc[df_members['Team_Role'] == 'Team Leader', ['Team_Name', 'Full Name']]
+        leaders = leaders.drop_duplicates('Team_Name').set_index('Team_Name')['Full Name'].astype(object)
+        summary['Leader'] = leaders.reindex(summary.index).fillna('')
+    if 'University Name' in df_members.columns:
+        summary['University Name'] = grouped['University Name'].first()
+    if 'State' in df_members.columns:
+        summary['States'] = grouped['State'].nunique()
+    return summary.rename_axis('Team_Name').reset_index()
+
+def create_downloadable_excel(df_result, export_format=DEFAULT_EXPORT_FORMAT):
+    """Create downloadable Excel file (or a ZIP of CSV/Parquet files)"""
+    # Main sheet with all data
+    sheets = {'Registration Status': df_result}
+    
+    # Summary sheet
+    registered_count = len(df_result[df_result['Registered_Team'] == 'Yes'])
+    not_registered_count = len(df_result[df_result['Registered_Team'] == 'No'])
+    
+    sheets['Summary'] = pd.DataFrame({
+        'Status': ['Registered in Team', 'Not Registered in Team', 'Total'],
+        'Count': [registered_count, not_registered_count, len(df_result)]
+    })
+    
+    # State-wise breakdown
+    if 'State' in df_result.columns:
+        state_summary = build_state_statistics_table(compute_state_stats(df_result), show_registration_status=True)
+        sheets['State Summary'] = state_summary[state_summary['Total_Participants'] > 0]
+    
+    # Team-wise breakdown
+    if registered_count > 0:
+        sheets['Team Summary'] = df_result[df_result['Registered_Team'] == 'Yes'].groupby('Team_Name', observed=True).size().reset_index(name='Members_Count')
+    
+    return export_tables(sheets, export_format)
@@ -0,0 +1,350 @@
+"""Memoized pipeline stages.
+
+A StageGraph is a small DAG of pure functions. Each stage's cache key is
+a hash of its name and the keys of its inputs. Keys chain through the
+graph, so no DataFrame ever has to be hashed: uploads are keyed by their
+content hash and options by their value. A Streamlit rerun with the same
+uploads and options hits the cache at every stage. Changing one option
+only recomputes the stages downstream of it.
+
+Cached outputs are shared between reruns, so callers must not modify
+them in place.
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from filter_index import FilterIndex
+from fuzzy_match import fuzzy_match_users
+from identity_index import IdentityIndex
+from ingest import file_content_hash, read_file_safely, read_files_concurrently
+from instrumentation import Diagnostics, row_count
+from parallel_match import match_users_parallel
+from pipeline import (
+    clean_signup_data, compact_dtypes, compute_state_stats, create_downloadable_excel, dataframe_fingerprint,
+    extract_state_from_data, memory_usage_mb, prepare_registrations, process_registration_data,
+)
+
+# Sidebar filters of the registration analysis page
+REGISTRATION_FILTER_COLUMNS = ['Theme', 'Team Leader University Name with address']
+REGISTRATION_DATE_COLUMN = 'Registration_Date'
+
+# Stage outputs kept in memory across reruns (MB, shared by all sessions); override with CRC_STAGE_CACHE_MB
+DEFAULT_STAGE_CACHE_BYTES = int(os.environ.get('CRC_STAGE_CACHE_MB', 512)) * 1024 * 1024
+
+
+class Stage:
+    """One step of a StageGraph: func is called with the outputs of inputs, in order"""
+
+    def __init__(self, name, func, inputs, memoize=True):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        # Stages with side effects (e.g. the on-disk identity index) run every time
+        self.memoize = memoize
+
+
+def output_size_bytes(output):
+    """Approximate memory held by a stage output: frames deep, containers and plain objects by their parts
+
+    Outputs that share columns with each other are counted once each, so
+    the total errs on the high side.
+    """
+    if isinstance(output, pd.DataFrame):
+        return int(memory_usage_mb(output) * 2**20)
+    if isinstance(output, (pd.Series, pd.Index)):
+        return int(output.memory_usage(deep=True))
+    if isinstance(output, np.ndarray):
+        return output.nbytes
+    if isinstance(output, (list, tuple, set)):
+        return sys.getsizeof(output) + sum(output_size_bytes(item) for item in output)
+    if isinstance(output, dict):
+        return sys.getsizeof(output) + sum(output_size_bytes(key) + output_size_bytes(value)
+                                           for key, value in output.items())
+    if hasattr(output, '__dict__') and not isinstance(output, type):
+        return output_size_bytes(vars(output))
+    return sys.getsizeof(output)
+
+
+class StageCache:
+    """LRU cache of stage outputs keyed by stage key, within a memory budget like IngestCache"""
+
+    def __init__(self, max_bytes=DEFAULT_STAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (True, output) for a cached key, or (False, None)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return True, self._entries[key]
+        return False, None
+
+    def put(self, key, output):
+        size = output_size_bytes(output)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            self._entries[key] = output
+            self._sizes[key] = size
+            self._total_bytes += size
+
+            # Evict least recently used outputs until we fit the budget again
+            while self._total_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(old_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+
+_cache = StageCache()
+
+def get_stage_cache():
+    """Return the shared stage cache"""
+    return _cache
+
+def stage_key(name, input_keys):
+    """Cache key of a stage from its name and the keys of its inputs"""
+    return hashlib.sha256('\x1f'.join([name, *input_keys]).encode()).hexdigest()
+
+def value_key(value):
+    """Cache key of a plain option value (str, bool, number, None)"""
+    return f'value:{value!r}'
+
+
+class StageGraph:
+    """Stages listed in dependency order, run with memoized outputs"""
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+
+    def run(self, sources, cache=None, diagnostics=None):
+        """Run every stage; sources maps input names to (key, value)
+
+        Returns (outputs, keys, report): outputs and keys by stage or source
+        name, and one report row per stage with its cache status, time, row
+        counts and peak memory. The rows are also added to diagnostics, if given.
+        """
+        cache = cache or _cache
+        diagnostics = diagnostics or Diagnostics()
+        keys = {name: key for name, (key, _) in sources.items()}
+        outputs = {name: value for name, (_, value) in sources.items()}
+        report = []
+
+        for stage in self.stages:
+            missing = [name for name in stage.inputs if name not in outputs]
+            if missing:
+                raise KeyError(f"Stage '{stage.name}' needs {', '.join(missing)}")
+
+            key = stage_key(stage.name, [keys[name] for name in stage.inputs])
+            hit, output = cache.get(key) if stage.memoize else (False, None)
+            rows_in = [row_count(outputs[name]) for name in stage.inputs]
+            rows_in = [rows for rows in rows_in if rows is not None]
+            with diagnostics.stage(stage.name, rows_in=sum(rows_in) if rows_in else None,
+                                   cache='hit' if hit else ('miss' if stage.memoize else 'not cached')) as record:
+                if not hit:
+                    output = stage.func(*[outputs[name] for name in stage.inputs])
+                    if stage.memoize:
+                        cache.put(key, output)
+                    elif isinstance(output, pd.DataFrame):
+                        # Downstream stages can still hit the cache if the result didn't change
+                        key = 'content:' + dataframe_fingerprint(output)
+                    else:
+                        key = f'run:{time.time_ns()}'
+                diagnostics.set_output(record, output)
+
+            outputs[stage.name] = output
+            keys[stage.name] = key
+            report.append(record)
+
+        return outputs, keys, report
+
+
+def upload_source(file):
+    """Source entry for an uploaded file, keyed by its name and content hash"""
+    return f'file:{file.name}:{file_content_hash(file)}', file
+
+def _read_upload(file):
+    return read_file_safely(file, file.name)
+
+def _match_with_index(df_signup, df_registration, index_path):
+    """Incremental matching through the event's on-disk identity index"""
+    with IdentityIndex(index_path) as index, index.exclusive():
+        sync_counts = index.sync_registrations(df_registration)
+        df_result = index.match_users(df_signup)
+        # Kept on the frame so the page can report what the index did
+        df_result.attrs['identity_index'] = {'sync': sync_counts, 'match': index.last_match_stats}
+    return df_result
+
+def _apply_fuzzy(df_result, df_team_members, fuzzy):
+    if not fuzzy:
+        return df_result
+    # Only the match columns are rewritten; the rest stays shared with the cached match result
+    df_result = df_result.copy(deep=False)
+    for column in ['Registered_Team', 'Team_Name', 'Team_Role']:
+        df_result[column] = df_result[column].copy()
+    return fuzzy_match_users(df_result, df_team_members)
+
+def finalize_result(df_result):
+    """Add the State column and compact repetitive columns; memory before/after goes in attrs['memory_mb']"""
+    df_result = df_result.copy(deep=False)
+    df_result['State'] = extract_state_from_data(df_result)
+    before = memory_usage_mb(df_result)
+    df_result = compact_dtypes(df_result)
+    df_result.attrs['memory_mb'] = {'before': before, 'after': memory_usage_mb(df_result)}
+    return df_result
+
+def team_analysis_graph(incremental=False):
+    """Stages of the team analysis page, from the two uploads to the downloadable report
+
+    Incremental matching also needs an 'identity_index' source: the event's index file.
+    """
+    if incremental:
+        match_stage = Stage('matched', _match_with_index, ['signups_clean', 'registrations', 'identity_index'],
+                            memoize=False)
+    else:
+        match_stage = Stage('matched', match_users_parallel, ['signups_clean', 'team_members'])
+
+    return StageGraph([
+        Stage('signups', _read_upload, ['signup_upload']),
+        Stage('signups_clean', clean_signup_data, ['signups']),
+        Stage('registrations', _read_upload, ['registration_upload']),
+        Stage('team_members', process_registration_data, ['registrations']),
+        match_stage,
+        Stage('fuzzy_matched', _apply_fuzzy, ['matched', 'team_members', 'fuzzy']),
+        Stage('result', finalize_result, ['fuzzy_matched']),
+        Stage('state_stats', compute_state_stats, ['result']),
+        Stage('report', create_downloadable_excel, ['result', 'export_format']),
+    ])
+
+def _finalize_streamed(streamed, df_team_members, fuzzy):
+    """Fuzzy-match (if asked) and finalize signups matched chunk by chunk"""
+    return finalize_result(_apply_fuzzy(streamed[0], df_team_members, fuzzy))
+
+def streaming_team_analysis_graph(stream):
+    """Stages of the team analysis page for a signup CSV too large to read at once
+
+    stream(signup_file, df_team_members) reads and matches the CSV chunk by
+    chunk and returns (signups, state_stats); the page passes one that shows
+    progress. Like team_analysis_graph, a rerun with the same uploads and
+    options reuses every stage.
+    """
+    return StageGraph([
+        Stage('registrations', _read_upload, ['registration_upload']),
+        Stage('team_members', process_registration_data, ['registrations']),
+        Stage('streamed', stream, ['signup_upload', 'team_members']),
+        Stage('result', _finalize_streamed, ['streamed', 'team_members', 'fuzzy']),
+        Stage('state_stats', compute_state_stats, ['result']),
+        Stage('report', create_downloadable_excel, ['result', 'export_format']),
+    ])
+
+def _compact_streamed(streamed):
+    return compact_dtypes(streamed[0])
+
+def streaming_signup_graph(stream):
+    """Stages of the signup analysis page for a CSV too large to read at once
+
+    stream(signup_file) returns (signups, state_stats), as for
+    streaming_team_analysis_graph.
+    """
+    return StageGraph([
+        Stage('streamed', stream, ['signup_upload']),
+        Stage('signups_compact', _compact_streamed, ['streamed']),
+    ])
+
+# Per upload of the team analysis page: its reading stage, then the stages that normalize it
+TEAM_UPLOAD_CHAINS = {
+    'signup_upload': ['signups', 'signups_clean'],
+    'registration_upload': ['registrations', 'team_members'],
+}
+
+def preload_uploads(graph, sources, chains, cache=None, diagnostics=None, on_update=None):
+    """Read uploads and normalize each one as soon as it is read, caching the outputs for graph.run
+
+    chains maps an upload source to its reading stage followed by stages
+    that only need that upload (e.g. cleaning its identity columns).
+    Chains whose stages are all cached are skipped. on_update(source,
+    status, detail), if given, is called as each upload moves on: status
+    is 'reading', 'normalizing', 'done' or 'failed' (detail is then the
+    exception). Returns {source: exception} for the uploads that failed;
+    graph.run would raise their errors again.
+    """
+    cache = cache or _cache
+    diagnostics = diagnostics or Diagnostics(enabled=False)
+    on_update = on_update or (lambda source, status, detail=None: None)
+    stages = {stage.name: stage for stage in graph.stages}
+
+    keys = {name: key for name, (key, _) in sources.items()}
+    to_read = {}
+    to_normalize = {}
+    for source, (read_stage, *normalize_stages) in chains.items():
+        for name in (read_stage, *normalize_stages):
+            keys[name] = stage_key(name, [keys[input_name] for input_name in stages[name].inputs])
+        if not cache.get(keys[read_stage])[0]:
+            to_read[source] = sources[source][1]
+        elif not all(cache.get(keys[name])[0] for name in normalize_stages):
+            to_normalize[source] = cache.get(keys[read_stage])[1]
+        else:
+            on_update(source, 'done', None)
+
+    normalize_seconds = []
+
+    def normalize(source, df):
+        read_stage, *normalize_stages = chains[source]
+        cache.put(keys[read_stage], df)
+        outputs = {source: sources[source][1], read_stage: df}
+        on_update(source, 'normalizing', None)
+        for name in normalize_stages:
+            with diagnostics.stage(name, rows_in=row_count(df), cache='preload') as record:
+                outputs[name] = stages[name].func(*[outputs[input_name] for input_name in stages[name].inputs])
+                diagnostics.set_output(record, outputs[name])
+            normalize_seconds.append(record['Seconds'])
+            cache.put(keys[name], outputs[name])
+        on_update(source, 'done', None)
+        return outputs[read_stage]
+
+    for source in to_read:
+        on_update(source, 'reading', None)
+    errors = {}
+    with diagnostics.stage("read_uploads", cache='preload') as record:
+        results = read_files_concurrently(to_read, on_ready=normalize)
+        record['Rows out'] = sum(len(df) for df in results.values() if isinstance(df, pd.DataFrame))
+    # Uploads are normalized in between reads, but those stages have records of their own:
+    # leave their time out of the read, so the diagnostics total counts it once
+    record['Seconds'] = round(max(record['Seconds'] - sum(normalize_seconds), 0), 4)
+    for source, df in to_normalize.items():
+        results[source] = normalize(source, df)
+    for source, result in results.items():
+        if isinstance(result, Exception):
+            errors[source] = result
+            on_update(source, 'failed', result)
+    return errors
+
+def _registration_filter_index(df_teams):
+    return FilterIndex(df_teams, REGISTRATION_FILTER_COLUMNS, REGISTRATION_DATE_COLUMN)
+
+def registration_analysis_graph():
+    """Stages of the registration analysis page: the cleaned teams and their filter index"""
+    return StageGraph([
+        Stage('registrations', _read_upload, ['registration_upload']),
+        Stage('teams', prepare_registrations, ['registrations']),
+        Stage('filter_index', _registration_filter_index, ['teams']),
+    ])
@@ -0,0 +1,209 @@
+"""Resolve Indian states and union territories from free text.
+
+Addresses and locations mention a state in many ways: its name ("Tamil
+Nadu", "Tamilnadu"), an old or informal name ("Orissa", "Pondicherry"),
+an abbreviation ("TN", "J&K") or only a city ("Chennai"). The aliases are
+built once into a regular expression shaped like a trie per kind
+(aliases sharing a prefix share a branch), and searched over all texts
+at once with pyarrow's RE2 engine, which runs it as an automaton in one
+pass per text instead of trying every alias in turn.
+
+When a text mentions several states, the last mention wins, whatever
+its kind: addresses end with the state or city, so "Delhi Public School,
+Bangalore" is in Karnataka. The texts and aliases are searched reversed,
+so that mention is the first match. A name, abbreviation and city ending
+at the same place rank in that order. Abbreviations only match in upper
+case as whole words, so "up" or "mp3" don't count. Results are cached
+per distinct text.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Names and spellings of each state/UT (matched case-insensitively)
+STATE_NAMES = {
+    'Andhra Pradesh': ['andhra pradesh'],
+    'Arunachal Pradesh': ['arunachal pradesh'],
+    'Assam': ['assam'],
+    'Bihar': ['bihar'],
+    'Chhattisgarh': ['chhattisgarh', 'chattisgarh', 'chhatisgarh'],
+    'Goa': ['goa'],
+    'Gujarat': ['gujarat', 'gujrat'],
+    'Haryana': ['haryana'],
+    'Himachal Pradesh': ['himachal pradesh', 'himachal'],
+    'Jharkhand': ['jharkhand'],
+    'Karnataka': ['karnataka'],
+    'Kerala': ['kerala', 'keralam'],
+    'Madhya Pradesh': ['madhya pradesh'],
+    'Maharashtra': ['maharashtra', 'maharastra'],
+    'Manipur': ['manipur'],
+    'Meghalaya': ['meghalaya'],
+    'Mizoram': ['mizoram'],
+    'Nagaland': ['nagaland'],
+    'Odisha': ['odisha', 'orissa'],
+    'Punjab': ['punjab'],
+    'Rajasthan': ['rajasthan'],
+    'Sikkim': ['sikkim'],
+    'Tamil Nadu': ['tamil nadu', 'tamilnadu'],
+    'Telangana': ['telangana', 'telengana'],
+    'Tripura': ['tripura'],
+    'Uttar Pradesh': ['uttar pradesh'],
+    'Uttarakhand': ['uttarakhand', 'uttaranchal'],
+    'West Bengal': ['west bengal'],
+    'Andaman and Nicobar Islands': ['andaman and nicobar islands', 'andaman and nicobar', 'andaman & nicobar',
+                                    'andaman'],
+    'Chandigarh': ['chandigarh'],
+    'Dadra and Nagar Haveli and Daman and Diu': ['dadra and nagar haveli and daman and diu',
+                                                 'dadra and nagar haveli', 'dadra & nagar haveli',
+                                                 'daman and diu', 'daman & diu'],
+    'Delhi': ['delhi', 'new delhi', 'nct of delhi'],
+    'Jammu and Kashmir': ['jammu and kashmir', 'jammu & kashmir', 'j & k', 'jammu', 'kashmir'],
+    'Ladakh': ['ladakh'],
+    'Lakshadweep': ['lakshadweep'],
+    'Puducherry': ['puducherry', 'pondicherry'],
+}
+
+# Common abbreviations (matched in upper case only). Ones that are also
+# everyday words, other places or address parts (AS, OR, AN, GA, UK, PB for
+# post box, ...) are left out.
+STATE_ABBREVIATIONS = {
+    'AP': 'Andhra Pradesh', 'BR': 'Bihar', 'CG': 'Chhattisgarh', 'GJ': 'Gujarat', 'HR': 'Haryana',
+    'HP': 'Himachal Pradesh', 'JH': 'Jharkhand', 'KA': 'Karnataka', 'KL': 'Kerala', 'MP': 'Madhya Pradesh',
+    'MH': 'Maharashtra', 'MZ': 'Mizoram', 'NL': 'Nagaland', 'OD': 'Odisha', 'RJ': 'Rajasthan',
+    'TN': 'Tamil Nadu', 'TS': 'Telangana', 'TG': 'Telangana', 'UP': 'Uttar Pradesh', 'WB': 'West Bengal',
+    'DL': 'Delhi', 'NCR': 'Delhi', 'JK': 'Jammu and Kashmir', 'J&K': 'Jammu and Kashmir',
+    'A&N': 'Andaman and Nicobar Islands', 'DNH': 'Dadra and Nagar Haveli and Daman and Diu',
+}
+
+# Major cities whose state is unambiguous (matched case-insensitively). Names
+# shared by towns in two states (Bilaspur, Hamirpur, Udaipur) or that are also
+# given names, words or street names (Anand, Puri, Salem, Mandi, Erode) are left
+# out: a wrong state is worse than none.
+CITY_STATES = {
+    'Andhra Pradesh': ['visakhapatnam', 'vizag', 'vijayawada', 'guntur', 'tirupati', 'nellore', 'kakinada',
+                       'kurnool', 'amaravati', 'anantapur', 'rajahmundry'],
+    'Assam': ['guwahati', 'dibrugarh', 'silchar', 'jorhat', 'tezpur'],
+    'Bihar': ['patna', 'gaya', 'bhagalpur', 'muzaffarpur', 'darbhanga'],
+    'Chhattisgarh': ['raipur', 'bhilai', 'durg'],
+    'Goa': ['panaji', 'margao', 'vasco da gama'],
+    'Gujarat': ['ahmedabad', 'surat', 'vadodara', 'baroda', 'rajkot', 'gandhinagar', 'bhavnagar', 'jamnagar'],
+    'Haryana': ['gurugram', 'gurgaon', 'faridabad', 'panipat', 'ambala', 'hisar', 'rohtak', 'karnal',
+                'kurukshetra', 'sonipat'],
+    'Himachal Pradesh': ['shimla', 'dharamshala', 'solan'],
+    'Jharkhand': ['ranchi', 'jamshedpur', 'dhanbad', 'bokaro'],
+    'Karnataka': ['bengaluru', 'bangalore', 'mysuru', 'mysore', 'mangaluru', 'mangalore', 'hubli', 'dharwad',
+                  'belagavi', 'belgaum', 'manipal', 'udupi', 'tumkur', 'davangere', 'surathkal'],
+    'Kerala': ['thiruvananthapuram', 'trivandrum', 'kochi', 'cochin', 'ernakulam', 'kozhikode', 'calicut',
+               'thrissur', 'kollam', 'kannur', 'palakkad', 'kottayam'],
+    'Madhya Pradesh': ['bhopal', 'indore', 'jabalpur', 'gwalior', 'ujjain'],
+    'Maharashtra': ['mumbai', 'bombay', 'pune', 'nagpur', 'nashik', 'thane', 'navi mumbai', 'solapur',
+                    'kolhapur', 'amravati', 'lonavala', 'sangli'],
+    'Manipur': ['imphal'],
+    'Meghalaya': ['shillong'],
+    'Mizoram': ['aizawl'],
+    'Nagaland': ['kohima', 'dimapur'],
+    'Odisha': ['bhubaneswar', 'cuttack', 'rourkela', 'berhampur', 'sambalpur'],
+    'Punjab': ['ludhiana', 'amritsar', 'jalandhar', 'patiala', 'mohali', 'bathinda', 'phagwara'],
+    'Rajasthan': ['jaipur', 'jodhpur', 'kota', 'ajmer', 'bikaner', 'pilani', 'alwar'],
+    'Sikkim': ['gangtok'],
+    'Tamil Nadu': ['chennai', 'madras', 'coimbatore', 'madurai', 'tiruchirappalli', 'trichy', 'tirunelveli',
+                   'vellore', 'thanjavur', 'kanchipuram'],
+    'Telangana': ['hyderabad', 'secunderabad', 'warangal', 'karimnagar', 'nizamabad', 'khammam'],
+    'Tripura': ['agartala'],
+    'Uttar Pradesh': ['lucknow', 'kanpur', 'noida', 'greater noida', 'ghaziabad', 'agra', 'varanasi',
+                      'prayagraj', 'allahabad', 'meerut', 'gorakhpur', 'mathura', 'aligarh', 'bareilly'],
+    'Uttarakhand': ['dehradun', 'haridwar', 'roorkee', 'haldwani', 'rishikesh', 'nainital'],
+    'West Bengal': ['kolkata', 'calcutta', 'howrah', 'durgapur', 'siliguri', 'asansol', 'kharagpur'],
+    'Jammu and Kashmir': ['srinagar'],
+    'Ladakh': ['leh', 'kargil'],
+    'Puducherry': ['karaikal'],
+    'Andaman and Nicobar Islands': ['port blair'],
+}
+
+# Kinds of alias, in the order they rank when they end at the same place
+NAME, ABBREVIATION, CITY = 0, 1, 2
+
+# Distinct texts kept in the resolution cache
+MAX_CACHED_TEXTS = 500_000
+
+_MISSING = object()
+
+
+def _trie_pattern(phrases):
+    """Regex alternation of phrases with shared prefixes factored out (a trie written as a regex)"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end of a phrase
+
+    def pattern(node):
+        ends = '' in node
+        branches = [
+            (r'\s+' if char == ' ' else re.escape(char)) + pattern(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f'(?:{body})?' if ends else body
+
+    return pattern(trie)
+
+def _build_pattern():
+    """(RE2 pattern over reversed text, {kind: {alias: state}}), with one named group per kind"""
+    names = {name: state for state, aliases in STATE_NAMES.items() for name in aliases}
+    cities = {city: state for state, aliases in CITY_STATES.items() for city in aliases if city not in names}
+    kinds = {NAME: names, ABBREVIATION: STATE_ABBREVIATIONS, CITY: cities}
+    groups = []
+    for kind, aliases in kinds.items():
+        group = rf'(?P<kind{kind}>{_trie_pattern(alias[::-1] for alias in aliases)})'
+        groups.append(group if kind == ABBREVIATION else f'(?i:{group})')
+    return rf"\b(?:{'|'.join(groups)})\b", kinds
+
+_PATTERN, _ALIASES = _build_pattern()
+_cache = {}
+
+def _alias_keys(matched, kind):
+    """Alias table keys of matched texts (lower-cased and single-spaced, except abbreviations)"""
+    if kind != ABBREVIATION:
+        matched = pc.replace_substring_regex(pc.utf8_lower(matched), r'\s+', ' ')
+    return matched.to_numpy(zero_copy_only=False)
+
+def _search(texts):
+    """State for each of a list of strings, None where nothing matched"""
+    states = np.full(len(texts), None, dtype=object)
+    found = pc.extract_regex(pc.utf8_reverse(pa.array(texts, type=pa.string())), _PATTERN)
+    matched = found.is_valid().to_numpy(zero_copy_only=False)
+    positions = np.flatnonzero(matched)
+    found = found.filter(matched)
+    # Each match filled exactly one kind's group; the others are empty
+    for kind, aliases in _ALIASES.items():
+        group = found.field(f'kind{kind}')
+        filled = pc.not_equal(group, '').to_numpy(zero_copy_only=False)
+        keys = _alias_keys(pc.utf8_reverse(group.filter(filled)), kind)
+        states[positions[filled]] = [aliases[key] for key in keys]
+    return states.tolist()
+
+def resolve_states(values):
+    """Canonical state/UT for each value of a Series (None where nothing matched), resolving each distinct text once"""
+    codes, uniques = pd.factorize(values.astype(object) if isinstance(values.dtype, pd.CategoricalDtype) else values)
+    resolved = [_cache.get(text, _MISSING) if isinstance(text, str) else None for text in uniques]
+    new = [i for i, state in enumerate(resolved) if state is _MISSING]
+    if new:
+        texts = [uniques[i] for i in new]
+        for i, state in zip(new, _search(texts)):
+            resolved[i] = state
+        if len(_cache) + len(texts) > MAX_CACHED_TEXTS:
+            _cache.clear()
+        _cache.update((uniques[i], resolved[i]) for i in new[:MAX_CACHED_TEXTS])
+    states = np.array(resolved + [None], dtype=object)[codes]  # code -1 (missing) picks the trailing None
+    return pd.Series(states, index=values.index, dtype=object)
+
+def resolve_state(text):
+    """Canonical state/UT mentioned in text, or None"""
+    return resolve_states(pd.Series([text], dtype=object)).iloc[0]
@@ -0,0 +1,112 @@
+"""Server-side paging, sorting and searching for large preview tables.
+
+Handing a whole frame to st.dataframe sends every row to the browser.
+A TableView is built once per dataset and answers each interaction with
+row positions, so only one page of rows is ever materialized:
+
+- sorting uses a row order per (column, direction), computed the first
+  time that column is sorted on and reused afterwards
+- searching uses a lower-cased text of every row, built when a view
+  meets a search it has no result for; recent search results are kept
+
+Orders and search results are row positions, kept in a plain state dict
+that can outlive the view: a new TableView over the same rows (e.g. the
+next Streamlit rerun's frame) picks them up without keeping the frame.
+
+A GroupIndex maps each value of a column (e.g. each team) to its row
+positions with one groupby, so a group's rows are taken directly instead
+of filtering the whole frame for every group.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Search results kept per view
+MAX_CACHED_SEARCHES = 16
+
+
+class TableView:
+    """Sort orders and a search index over one frame, for paging through it"""
+
+    def __init__(self, df, state=None):
+        self.df = df
+        # Sort orders and search results (positions only) from earlier views over the same rows
+        self.state = {} if state is None else state
+        self._orders = self.state.setdefault('orders', {})
+        self._searches = self.state.setdefault('searches', OrderedDict())
+        self._search_text = None
+
+    def __len__(self):
+        return len(self.df)
+
+    def sort_order(self, column, ascending=True):
+        """Row positions of the frame sorted by column (stable, missing values last)"""
+        key = (column, ascending)
+        if key not in self._orders:
+            values = self.df[column].reset_index(drop=True)
+            try:
+                ordered = values.sort_values(ascending=ascending, kind='stable', na_position='last')
+            except TypeError:
+                # Mixed types (e.g. numbers and text) sort as text
+                ordered = values.astype(str).where(values.notna()).sort_values(
+                    ascending=ascending, kind='stable', na_position='last')
+            self._orders[key] = ordered.index.to_numpy()
+        return self._orders[key]
+
+    def _text(self):
+        if self._search_text is None:
+            text = None
+            for column in self.df.columns:
+                values = self.df[column].reset_index(drop=True).astype('string[pyarrow]').fillna('').str.lower()
+                text = values if text is None else text + '\x1f' + values
+            self._search_text = text if text is not None else pd.Series('', index=range(len(self.df)))
+        return self._search_text
+
+    def search_mask(self, term):
+        """Boolean mask of the rows with term in any column (case-insensitive)"""
+        term = term.strip().lower()
+        if term not in self._searches:
+            self._searches[term] = self._text().str.contains(term, regex=False).to_numpy(dtype=bool)
+            while len(self._searches) > MAX_CACHED_SEARCHES:
+                self._searches.popitem(last=False)
+        self._searches.move_to_end(term)
+        return self._searches[term]
+
+    def positions(self, search='', sort_by=None, ascending=True):
+        """Row positions matching search, in sort_by order (original order when None)"""
+        mask = self.search_mask(search) if search.strip() else None
+        if sort_by is None:
+            return np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+        order = self.sort_order(sort_by, ascending)
+        return order if mask is None else order[mask[order]]
+
+    def page(self, positions, page, page_size):
+        """Rows of the given 1-based page of positions"""
+        start = (page - 1) * page_size
+        return self.df.iloc[positions[start:start + page_size]]
+
+
+class GroupIndex:
+    """Row positions of each value of one column, from a single groupby"""
+
+    def __init__(self, df, column, positions=None):
+        self.df = df
+        self.column = column
+        # Positions from an earlier GroupIndex over the same rows skip the groupby
+        self.positions = positions if positions is not None else df.groupby(column, observed=True, sort=True).indices
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, value):
+        return value in self.positions
+
+    def rows(self, value):
+        """Rows of one group, in frame order"""
+        return self.df.iloc[self.positions[value]]
+
+
+def page_count(rows, page_size):
+    """Number of pages needed for rows (at least 1, so an empty result still has a page)"""
+    return max(1, -(-rows // page_size))
@@ -0,0 +1,35 @@
+"""Unit tests for export. Run from the repository root:
+
+    python -m pytest tests
+"""
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+import export
+from export import export_tables
+
+
+@pytest.fixture
+def small_sheets(monkeypatch):
+    # A 4-row worksheet (header + 3 rows) stands in for Excel's 1,048,576
+    monkeypatch.setattr(export, 'EXCEL_MAX_ROWS', 4)
+
+@pytest.mark.parametrize('engine', ['xlsxwriter', 'openpyxl', 'pandas'])
+def test_long_tables_continue_on_numbered_sheets(small_sheets, engine):
+    df = pd.DataFrame({'Name': [f"Person {i}" for i in range(8)], 'Score': range(8)})
+    workbook = pd.read_excel(BytesIO(export_tables({'Signups': df}, 'xlsx', excel_engine=engine)), sheet_name=None)
+    assert list(workbook) == ['Signups', 'Signups_2', 'Signups_3']
+    assert [len(sheet) for sheet in workbook.values()] == [3, 3, 2]
+    pd.testing.assert_frame_equal(pd.concat(workbook.values(), ignore_index=True), df)
+
+def test_numbered_sheet_names_stay_within_31_characters(small_sheets):
+    df = pd.DataFrame({'Team': range(5)})
+    workbook = pd.read_excel(BytesIO(export_tables({'T' * 40: df}, 'xlsx')), sheet_name=None)
+    assert list(workbook) == ['T' * 31, 'T' * 29 + '_2']
+
+def test_tables_that_fit_keep_one_sheet():
+    df = pd.DataFrame({'Team': []})
+    workbook = pd.read_excel(BytesIO(export_tables({'Teams': df, 'Signups': df}, 'xlsx')), sheet_name=None)
+    assert list(workbook) == ['Teams', 'Signups']
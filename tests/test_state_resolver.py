@@ -0,0 +1,91 @@
+"""Unit tests for state_resolver. Run from the repository root:
+
+    python -m pytest tests
+"""
+import pandas as pd
+import pytest
+
+from state_resolver import resolve_state, resolve_states
+
+
+@pytest.mark.parametrize('text, state', [
+    ("Tamil Nadu", 'Tamil Nadu'),
+    ("tamilnadu", 'Tamil Nadu'),
+    ("TAMIL   NADU", 'Tamil Nadu'),
+    ("Orissa", 'Odisha'),
+    ("Pondicherry University", 'Puducherry'),
+    ("Jammu & Kashmir", 'Jammu and Kashmir'),
+    ("New Delhi 110001", 'Delhi'),
+])
+def test_state_names_and_old_spellings(text, state):
+    assert resolve_state(text) == state
+
+@pytest.mark.parametrize('text, state', [
+    ("Sector 62, Noida, UP", 'Uttar Pradesh'),
+    ("Kochi KL 682001", 'Kerala'),
+    ("Srinagar, J&K", 'Jammu and Kashmir'),
+    ("Dwarka, DL", 'Delhi'),
+])
+def test_abbreviations(text, state):
+    assert resolve_state(text) == state
+
+@pytest.mark.parametrize('text', ["up north", "Hp laptop", "mp3 player", "Room TNX-4", "Goatown"])
+def test_abbreviations_only_match_whole_upper_case_words(text):
+    assert resolve_state(text) is None
+
+@pytest.mark.parametrize('text, state', [
+    ("IIT Madras", 'Tamil Nadu'),
+    ("Navi  Mumbai", 'Maharashtra'),
+    ("vizag", 'Andhra Pradesh'),
+    ("Port Blair", 'Andaman and Nicobar Islands'),
+])
+def test_cities(text, state):
+    assert resolve_state(text) == state
+
+@pytest.mark.parametrize('text, state', [
+    ("Delhi Public School, Bangalore", 'Karnataka'),
+    ("Bangalore, Delhi", 'Delhi'),
+    ("Punjab National Bank, Chennai", 'Tamil Nadu'),
+    ("Hyderabad, AP", 'Andhra Pradesh'),
+    ("KA 560001, Kerala", 'Kerala'),
+    ("Kerala Bhavan, Pune, MH", 'Maharashtra'),
+])
+def test_last_mention_wins_across_kinds(text, state):
+    assert resolve_state(text) == state
+
+@pytest.mark.parametrize('text', [
+    "PB NO 12",
+    "S/O Anand Kumar",
+    "Anand Vihar",
+    "Mandi House",
+    "Bilaspur",
+    "Hamirpur",
+    "Udaipur",
+    "S/O Ravi Puri",
+    "12 Salem Street",
+])
+def test_ambiguous_names_resolve_to_nothing(text):
+    assert resolve_state(text) is None
+
+@pytest.mark.parametrize('text, state', [
+    ("PB NO 12, Ludhiana", 'Punjab'),
+    ("Anand Vihar, New Delhi", 'Delhi'),
+    ("Mandi House, Delhi", 'Delhi'),
+    ("Bilaspur, Chhattisgarh", 'Chhattisgarh'),
+])
+def test_ambiguous_names_defer_to_the_rest_of_the_address(text, state):
+    assert resolve_state(text) == state
+
+def test_nothing_known():
+    assert resolve_state("Springfield") is None
+    assert resolve_state("") is None
+
+def test_resolve_states_keeps_index_and_missing_values():
+    values = pd.Series(["Chennai", None, "Chennai", "Springfield"], index=[10, 11, 12, 13])
+    states = resolve_states(values)
+    assert states.index.tolist() == [10, 11, 12, 13]
+    assert states.tolist() == ['Tamil Nadu', None, 'Tamil Nadu', None]
+
+def test_resolve_states_on_categoricals():
+    values = pd.Series(["Pune", "Bhopal", "Pune"], dtype='category')
+    assert resolve_states(values).tolist() == ['Maharashtra', 'Madhya Pradesh', 'Maharashtra']